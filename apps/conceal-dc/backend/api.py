@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi import FastAPI, HTTPException, Query, Depends, Header, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import boto3
 from boto3.dynamodb.conditions import Key
@@ -7,10 +8,12 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 import base64
 import json
+import logging
 from decimal import Decimal
 import os
 import threading
-import calendar
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 import time
 import random
@@ -22,6 +25,20 @@ from auth.token_utils import generate_otp_code, generate_tokens, verify_token
 from auth.dependencies import get_current_user
 from auth.database import DatabaseService
 from auth.notifications import NotificationService
+from repository import DynamoRepository
+from slot_store import Slot, SlotStore
+from daily_calendar import DailyCalendar
+from broadcast import BroadcastHub
+from telemetry import (
+    PROMETHEUS_CONTENT_TYPE,
+    MetricsMiddleware,
+    instrument_dynamodb,
+    log,
+    metrics,
+    start_logging,
+    stop_logging,
+)
+from auth.token_utils import claims_cache
 
 # -------------------------------
 # 🛠️ FastAPI Setup
@@ -40,6 +57,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so the latency it records includes CORS handling
+app.add_middleware(MetricsMiddleware)
+start_logging()
 
 # -------------------------------
 # 🛠️ AWS Services Configuration
@@ -52,26 +72,54 @@ DYNAMODB_ENDPOINT = os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000')
 DDB_TABLE_NAME = 'Appointments'
 NOTIFICATIONS_TABLE_NAME = 'Notifications'
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb', endpoint_url=DYNAMODB_ENDPOINT, region_name=REGION)
+# Initialize AWS clients; one pooled DynamoDB resource is shared by the handlers and the cache thread
+repository = DynamoRepository(
+    endpoint_url=DYNAMODB_ENDPOINT,
+    region_name=REGION,
+    max_connections=int(os.getenv('DYNAMODB_MAX_CONNECTIONS', '32'))
+)
+dynamodb = repository.resource
+instrument_dynamodb(dynamodb.meta.client)
 sns_client = boto3.client("sns", region_name=REGION)
 ses_client = boto3.client("ses", region_name=REGION)
 
 # Initialize services
-db_service = DatabaseService(dynamodb_resource=dynamodb)
-notification_service = NotificationService(sns_client=sns_client, ses_client=ses_client)
+db_service = DatabaseService(repository=repository)
+notification_service = NotificationService(
+    sns_client=sns_client,
+    ses_client=ses_client,
+    ses_otp_template=os.getenv('SES_OTP_TEMPLATE')
+)
 
-# Get table references
+# Get table references: `table` for the cache thread, async tables for request handlers
 table = dynamodb.Table(DDB_TABLE_NAME)
-notifications_table = dynamodb.Table(NOTIFICATIONS_TABLE_NAME)
+appointments_table = repository.table(DDB_TABLE_NAME)
+notifications_table = repository.table(NOTIFICATIONS_TABLE_NAME)
 
 # -------------------------------
 # 🗂️ Cache Configuration
 # -------------------------------
 
-APPOINTMENTS_CACHE = defaultdict(list)
-DAILY_AVAILABILITY = {"available": set(), "booked": set(), "unavailable": set()}
-CACHE_LOCK = threading.Lock()
+CACHE_MONTHS = 13
+CACHE_REFRESH_SECONDS = 5
+CACHE_LOADER_WORKERS = 4
+DAILY_REFRESH_SECONDS = 30
+DAILY_HORIZON_DAYS = 53 * 7
+WATERMARK_OVERLAP_SECONDS = 60
+
+# Replaced wholesale by the refresh thread; readers take a local reference and never lock.
+APPOINTMENTS_STORE = SlotStore.empty()
+# Set once the first full load lands; /ready reports 503 until then.
+CACHE_READY = threading.Event()
+LAST_LOAD_REPORT = {}
+
+CACHE_LOADER_POOL = ThreadPoolExecutor(max_workers=CACHE_LOADER_WORKERS, thread_name_prefix="cache-loader")
+_loader_local = threading.local()
+
+# Pushes slot deltas from the refresh thread to /appointments/stream subscribers.
+slot_changes = BroadcastHub()
+STREAM_HEARTBEAT_SECONDS = 15
+DAILY_CALENDAR = DailyCalendar.empty()
 
 # -------------------------------
 # 🔑 Utility Functions
@@ -84,7 +132,7 @@ def encode_next_token(last_evaluated_key: Optional[dict] = None) -> Optional[str
         json_string = json.dumps(last_evaluated_key)
         return base64.urlsafe_b64encode(json_string.encode('utf-8')).decode('utf-8').rstrip('=')
     except (TypeError, ValueError) as e:
-        print(f"❌ Error encoding next_token: {e}")
+        log("❌ Error encoding next_token", level=logging.ERROR, error=str(e))
         return None
 
 def decode_next_token(next_token: Optional[str]) -> Optional[dict]:
@@ -94,9 +142,27 @@ def decode_next_token(next_token: Optional[str]) -> Optional[dict]:
         padding = '=' * (-len(next_token) % 4)
         return json.loads(base64.urlsafe_b64decode((next_token + padding).encode('utf-8')).decode('utf-8'))
     except (base64.binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
-        print(f"❌ Error decoding next_token: {e}")
+        log("❌ Error decoding next_token", level=logging.ERROR, error=str(e))
         return None
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, per RFC 9110."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def cached_json_response(body: bytes, etag: str, if_none_match: Optional[str], version: int) -> Response:
+    """Serve pre-encoded JSON, or a 304 if the client already holds this ETag."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache-Version": str(version)}
+    if if_none_match:
+        matched = etag_matches(if_none_match, etag)
+        metrics.inc("cache_requests_total", cache="etag", result="hit" if matched else "miss")
+        if matched:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 def convert_decimal_to_native(value):
     if isinstance(value, list):
         return [convert_decimal_to_native(v) for v in value]
@@ -110,43 +176,178 @@ def convert_decimal_to_native(value):
 # 🔄 Background Tasks
 # -------------------------------
 
+def cache_months(current_date: datetime, count: int = CACHE_MONTHS) -> List[str]:
+    """Return the YYYY-MM partitions covered by the cache, starting with the current month."""
+    months = []
+    for i in range(count):
+        year, month = divmod(current_date.month - 1 + i, 12)
+        months.append(f"{current_date.year + year}-{month + 1:02d}")
+    return months
+
+def query_all(query_table=None, **query_config) -> tuple:
+    """Run a table query to completion, following LastEvaluatedKey. Returns (items, consumed RCUs)."""
+    query_table = query_table or table
+    items = []
+    consumed_capacity = 0
+    while True:
+        response = query_table.query(**query_config, ReturnConsumedCapacity='TOTAL')
+        items.extend(response.get('Items', []))
+        consumed_capacity += response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            return items, consumed_capacity
+        query_config['ExclusiveStartKey'] = last_evaluated_key
+
+def loader_table():
+    """Per-thread Appointments table; boto3 resources must not be shared across threads."""
+    if not hasattr(_loader_local, 'table'):
+        resource = boto3.session.Session().resource('dynamodb', endpoint_url=DYNAMODB_ENDPOINT, region_name=REGION)
+        # Partition loads are the biggest RCU consumer, so they count like every other call
+        instrument_dynamodb(resource.meta.client)
+        _loader_local.table = resource.Table(DDB_TABLE_NAME)
+    return _loader_local.table
+
+def load_month(year_month: str) -> tuple:
+    """Load one year_month partition. Returns (packed slots, report)."""
+    started = time.perf_counter()
+    items, consumed_capacity = query_all(
+        loader_table(),
+        KeyConditionExpression=Key('year_month').eq(year_month),
+        ScanIndexForward=True
+    )
+    report = {
+        'year_month': year_month,
+        'items': len(items),
+        'consumed_capacity': consumed_capacity,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+    return [Slot.from_item(convert_decimal_to_native(item)) for item in items], report
+
+def load_months(months: List[str]) -> List[Slot]:
+    """Load every slot in the given year_month partitions, CACHE_LOADER_WORKERS at a time."""
+    global LAST_LOAD_REPORT
+
+    if not months:
+        return []
+
+    started = time.perf_counter()
+    slots, partitions = [], []
+    for month_slots, report in CACHE_LOADER_POOL.map(load_month, months):
+        slots.extend(month_slots)
+        partitions.append(report)
+        print(f"🔄 Loaded {report['items']} slots for {report['year_month']} "
+              f"in {report['seconds']}s ({report['consumed_capacity']} RCUs).")
+
+    LAST_LOAD_REPORT = {
+        'loaded_at': int(time.time()),
+        'seconds': round(time.perf_counter() - started, 3),
+        'consumed_capacity': sum(report['consumed_capacity'] for report in partitions),
+        'partitions': partitions
+    }
+    return slots
+
+def fetch_changes_since(watermark: int) -> tuple:
+    """
+    Fetch slots changed since the watermark from RecentUpdatesIndex.
+    Returns (packed slots, new watermark). The query reaches back WATERMARK_OVERLAP_SECONDS
+    to cover worker clock skew and index propagation delay; re-applying an
+    unchanged slot is a no-op.
+    """
+    since = str(max(watermark - WATERMARK_OVERLAP_SECONDS, 0))
+    items, consumed_capacity = query_all(
+        IndexName='RecentUpdatesIndex',
+        KeyConditionExpression=Key('global_pk').eq('updates') & Key('last_changed').gte(since),
+        ScanIndexForward=True
+    )
+    if items:
+        print(f"🔄 Pulled {len(items)} recent updates ({consumed_capacity} RCUs).")
+
+    items = [convert_decimal_to_native(item) for item in items]
+    for item in items:
+        watermark = max(watermark, int(item['last_changed']))
+    return [Slot.from_item(item) for item in items], watermark
+
+def refresh_daily_calendar() -> None:
+    """Rebuild the daily availability calendar from the 'A' partition; swap it in only if it changed."""
+    global DAILY_CALENDAR
+
+    today = datetime.utcnow().date()
+    items, consumed_capacity = query_all(
+        KeyConditionExpression=Key('year_month').eq('A') & Key('date_time').gte(today.isoformat()),
+        ScanIndexForward=True
+    )
+    current = DAILY_CALENDAR
+    availability = DailyCalendar.build(items, today, DAILY_HORIZON_DAYS, version=current.version + 1)
+    if availability.etag != current.etag:
+        DAILY_CALENDAR = availability
+        print(f"✅ Daily calendar rebuilt from {len(items)} days ({consumed_capacity} RCUs).")
+
 def load_appointments_to_cache():
-    """Background task to query DynamoDB and cache appointments for the next 12 months."""
-    global APPOINTMENTS_CACHE
+    """
+    Background task that keeps the appointments cache in sync with DynamoDB.
+
+    The first pass loads every cached month. After that only slots changed since
+    the watermark are pulled from RecentUpdatesIndex and patched into the store;
+    a month that rolls into the window is loaded on its own.
+    """
+    global APPOINTMENTS_STORE
+
+    watermark = None
+    months = []
+    daily_refreshed_at = 0
 
     while True:
         try:
-            print("🔄 Refreshing appointments cache...")
-            current_date = datetime.utcnow()
-            temp_cache = defaultdict(list)
-
-            for i in range(13):
-                month_date = (current_date + timedelta(days=30 * i)).replace(day=1)
-                year_month = month_date.strftime("%Y-%m")
-
-                response = table.query(
-                    KeyConditionExpression=Key('year_month').eq(year_month),
-                    ScanIndexForward=True,
-                    ReturnConsumedCapacity='TOTAL'
-                )
-                
-                for item in response.get('Items', []):
-                    temp_cache[year_month].append(convert_decimal_to_native(item))
-                time.sleep(1)
-
-            with CACHE_LOCK:
-                APPOINTMENTS_CACHE = temp_cache
-            print("✅ Cache refreshed successfully!")
+            current_months = cache_months(datetime.utcnow())
+
+            if watermark is None:
+                print("🔄 Rebuilding appointments cache...")
+                started_at = int(time.time())
+                slots = load_months(current_months)
+                APPOINTMENTS_STORE = SlotStore.build(slots, version=APPOINTMENTS_STORE.version + 1)
+                watermark = started_at
+                # Ready as soon as slots are servable, even if the daily calendar refresh below fails
+                CACHE_READY.set()
+                print(f"✅ Cache rebuilt with {len(APPOINTMENTS_STORE)} slots "
+                      f"in {LAST_LOAD_REPORT['seconds']}s.")
+            else:
+                slots, watermark = fetch_changes_since(watermark)
+                slots.extend(load_months([month for month in current_months if month not in months]))
+
+                store = APPOINTMENTS_STORE
+                patched, changed = store.patch(slots, store.version + 1, set(current_months))
+                if patched is not store:
+                    APPOINTMENTS_STORE = patched
+                    slot_changes.publish_threadsafe([slot.to_dict() for slot in changed], patched.version)
+                    print(f"✅ Cache patched to version {patched.version} ({len(changed)} changed slots).")
+
+            months = current_months
+
+            if time.time() - daily_refreshed_at >= DAILY_REFRESH_SECONDS:
+                refresh_daily_calendar()
+                daily_refreshed_at = time.time()
 
         except Exception as e:
-            print(f"❌ Failed to preload appointments cache: {e}")
+            print(f"❌ Failed to refresh appointments cache: {e}")
 
-        time.sleep(30)
+        time.sleep(CACHE_REFRESH_SECONDS)
+
+@app.on_event("startup")
+async def bind_broadcast_hub():
+    slot_changes.bind(asyncio.get_running_loop())
 
 @app.on_event("startup")
 def startup_event():
     cache_thread = threading.Thread(target=load_appointments_to_cache, daemon=True)
     cache_thread.start()
+    notification_service.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    notification_service.stop()
+    repository.close()
+    stop_logging()
 
 # -------------------------------
 # 🔍 API Endpoints
@@ -156,14 +357,53 @@ def startup_event():
 def read_root():
     return {"message": "DynamoDB Appointments API is running!"}
 
-    # In production, handle exceptions or ceck the response for success/failure.
+@app.get("/health")
+async def health_check():
+    """Liveness probe for the container health check: the process is up and serving."""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """
+    Readiness probe for the load balancer's target group: 503 until the
+    appointments cache has been loaded. Not a liveness check; a slow cold load
+    or a DynamoDB outage at startup must not get the task restarted.
+    """
+    store = APPOINTMENTS_STORE
+    if not CACHE_READY.is_set():
+        response.status_code = 503
+    return {
+        "ready": CACHE_READY.is_set(),
+        "version": store.version,
+        "slots": len(store),
+        "last_load": LAST_LOAD_REPORT
+    }
+
+metrics.declare("appointments_cache_slots", "gauge", "Slots in the appointments cache.")
+metrics.declare("appointments_cache_version", "gauge", "Version of the appointments cache.")
+metrics.declare("stream_subscribers", "gauge", "Open /appointments/stream connections.")
+
+@metrics.collector
+def collect_cache_metrics(registry) -> None:
+    store = APPOINTMENTS_STORE
+    registry.set("appointments_cache_slots", len(store))
+    registry.set("appointments_cache_version", store.version)
+    registry.set("stream_subscribers", len(slot_changes))
+    registry.set("cache_requests_total", claims_cache.stats["hits"], cache="claims", result="hit")
+    registry.set("cache_requests_total", claims_cache.stats["misses"], cache="claims", result="miss")
+
+@app.get("/metrics", include_in_schema=False)
+def export_metrics():
+    """Request, DynamoDB and cache metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 # Add the auth router
-from auth.routes import router as auth_router
+from auth.routes import router as auth_router, init_services
+init_services(db_service, notification_service)
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 
 @app.get("/appointments/recent", response_model=dict)
-def fetch_recent_updates(
+async def fetch_recent_updates(
     limit: int = Query(10, description="Number of recent updates to fetch"),
     next_token: Optional[str] = Query(None, description="Pagination token")
 ):
@@ -171,7 +411,7 @@ def fetch_recent_updates(
     Fetch recent updates globally, sorted by last_changed with pagination.
     """
     try:
-        print("🔍 Querying RecentUpdatesIndex for recent updates...")
+        log("🔍 Querying RecentUpdatesIndex for recent updates", level=logging.DEBUG, limit=limit)
 
         query_config = {
             'IndexName': 'RecentUpdatesIndex',
@@ -186,9 +426,9 @@ def fetch_recent_updates(
             if exclusive_start_key:
                 query_config['ExclusiveStartKey'] = exclusive_start_key
             else:
-                print("⚠️ Invalid next_token provided. Ignoring and starting fresh.")
+                log("⚠️ Invalid next_token provided. Ignoring and starting fresh.", level=logging.WARNING)
 
-        response = table.query(**query_config)
+        response = await appointments_table.query(**query_config)
         items = response.get('Items', [])
         for item in items:
             item.pop('year_month', None)
@@ -200,15 +440,12 @@ def fetch_recent_updates(
         last_evaluated_key = response.get('LastEvaluatedKey')
         next_token = encode_next_token(last_evaluated_key) if last_evaluated_key else None
 
-        consumed_capacity = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
-        print(f"🔄 DynamoDB Query consumed {consumed_capacity} RCUs.")
-
         return {
             'items': items,
             'next_token': next_token
         }
     except Exception as e:
-        print(f"❌ Failed to fetch recent updates: {e}")
+        log("❌ Failed to fetch recent updates", level=logging.ERROR, error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -217,102 +454,26 @@ def fetch_recent_updates(
 # -------------------------------
 
 @app.get("/appointments/daily", response_model=dict)
-def fetch_daily_availability():
+async def fetch_daily_availability(if_none_match: Optional[str] = Header(None)):
     """
-    Fetch daily availability statuses for the entire year using PK 'A',
-    skipping weekends, and marking missing weekdays as 'unavailable'.
+    Fetch daily availability statuses from today through the scrape horizon,
+    skipping weekends and marking unreported weekdays as 'unavailable'.
+    Served from the calendar the cache thread keeps built from PK 'A'.
     """
-    try:
-        print("🔍 Querying daily availability for the entire year...")
-
-        # Get today's date in the correct format
-        today = datetime.utcnow().strftime("%Y-%m-%d")
-
-        query_config = {
-            'KeyConditionExpression': Key('year_month').eq('A') & Key('date_time').gte(today),
-            'ScanIndexForward': True,  # Ascending order by sort key (date)
-            'ReturnConsumedCapacity': 'TOTAL'
-        }
-        
-        # ✅ Query DynamoDB
-        response = table.query(**query_config)
-        items = response.get('Items', [])
-
-        open_dates = set()
-        booked_dates = set()
-        unavailable_dates = set()
-        observed_dates = set()
+    availability = DAILY_CALENDAR
+    return cached_json_response(availability.body, availability.etag, if_none_match, availability.version)
 
-        # ✅ Process Items
-        for item in items:
-            date = item.get('date_time')
-            status = item.get('status', '0')
-
-            if not date:
-                continue
-
-            # Parse the date and skip weekends
-            date_obj = datetime.strptime(date, "%Y-%m-%d")
-            if date_obj.weekday() in [5, 6]:  # Saturday (5) or Sunday (6)
-                continue
-
-            observed_dates.add(date)
-
-            if status == '1':
-                open_dates.add(date)
-            elif status == '0':
-                booked_dates.add(date)
-            else:
-                unavailable_dates.add(date)
-
-        # ✅ Identify Missing Dates as Unavailable
-        current_year = datetime.utcnow().year
-        all_weekdays_of_year = set()
-        
-        for month in range(1, 13):
-            _, last_day = calendar.monthrange(current_year, month)
-            for day in range(1, last_day + 1):
-                date = f"{current_year}-{month:02d}-{day:02d}"
-                date_obj = datetime.strptime(date, "%Y-%m-%d")
-                
-                if date_obj.weekday() in [5, 6]:  # Skip weekends or is before today
-                    continue
-                
-                if date_obj < datetime.utcnow():
-                    continue
-                
-                all_weekdays_of_year.add(date)
-
-        # Any weekday not observed is considered unavailable
-        missing_dates = all_weekdays_of_year - observed_dates
-        unavailable_dates.update(missing_dates)
-
-        # ✅ Prepare the final response
-        consumed_capacity = response.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
-        print(f"🔄 DynamoDB Query consumed {consumed_capacity} RCUs.")
-
-        return {
-            'open': sorted(open_dates),
-            'booked': sorted(booked_dates),
-            'unavailable': sorted(unavailable_dates),
-        }
-
-    except HTTPException as http_exc:
-        raise http_exc
-    except Exception as e:
-        print(f"❌ Failed to fetch daily availability: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
 # -------------------------------
 # 🚨 Fetch Open Appointments
 # -------------------------------
 
 @app.get("/appointments/open", response_model=dict)
-def fetch_open_appointments(
+async def fetch_open_appointments(
     limit: int = Query(10, description="Number of appointments to fetch"),
     next_token: Optional[str] = Query(None, description="Pagination token")
 ):
     try:
-        print("🔍 Querying StatusIndex for open appointments...")
+        log("🔍 Querying StatusIndex for open appointments", level=logging.DEBUG, limit=limit)
 
         query_config = {
             'IndexName': 'StatusIndex',
@@ -327,7 +488,7 @@ def fetch_open_appointments(
             if exclusive_start_key:
                 query_config['ExclusiveStartKey'] = exclusive_start_key
 
-        response = table.query(**query_config)
+        response = await appointments_table.query(**query_config)
         items = response.get('Items', [])
         items = convert_decimal_to_native(items)
 
@@ -347,15 +508,18 @@ def fetch_open_appointments(
 # -------------------------------
 
 @app.get("/appointments", response_model=dict)
-def fetch_appointments_between_dates(
+async def fetch_appointments_between_dates(
     start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
-    end_date: str = Query(..., description="End date in YYYY-MM-DD format")
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
     Fetch appointment slots between start_date and end_date using the cache.
+    The body is stitched from JSON pre-encoded at refresh time and carries a
+    strong ETag, so polling clients get a 304 until the range changes.
     """
     try:
-        print("🔍 Fetching appointments between dates from cache...")
+        log("🔍 Fetching appointments between dates from cache", level=logging.DEBUG, start_date=start_date, end_date=end_date)
 
         # Validate date format
         try:
@@ -368,32 +532,70 @@ def fetch_appointments_between_dates(
         if (end_dt - start_dt).days > 31:
             raise HTTPException(status_code=400, detail="Date range must not exceed 31 days.")
 
-        # Extract relevant months
-        months = set()
-        current_dt = start_dt
-        while current_dt <= end_dt:
-            months.add(current_dt.strftime("%Y-%m"))
-            current_dt += timedelta(days=1)
+        store = APPOINTMENTS_STORE
+        pieces, etag = store.encoded_between(start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d"))
+        body = b'{"items":[' + b",".join(pieces) + b"]}"
 
-        results = []
+        return cached_json_response(body, etag, if_none_match, store.version)
 
-        with CACHE_LOCK:
-            for month in months:
-                if month in APPOINTMENTS_CACHE:
-                    for appointment in APPOINTMENTS_CACHE[month]:
-                        appointment_date = datetime.strptime(appointment['date_time'], "%Y-%m-%d_%H:%M").date()
-                        if start_dt.date() <= appointment_date <= end_dt.date():
-                            results.append(appointment)
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        log("❌ Failed to fetch appointments between dates", level=logging.ERROR, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
 
-        print(f"✅ Found {len(results)} appointments in cache.")
+# -------------------------------
+# 📡 Stream Slot Changes
+# -------------------------------
 
-        return {
-            'items': results
-        }
+@app.get("/appointments/stream")
+async def stream_appointment_changes(
+    request: Request,
+    start_date: Optional[str] = Query(None, description="Only push slots on or after this YYYY-MM-DD date"),
+    end_date: Optional[str] = Query(None, description="Only push slots on or before this YYYY-MM-DD date"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Server-Sent Events feed of slot status changes detected by the cache refresh.
+    Each `slots` event carries a JSON array of changed slots and the cache version
+    as its id. A `resync` event tells a reconnecting client it missed versions and
+    should refetch /appointments.
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d") if start_date else ""
+        end = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d") if end_date else "9999-12-31"
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+    async def events():
+        # Subscribed on first iteration, so a response that is never sent can't leak a subscription
+        subscription = slot_changes.subscribe(start, end)
+        version = APPOINTMENTS_STORE.version
+        try:
+            yield b"retry: 5000\n\n"
+            if last_event_id and last_event_id != str(version):
+                yield f"id: {version}\nevent: resync\ndata: {{}}\n\n".encode("utf-8")
+
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": ping\n\n"
+                    continue
 
-    except Exception as e:
-        print(f"❌ Failed to fetch appointments between dates: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+                if frame is None:  # Dropped for falling behind
+                    return
+                yield frame
+        finally:
+            slot_changes.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # -------------------------------
 # 📨 Notification Endpoints
@@ -418,7 +620,7 @@ async def get_notifications(
             if exclusive_start_key:
                 query_params['ExclusiveStartKey'] = exclusive_start_key
 
-        response = notifications_table.query(**query_params)
+        response = await notifications_table.query(**query_params)
         
         items = [convert_decimal_to_native(item) for item in response.get('Items', [])]
 
@@ -465,7 +667,7 @@ async def create_notification(
             'created_at': int(time.time())
         }
 
-        notifications_table.put_item(Item=item)
+        await notifications_table.put_item(Item=item)
         return {"message": "Notification created", "notification_id": notification_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -478,7 +680,7 @@ async def delete_notification(
 ):
     """Delete a notification."""
     try:
-        notifications_table.delete_item(
+        await notifications_table.delete_item(
             Key={
                 'notification_id': notification_id,
                 'user_id': current_user['user_id']
@@ -5,6 +5,7 @@ SECRET_KEY = "your-secret-key"  # Replace with a secure key in production
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+CLAIMS_CACHE_SIZE = 10000  # Verified access tokens remembered per process
 
 # OTP Configuration
 OTP_LENGTH = 6 
\ No newline at end of file
@@ -1,59 +1,186 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import uuid4
-from boto3.dynamodb.conditions import Key
-import boto3
 import os
+import time
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
 
-# AWS Services Configuration
-REGION = 'us-east-1'
-DYNAMODB_ENDPOINT = os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000')
+from repository import deserialize_item
 
 # DynamoDB Tables
 OTP_TABLE_NAME = "OtpTable"
 USERS_TABLE_NAME = "Users"
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb', endpoint_url=DYNAMODB_ENDPOINT, region_name=REGION)
-
-# Get table references
-otp_table = dynamodb.Table(OTP_TABLE_NAME)
-users_table = dynamodb.Table(USERS_TABLE_NAME)
-
 # Constants
 OTP_EXPIRATION_MINUTES = 5
 
+# Identity items live in the Users table under user_id "EMAIL#<email>" or
+# "PHONE#<phone>" and point at the real user through `owner_id`. They carry no
+# email or phone_number attribute, so they stay out of both GSIs.
+EMAIL_IDENTITY_PREFIX = "EMAIL#"
+PHONE_IDENTITY_PREFIX = "PHONE#"
+# Users created before identity items existed are found through the GSIs and
+# backfilled on their next login. Set to 0 once every user has identity items.
+IDENTITY_GSI_FALLBACK = os.getenv("IDENTITY_GSI_FALLBACK", "1") == "1"
+
+
+class OtpNotFound(Exception):
+    """No unexpired OTP is stored under that id."""
+
+
+class OtpMismatch(Exception):
+    """An OTP is stored under that id, but the code is different."""
+
+
+def identity_keys(email: Optional[str], phone_number: Optional[str]) -> List[str]:
+    keys = []
+    if email:
+        keys.append(EMAIL_IDENTITY_PREFIX + email)
+    if phone_number:
+        keys.append(PHONE_IDENTITY_PREFIX + phone_number)
+    return keys
+
+
 class DatabaseService:
-    def __init__(self, dynamodb_resource=None):
-        if not dynamodb_resource:
-            raise ValueError("DynamoDB resource is required")
-            
-        self.dynamodb = dynamodb_resource
-        self.otp_table = self.dynamodb.Table("OtpTable")
-        self.users_table = self.dynamodb.Table("Users")
-
-    def get_user_by_phone_number(self, phone_number: str) -> Optional[dict]:
+    """Users and OTP storage. Every call goes through the shared async repository."""
+
+    def __init__(self, repository=None):
+        if not repository:
+            raise ValueError("DynamoDB repository is required")
+
+        self.repository = repository
+        self.otp_table = repository.table(OTP_TABLE_NAME)
+        self.users_table = repository.table(USERS_TABLE_NAME)
+
+    async def get_user_by_phone_number(self, phone_number: str) -> Optional[dict]:
         """Fetch a user by phone number using the PhoneNumberIndex."""
-        response = self.users_table.query(
+        response = await self.users_table.query(
             IndexName="PhoneNumberIndex",
             KeyConditionExpression=Key("phone_number").eq(phone_number)
         )
         items = response.get("Items", [])
         return items[0] if items else None
 
-    def get_user_by_email(self, email: str) -> Optional[dict]:
+    async def get_user_by_email(self, email: str) -> Optional[dict]:
         """Fetch a user by email using the EmailIndex."""
-        response = self.users_table.query(
+        response = await self.users_table.query(
             IndexName="EmailIndex",
             KeyConditionExpression=Key("email").eq(email)
         )
         items = response.get("Items", [])
         return items[0] if items else None
 
-    def create_user(self, email: Optional[str], phone_number: Optional[str]) -> str:
+    async def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, dict]:
+        """Fetch users by user_id with BatchGetItem, 100 keys per request."""
+        users = {}
+        for i in range(0, len(user_ids), 100):
+            request = {USERS_TABLE_NAME: {"Keys": [{"user_id": user_id} for user_id in user_ids[i:i + 100]]}}
+            while request:
+                response = await self.repository.batch_get_item(RequestItems=request)
+                for user in response.get("Responses", {}).get(USERS_TABLE_NAME, []):
+                    users[user["user_id"]] = user
+                request = response.get("UnprocessedKeys")
+        return users
+
+    async def get_user_id_by_identity(self, email: Optional[str], phone_number: Optional[str]) -> Optional[str]:
+        """
+        Resolve a user_id with one GetItem on the identity item (email first, as
+        the GSI lookup did). Doesn't consult the GSIs.
+        """
+        key = identity_keys(email, None if email else phone_number)[0]
+        response = await self.users_table.get_item(Key={"user_id": key}, ProjectionExpression="owner_id")
+        item = response.get("Item")
+        return item["owner_id"] if item else None
+
+    async def start_login(
+        self, email: Optional[str], phone_number: Optional[str], otp_id: str, otp_code: str
+    ) -> Tuple[str, bool]:
+        """
+        Find or create the user and store their OTP. Returns (user_id, created).
+
+        A known identity takes two round trips: the identity GetItem and the OTP
+        put. Otherwise the identity items, the user (if new) and the OTP are
+        written in one transaction, with the identity items conditioned on not
+        existing, so two concurrent first logins can't create two users.
+        """
+        for attempt in range(2):
+            user_id = await self.get_user_id_by_identity(email, phone_number)
+            if user_id:
+                await self.store_otp(otp_id, otp_code, user_id)
+                return user_id, False
+
+            user = None
+            if IDENTITY_GSI_FALLBACK:
+                user = await (self.get_user_by_email(email) if email else self.get_user_by_phone_number(phone_number))
+
+            # The first attempt claims every identity given; if that conflicts, only the one looked up.
+            claims = identity_keys(email, phone_number) if attempt == 0 else identity_keys(email, None if email else phone_number)
+            try:
+                if user:
+                    await self._write_login(user["user_id"], claims, otp_id, otp_code)
+                    return user["user_id"], False
+                user_id = str(uuid4())
+                await self._write_login(user_id, claims, otp_id, otp_code, new_user=(email, phone_number))
+                return user_id, True
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                # Another login claimed an identity first; resolve it again.
+        raise RuntimeError("Could not resolve user identity")
+
+    async def _write_login(
+        self, user_id: str, claims: List[str], otp_id: str, otp_code: str, new_user: Optional[tuple] = None
+    ) -> None:
+        operations = [self._identity_put(key, user_id) for key in claims]
+        if new_user is not None:
+            operations.append({"Put": {
+                "TableName": USERS_TABLE_NAME,
+                "Item": self._user_item(user_id, *new_user),
+                "ConditionExpression": "attribute_not_exists(user_id)"
+            }})
+        operations.append({"Put": {"TableName": OTP_TABLE_NAME, "Item": self._otp_item(otp_id, otp_code, user_id)}})
+        await self.repository.transact_write_items(operations)
+
+    @staticmethod
+    def _identity_put(key: str, user_id: str) -> dict:
+        """Claim an identity for `user_id`; a no-op rewrite if it already points there."""
+        return {"Put": {
+            "TableName": USERS_TABLE_NAME,
+            "Item": {"user_id": key, "owner_id": user_id},
+            "ConditionExpression": "attribute_not_exists(user_id) OR owner_id = :owner",
+            "ExpressionAttributeValues": {":owner": user_id}
+        }}
+
+    async def backfill_identities(self) -> int:
+        """Write missing identity items for every user; returns how many were created."""
+        created = 0
+        kwargs = {"ProjectionExpression": "user_id, email, phone_number"}
+        while True:
+            response = await self.users_table.scan(**kwargs)
+            for user in response.get("Items", []):
+                for key in identity_keys(user.get("email"), user.get("phone_number")):
+                    try:
+                        await self.users_table.put_item(
+                            Item={"user_id": key, "owner_id": user["user_id"]},
+                            ConditionExpression="attribute_not_exists(user_id)"
+                        )
+                        created += 1
+                    except ClientError as e:
+                        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                            raise
+            if "LastEvaluatedKey" not in response:
+                return created
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    async def create_user(self, email: Optional[str], phone_number: Optional[str]) -> str:
         """Create a new user with a UUID."""
         user_id = str(uuid4())
-        
+        await self.users_table.put_item(Item=self._user_item(user_id, email, phone_number))
+        return user_id
+
+    @staticmethod
+    def _user_item(user_id: str, email: Optional[str], phone_number: Optional[str]) -> dict:
         user_data = {
             "user_id": user_id,
             "created_at": datetime.utcnow().isoformat()
@@ -62,26 +189,57 @@ class DatabaseService:
             user_data["email"] = email
         if phone_number:
             user_data["phone_number"] = phone_number
+        return user_data
 
-        self.users_table.put_item(Item=user_data)
-        return user_id
+    async def store_otp(self, otp_id: str, otp_code: str, user_id: Optional[str] = None) -> None:
+        """Store the OTP code with a TTL, and the user it belongs to when known."""
+        await self.otp_table.put_item(Item=self._otp_item(otp_id, otp_code, user_id))
 
-    def store_otp(self, otp_id: str, otp_code: str) -> None:
-        """Store the OTP code with a TTL."""
-        expires_at = int((datetime.utcnow() + timedelta(minutes=5)).timestamp())
-        self.otp_table.put_item(
-            Item={
-                "otp_id": otp_id,
-                "otp_code": otp_code,
-                "expires_at": expires_at
-            }
-        )
+    @staticmethod
+    def _otp_item(otp_id: str, otp_code: str, user_id: Optional[str]) -> dict:
+        expires_at = int((datetime.utcnow() + timedelta(minutes=OTP_EXPIRATION_MINUTES)).timestamp())
+        item = {
+            "otp_id": otp_id,
+            "otp_code": otp_code,
+            "expires_at": expires_at
+        }
+        if user_id:
+            item["user_id"] = user_id
+        return item
+
+    async def consume_otp(self, otp_id: str, otp_code: str) -> dict:
+        """
+        Check and delete an OTP in one conditional DeleteItem, returning the
+        deleted item. Raises OtpNotFound if there is no unexpired OTP, and
+        OtpMismatch if the code is wrong (the OTP is kept). Two concurrent
+        verifications can't both succeed.
+        """
+        try:
+            response = await self.otp_table.delete_item(
+                Key={"otp_id": otp_id},
+                ConditionExpression="otp_code = :code AND expires_at > :now",
+                ExpressionAttributeValues={":code": otp_code, ":now": int(time.time())},
+                ReturnValues="ALL_OLD",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD"
+            )
+            return response["Attributes"]
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            stored = e.response.get("Item")
+
+        if not stored:
+            raise OtpNotFound(otp_id)
+        stored = deserialize_item(stored)
+        if int(stored.get("expires_at", 0)) <= time.time():
+            raise OtpNotFound(otp_id)
+        raise OtpMismatch(otp_id)
 
-    def get_otp(self, otp_id: str) -> Optional[dict]:
+    async def get_otp(self, otp_id: str) -> Optional[dict]:
         """Retrieve the OTP info."""
-        response = self.otp_table.get_item(Key={"otp_id": otp_id})
+        response = await self.otp_table.get_item(Key={"otp_id": otp_id})
         return response.get("Item")
 
-    def delete_otp(self, otp_id: str) -> None:
+    async def delete_otp(self, otp_id: str) -> None:
         """Remove the OTP entry."""
-        self.otp_table.delete_item(Key={"otp_id": otp_id}) 
\ No newline at end of file
+        await self.otp_table.delete_item(Key={"otp_id": otp_id}) 
\ No newline at end of file
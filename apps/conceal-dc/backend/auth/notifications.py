@@ -1,15 +1,131 @@
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+import json
+import queue
+import random
+import threading
+import time
+
+SENDER = "no-reply@concealdc.com"
+
+# Default account quotas: SES production sending rate and SNS SMS transactions per second.
+SES_MESSAGES_PER_SECOND = 14
+SNS_MESSAGES_PER_SECOND = 20
+SES_BULK_BATCH_SIZE = 50
+
+
+class TokenBucket:
+    """Thread-safe token bucket; `acquire` blocks until enough tokens are available."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                # Requests larger than the bucket go through once it is full and leave it in debt.
+                needed = min(tokens, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= tokens
+                    return
+                wait = (needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def format_opening_alert(slots: List[dict], limit: int = 5) -> str:
+    """Short plain-text summary of new openings, suitable for SMS or an email body."""
+    slots = sorted(slots, key=lambda slot: slot['date_time'])
+    lines = [f"{slot['date']} at {slot['time']}" for slot in slots[:limit]]
+    if len(slots) > limit:
+        lines.append(f"...and {len(slots) - limit} more")
+    return "New appointment openings:\n" + "\n".join(lines)
+
+
+class Delivery:
+    """
+    One queued message. `body` is the OTP code for "otp" deliveries and the text
+    for "alert"; an alert built from matched slots also carries them in `slots`.
+    """
+
+    __slots__ = ("channel", "recipient", "kind", "body", "slots", "attempts")
+
+    def __init__(self, channel: str, recipient: str, kind: str, body: str, slots: Optional[List[dict]] = None):
+        self.channel = channel
+        self.recipient = recipient
+        self.kind = kind
+        self.body = body
+        self.slots = slots
+        self.attempts = 0
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return self.channel, self.recipient, self.kind
+
+    def merge(self, other: "Delivery") -> None:
+        """Fold another alert for the same recipient into this one, so both sets of openings go out."""
+        if self.slots is not None and other.slots is not None:
+            slots = {slot['date_time']: slot for slot in self.slots + other.slots}
+            self.slots = list(slots.values())
+            self.body = format_opening_alert(self.slots)
+        else:
+            self.body = f"{self.body}\n\n{other.body}"
+
 
 class NotificationService:
-    def __init__(self, sns_client=None, ses_client=None):
+    """
+    Sends OTPs and alerts over SNS (SMS) and SES (email).
+
+    `send_*` methods call AWS directly. `enqueue_*` methods hand the message to a
+    per-channel delivery thread and return immediately; delivery threads are
+    rate limited by a token bucket per channel, retry failures with jittered
+    exponential backoff, and keep at most one pending message per recipient and
+    kind: a newer OTP replaces one not yet sent, while a newer alert is merged
+    into the pending one so no opening goes unreported. When `ses_otp_template` names
+    an SES template taking `{{code}}`, queued OTP emails go out through
+    SendBulkTemplatedEmail, up to 50 recipients per call.
+    """
+
+    def __init__(
+        self,
+        sns_client=None,
+        ses_client=None,
+        ses_otp_template: Optional[str] = None,
+        sns_rate: float = SNS_MESSAGES_PER_SECOND,
+        ses_rate: float = SES_MESSAGES_PER_SECOND,
+        max_attempts: int = 4,
+        retry_base_seconds: float = 1.0,
+    ):
         self.sns_client = sns_client
         self.ses_client = ses_client
+        self.ses_otp_template = ses_otp_template
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+
+        self.buckets = {"sms": TokenBucket(sns_rate), "email": TokenBucket(ses_rate)}
+        self.queues: Dict[str, queue.Queue] = {"sms": queue.Queue(), "email": queue.Queue()}
+        self.pending: Dict[Tuple[str, str, str], Delivery] = {}
+        # Newest OTP per key, including ones waiting to be retried.
+        self.latest: Dict[Tuple[str, str, str], Delivery] = {}
+        # Guards `pending`, `latest` and `stats`, which every delivery thread touches.
+        self.pending_lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+        self.stats = {"sent": 0, "failed": 0, "retried": 0, "deduplicated": 0, "merged": 0}
+
+    # -------------------------------
+    # 📤 Direct Sends
+    # -------------------------------
 
     def send_otp_via_sns(self, phone_number: str, otp_code: str) -> None:
         """Send OTP via AWS SNS."""
         if not self.sns_client:
             raise ValueError("SNS client not initialized")
-        
+
         message = f"Your verification code is: {otp_code}"
         self.sns_client.publish(PhoneNumber=phone_number, Message=message)
 
@@ -17,16 +133,223 @@ class NotificationService:
         """Send OTP via AWS SES."""
         if not self.ses_client:
             raise ValueError("SES client not initialized")
-            
+
         subject = "Your Verification Code"
         body_text = f"Your verification code is: {otp_code}"
-        
+
         self.ses_client.send_email(
-            Source="no-reply@concealdc.com",
+            Source=SENDER,
             Destination={"ToAddresses": [email]},
             Message={
                 "Subject": {"Data": subject},
                 "Body": {"Text": {"Data": body_text}}
             }
-        ) 
-    
\ No newline at end of file
+        )
+
+    def send_alert_via_sns(self, phone_number: str, message: str) -> None:
+        """Send an appointment alert via AWS SNS."""
+        if not self.sns_client:
+            raise ValueError("SNS client not initialized")
+
+        self.sns_client.publish(PhoneNumber=phone_number, Message=message)
+
+    def send_alert_via_ses(self, email: str, message: str) -> None:
+        """Send an appointment alert via AWS SES."""
+        if not self.ses_client:
+            raise ValueError("SES client not initialized")
+
+        self.ses_client.send_email(
+            Source=SENDER,
+            Destination={"ToAddresses": [email]},
+            Message={
+                "Subject": {"Data": "New Appointment Openings"},
+                "Body": {"Text": {"Data": message}}
+            }
+        )
+
+    # -------------------------------
+    # 📥 Queued Sends
+    # -------------------------------
+
+    def enqueue_otp_via_sns(self, phone_number: str, otp_code: str) -> None:
+        """Queue an OTP SMS. Raises ValueError right away if SNS isn't configured."""
+        if not self.sns_client:
+            raise ValueError("SNS client not initialized")
+        self._enqueue(Delivery("sms", phone_number, "otp", otp_code))
+
+    def enqueue_otp_via_ses(self, email: str, otp_code: str) -> None:
+        """Queue an OTP email. Raises ValueError right away if SES isn't configured."""
+        if not self.ses_client:
+            raise ValueError("SES client not initialized")
+        self._enqueue(Delivery("email", email, "otp", otp_code))
+
+    def enqueue_alert_via_sns(self, phone_number: str, message: str, slots: Optional[List[dict]] = None) -> None:
+        """Queue an alert SMS; pass the `slots` it describes so a later alert can be merged into it."""
+        if not self.sns_client:
+            raise ValueError("SNS client not initialized")
+        self._enqueue(Delivery("sms", phone_number, "alert", message, slots))
+
+    def enqueue_alert_via_ses(self, email: str, message: str, slots: Optional[List[dict]] = None) -> None:
+        """Queue an alert email; pass the `slots` it describes so a later alert can be merged into it."""
+        if not self.ses_client:
+            raise ValueError("SES client not initialized")
+        self._enqueue(Delivery("email", email, "alert", message, slots))
+
+    def _enqueue(self, delivery: Delivery) -> None:
+        with self.pending_lock:
+            queued = self.pending.get(delivery.key)
+            if queued:
+                self._coalesce(queued, delivery)
+                return
+            self.pending[delivery.key] = delivery
+            if delivery.kind == "otp":
+                self.latest[delivery.key] = delivery
+        self.queues[delivery.channel].put(delivery)
+
+    def _coalesce(self, queued: Delivery, delivery: Delivery) -> None:
+        """Fold `delivery` into the still-pending `queued` for the same key. Caller holds pending_lock."""
+        if delivery.kind == "otp":
+            # Only the newest code verifies, so it replaces the one not yet sent.
+            queued.body = delivery.body
+            self.stats["deduplicated"] += 1
+        else:
+            queued.merge(delivery)
+            self.stats["merged"] += 1
+
+    def _requeue(self, delivery: Delivery) -> None:
+        with self.pending_lock:
+            if delivery.kind == "otp" and self.latest.get(delivery.key) is not delivery:
+                return  # Superseded by a newer code for the same recipient
+            queued = self.pending.get(delivery.key)
+            if queued:
+                # A newer alert is already waiting; this one's openings ride along with it.
+                self._coalesce(queued, delivery)
+                return
+            self.pending[delivery.key] = delivery
+        self.queues[delivery.channel].put(delivery)
+
+    def _finish(self, delivery: Delivery) -> None:
+        with self.pending_lock:
+            if self.latest.get(delivery.key) is delivery:
+                del self.latest[delivery.key]
+
+    def _take(self, delivery: Delivery) -> None:
+        with self.pending_lock:
+            if self.pending.get(delivery.key) is delivery:
+                del self.pending[delivery.key]
+
+    # -------------------------------
+    # 🚚 Delivery Threads
+    # -------------------------------
+
+    def start(self) -> None:
+        """Start one delivery thread per channel."""
+        if self.threads:
+            return
+        for channel in self.queues:
+            thread = threading.Thread(target=self._run, args=(channel,), name=f"deliver-{channel}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the delivery threads to finish what is queued and exit."""
+        for channel_queue in self.queues.values():
+            channel_queue.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _run(self, channel: str) -> None:
+        channel_queue = self.queues[channel]
+        while True:
+            delivery = channel_queue.get()
+            if delivery is None:
+                return
+
+            batch = [delivery]
+            if self._is_bulk_otp(delivery):
+                batch.extend(self._drain_bulk_otps(channel_queue, SES_BULK_BATCH_SIZE - 1))
+            for queued in batch:
+                self._take(queued)
+
+            self.buckets[channel].acquire(len(batch))
+            try:
+                failed = self._deliver(batch)
+            except Exception as e:
+                print(f"⚠️ {channel} delivery failed: {e}")
+                failed = batch
+
+            with self.pending_lock:
+                self.stats["sent"] += len(batch) - len(failed)
+            for queued in batch:
+                if queued in failed:
+                    self._retry(queued)
+                else:
+                    self._finish(queued)
+
+    def _is_bulk_otp(self, delivery: Delivery) -> bool:
+        return bool(self.ses_otp_template) and delivery.channel == "email" and delivery.kind == "otp"
+
+    def _drain_bulk_otps(self, channel_queue: queue.Queue, limit: int) -> List[Delivery]:
+        drained, deferred = [], []
+        while len(drained) < limit:
+            try:
+                queued = channel_queue.get_nowait()
+            except queue.Empty:
+                break
+            if queued is not None and self._is_bulk_otp(queued):
+                drained.append(queued)
+            else:
+                deferred.append(queued)
+        for queued in deferred:
+            channel_queue.put(queued)
+        return drained
+
+    def _deliver(self, batch: List[Delivery]) -> List[Delivery]:
+        """Send a batch and return the deliveries that failed."""
+        if self._is_bulk_otp(batch[0]):
+            return self._send_bulk_otps(batch)
+
+        delivery = batch[0]
+        if delivery.channel == "sms":
+            if delivery.kind == "otp":
+                self.send_otp_via_sns(delivery.recipient, delivery.body)
+            else:
+                self.send_alert_via_sns(delivery.recipient, delivery.body)
+        elif delivery.kind == "otp":
+            self.send_otp_via_ses(delivery.recipient, delivery.body)
+        else:
+            self.send_alert_via_ses(delivery.recipient, delivery.body)
+        return []
+
+    def _send_bulk_otps(self, batch: List[Delivery]) -> List[Delivery]:
+        response = self.ses_client.send_bulk_templated_email(
+            Source=SENDER,
+            Template=self.ses_otp_template,
+            DefaultTemplateData=json.dumps({"code": ""}),
+            Destinations=[
+                {
+                    "Destination": {"ToAddresses": [delivery.recipient]},
+                    "ReplacementTemplateData": json.dumps({"code": delivery.body})
+                }
+                for delivery in batch
+            ]
+        )
+        statuses = [status.get("Status") for status in response.get("Status", [])]
+        return [delivery for i, delivery in enumerate(batch) if i >= len(statuses) or statuses[i] != "Success"]
+
+    def _retry(self, delivery: Delivery) -> None:
+        delivery.attempts += 1
+        if delivery.attempts >= self.max_attempts:
+            with self.pending_lock:
+                self.stats["failed"] += 1
+            print(f"❌ Giving up on {delivery.kind} to {delivery.recipient} after {delivery.attempts} attempts.")
+            self._finish(delivery)
+            return
+
+        with self.pending_lock:
+            self.stats["retried"] += 1
+        delay = self.retry_base_seconds * 2 ** (delivery.attempts - 1) * random.uniform(0.5, 1.5)
+        timer = threading.Timer(delay, self._requeue, args=(delivery,))
+        timer.daemon = True
+        timer.start()
@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from .schemas import OtpRequest, OtpVerifyRequest, RefreshTokenRequest
 from .token_utils import generate_otp_code, generate_tokens, verify_token
 from .notifications import NotificationService
-from .database import DatabaseService
+from .database import DatabaseService, OtpMismatch, OtpNotFound
 from .dependencies import get_current_user
 
 router = APIRouter()
@@ -26,29 +26,17 @@ async def request_otp(payload: OtpRequest):
     if not payload.email and not payload.phone_number:
         raise HTTPException(status_code=400, detail="Must provide an email or phone number.")
     
-    # Get or create user
-    user = None
-    if payload.email:
-        user = db_service.get_user_by_email(payload.email)
-    elif payload.phone_number:
-        user = db_service.get_user_by_phone_number(payload.phone_number)
-    
-    if not user:
-        user_id = db_service.create_user(payload.email, payload.phone_number)
-    else:
-        user_id = user["user_id"]
-
-    # Generate and store OTP
+    # Get or create the user and store the OTP together
     otp_code = generate_otp_code()
     otp_id = payload.phone_number if payload.phone_number else payload.email
-    db_service.store_otp(otp_id, otp_code)
+    await db_service.start_login(payload.email, payload.phone_number, otp_id, otp_code)
 
-    # Send OTP
+    # Queue OTP; delivery happens on the notification service's delivery threads
     try:
         if payload.phone_number:
-            notification_service.send_otp_via_sns(payload.phone_number, otp_code)
+            notification_service.enqueue_otp_via_sns(payload.phone_number, otp_code)
         else:
-            notification_service.send_otp_via_ses(payload.email, otp_code)
+            notification_service.enqueue_otp_via_ses(payload.email, otp_code)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send OTP: {str(e)}")
 
@@ -60,27 +48,27 @@ async def request_otp(payload: OtpRequest):
 @router.post("/verify-otp")
 async def verify_otp(payload: OtpVerifyRequest):
     """Verify OTP and return authentication tokens."""
-    otp_item = db_service.get_otp(payload.otp_id)
-    
-    if not otp_item:
+    try:
+        otp_item = await db_service.consume_otp(payload.otp_id, payload.otp_code)
+    except OtpNotFound:
         raise HTTPException(status_code=404, detail="OTP not found or expired")
-
-    if otp_item["otp_code"] != payload.otp_code:
+    except OtpMismatch:
         raise HTTPException(status_code=400, detail="Invalid OTP code")
 
-    db_service.delete_otp(payload.otp_id)
-
-    # Get user
-    user = None
-    if "@" in payload.otp_id:
-        user = db_service.get_user_by_email(payload.otp_id)
-    else:
-        user = db_service.get_user_by_phone_number(payload.otp_id)
+    # OTPs stored by start_login carry the user; older ones are resolved by identity
+    user_id = otp_item.get("user_id")
+    if not user_id:
+        user = None
+        if "@" in payload.otp_id:
+            user = await db_service.get_user_by_email(payload.otp_id)
+        else:
+            user = await db_service.get_user_by_phone_number(payload.otp_id)
+        user_id = user["user_id"] if user else None
 
-    if not user:
+    if not user_id:
         raise HTTPException(status_code=404, detail="User not found")
 
-    access_token, refresh_token = generate_tokens(user["user_id"], payload.otp_id)
+    access_token, refresh_token = generate_tokens(user_id, payload.otp_id)
 
     return {
         "access_token": access_token,
@@ -1,6 +1,10 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from hashlib import blake2b
 import random
 import string
+import threading
+import time
 import jwt
 from fastapi import HTTPException
 from .config import (
@@ -8,6 +12,7 @@ from .config import (
     ALGORITHM,
     ACCESS_TOKEN_EXPIRE_MINUTES,
     REFRESH_TOKEN_EXPIRE_DAYS,
+    CLAIMS_CACHE_SIZE,
     OTP_LENGTH
 )
 
@@ -56,4 +61,65 @@ def verify_token(token: str, token_type: str = "access"):
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid token") 
\ No newline at end of file
+        raise HTTPException(status_code=401, detail="Invalid token") 
+
+
+class ClaimsCache:
+    """
+    Bounded LRU of verified token claims, keyed by a digest of the token and
+    its expected type. An entry is served only while the token's `exp` is in the
+    future, the same bound `jwt.decode` checks, so an expired token always
+    falls through to `verify_token` and gets the same error.
+    """
+
+    def __init__(self, max_entries: int = CLAIMS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    @staticmethod
+    def key(token: str, token_type: str) -> bytes:
+        return blake2b(f"{token_type}:{token}".encode(), digest_size=16).digest()
+
+    def get(self, token: str, token_type: str):
+        key = self.key(token, token_type)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            payload, expires_at = entry
+            if time.time() >= expires_at:
+                del self.entries[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(payload)
+
+    def put(self, token: str, token_type: str, payload: dict) -> None:
+        expires_at = payload.get("exp")
+        if not isinstance(expires_at, (int, float)):
+            return  # Without an exp there is nothing to bound the entry by
+        with self.lock:
+            self.entries[self.key(token, token_type)] = (dict(payload), expires_at)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+
+claims_cache = ClaimsCache()
+
+
+def verify_token_cached(token: str, token_type: str = "access"):
+    """Like `verify_token`, but repeat requests with the same valid token skip decoding and the HMAC check."""
+    if token:
+        payload = claims_cache.get(token, token_type)
+        if payload is not None:
+            return payload
+
+    payload = verify_token(token, token_type)
+    claims_cache.put(token, token_type, payload)
+    return payload
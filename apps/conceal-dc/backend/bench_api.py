@@ -0,0 +1,274 @@
+"""
+Load benchmark for the API read paths against DynamoDB Local (or moto_server).
+
+    python bench_api.py --seed                       # create tables, seed, run every scenario
+    python bench_api.py --output bench_results/$(git rev-parse --short HEAD).json
+    python bench_api.py --compare bench_results/abc1234.json
+
+The API runs as a `uvicorn api:app` subprocess, as in the Docker image; to get
+closer to the 256-CPU/512-MB Fargate task, wrap it, e.g.
+`--wrap "taskset -c 0"` or `--wrap "systemd-run --user --scope -p MemoryMax=512M -p CPUQuota=25%"`.
+Requests use a fixed random seed, so runs against the same seed data are
+comparable across commits.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from auth.token_utils import generate_tokens
+from bench_seed import create_tables, local_resource, seed
+from cycle_report import percentile
+
+# -------------------------------
+# 🧪 Scenarios
+# -------------------------------
+
+SEED_DAYS = 366
+CACHE_READY_TIMEOUT_SECONDS = 300
+
+
+def appointments_request(rnd: random.Random, context: dict):
+    """A week-long window somewhere in the seeded year; half the clients revalidate with their last ETag."""
+    first = context['start'] + datetime.timedelta(days=rnd.randrange(SEED_DAYS - 7))
+    params = {'start_date': first.isoformat(), 'end_date': (first + datetime.timedelta(days=6)).isoformat()}
+    headers = {}
+    etag = context['etags'].get(params['start_date'])
+    if etag and rnd.random() < 0.5:
+        headers['If-None-Match'] = etag
+    return '/appointments', params, headers
+
+
+def daily_request(rnd: random.Random, context: dict):
+    return '/appointments/daily', {}, {}
+
+
+def recent_request(rnd: random.Random, context: dict):
+    return '/appointments/recent', {'limit': rnd.choice((10, 25, 50))}, {}
+
+
+def notifications_request(rnd: random.Random, context: dict):
+    token = context['tokens'][rnd.randrange(len(context['tokens']))]
+    return '/notifications', {'limit': 10}, {'Authorization': f"Bearer {token}"}
+
+
+SCENARIOS: Dict[str, Callable] = {
+    'appointments': appointments_request,
+    'daily': daily_request,
+    'recent': recent_request,
+    'notifications': notifications_request,
+}
+
+# -------------------------------
+# 🖥️ API Server
+# -------------------------------
+
+
+def start_server(port: int, endpoint: str, wrap: str) -> subprocess.Popen:
+    env = dict(os.environ, DYNAMODB_ENDPOINT=endpoint, LOG_LEVEL='WARNING')
+    env.setdefault('AWS_ACCESS_KEY_ID', 'dummy-access-key')
+    env.setdefault('AWS_SECRET_ACCESS_KEY', 'dummy-secret-key')
+    command = shlex.split(wrap) + [
+        sys.executable, '-m', 'uvicorn', 'api:app', '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning'
+    ]
+    return subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL)
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen) -> float:
+    """Wait for /ready to report the cache loaded; returns how long that took."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < CACHE_READY_TIMEOUT_SECONDS:
+        if server.poll() is not None:
+            raise RuntimeError(f"API server exited with code {server.returncode}")
+        try:
+            if requests.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return time.perf_counter() - started
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API cache did not become ready in time")
+
+
+def server_memory(pid: int) -> Dict[str, Optional[float]]:
+    """Resident and peak resident memory of the server in MB (Linux only)."""
+    memory = {'rss_mb': None, 'peak_rss_mb': None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    memory['rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith('VmHWM:'):
+                    memory['peak_rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+# -------------------------------
+# 🚦 Load Generator
+# -------------------------------
+
+
+def run_scenario(base_url: str, name: str, context: dict, concurrency: int, seconds: float, warmup: float) -> dict:
+    """
+    `concurrency` closed-loop clients, each sending its next request as soon
+    as the last one returns, for `warmup` + `seconds`. Only requests started
+    after the warmup are counted.
+    """
+    build = SCENARIOS[name]
+    lock = threading.Lock()
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = [0]
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + seconds
+
+    def client(index: int) -> None:
+        rnd = random.Random(f"{name}-{index}")
+        session = requests.Session()
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            path, params, headers = build(rnd, context)
+            try:
+                response = session.get(base_url + path, params=params, headers=headers, timeout=30)
+                status = str(response.status_code)
+                if name == 'appointments' and 'ETag' in response.headers:
+                    context['etags'][params['start_date']] = response.headers['ETag']
+            except requests.RequestException:
+                status = None
+            elapsed = time.perf_counter() - sent
+            if sent < measure_from:
+                continue
+            with lock:
+                if status is None:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'errors': errors[0],
+        'statuses': statuses,
+        'rps': round(len(ordered) / seconds, 1),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2) if ordered else 0
+    }
+
+# -------------------------------
+# 📋 Report
+# -------------------------------
+
+
+def git_revision() -> Dict[str, object]:
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+        dirty = bool(subprocess.check_output(['git', 'status', '--porcelain', '--', '.'], text=True).strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    print(f"\n📊 vs {baseline.get('commit')}:")
+    for name, result in report['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before:
+            continue
+        deltas = []
+        for metric in ('rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(metric):
+                deltas.append(f"{metric} {before[metric]} -> {result[metric]} ({(result[metric] / before[metric] - 1) * 100:+.1f}%)")
+        print(f"  {name}: " + ", ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', default=os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000'))
+    parser.add_argument('--seed', action='store_true', help='recreate the tables and seed them first')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--max-history', type=int, default=60)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--port', type=int, default=8091)
+    parser.add_argument('--wrap', default='', help='command prefix for the API server, e.g. "taskset -c 0"')
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='a previous JSON report to compare against')
+    args = parser.parse_args()
+
+    # Slots start on the first of the current month, the first month the API caches
+    start = datetime.date.today().replace(day=1)
+    seeded = None
+    if args.seed:
+        resource = local_resource(args.endpoint)
+        create_tables(resource, reset=True)
+        seeded = seed(resource, start, days=SEED_DAYS, users=args.users, max_history=args.max_history)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args.port, args.endpoint, args.wrap)
+    try:
+        ready_seconds = wait_until_ready(base_url, server)
+        print(f"🚀 API ready in {ready_seconds:.1f}s, {server_memory(server.pid)['rss_mb']} MB resident.")
+        context = {
+            'start': start,
+            'etags': {},
+            'tokens': [generate_tokens(f"bench-user-{index:06d}", f"bench{index}@example.com")[0]
+                       for index in range(min(args.users, 500))]
+        }
+
+        report = {
+            **git_revision(),
+            'recorded_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'seeded': seeded,
+            'ready_seconds': round(ready_seconds, 2),
+            'memory_ready': server_memory(server.pid),
+            'scenarios': {}
+        }
+        for name in args.scenarios.split(','):
+            result = run_scenario(base_url, name, context, args.concurrency, args.seconds, args.warmup)
+            result.update(server_memory(server.pid))
+            report['scenarios'][name] = result
+            print(f"⏱️ {name}: {result['rps']} req/s, p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                  f"p99 {result['p99_ms']} ms, {result['errors']} errors, {result['rss_mb']} MB resident")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
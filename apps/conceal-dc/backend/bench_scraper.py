@@ -0,0 +1,192 @@
+"""
+Offline worker benchmark: full `monitor_appointments` cycles against
+fake_booking_site.py and DynamoDB Local (or moto_server).
+
+    python bench_scraper.py --cycles 5 --latency-ms 150 --mutation-rate 0.02
+    python bench_scraper.py --every-week --output bench_results/scraper-$(git rev-parse --short HEAD).json
+    python bench_scraper.py --compare bench_results/scraper-abc1234.json
+
+The fake site runs in its own process, so the CPU time reported is the
+worker's alone. The Appointments table is recreated first, so the first
+cycle writes every slot and later cycles write only what the site mutated.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict
+
+import requests
+
+from bench_api import git_revision
+from bench_seed import create_tables, local_resource
+from cycle_report import percentile
+
+# -------------------------------
+# 🎭 Fake Site Process
+# -------------------------------
+
+
+def start_site(args) -> subprocess.Popen:
+    command = [
+        sys.executable, 'fake_booking_site.py', 'serve', '--port', str(args.port), '--fixtures', args.fixtures,
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--mutation-rate', str(args.mutation_rate), '--session-ttl', str(args.session_ttl)
+    ]
+    site = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+    print(site.stdout.readline().strip())
+    return site
+
+
+def site_stats(port: int) -> Dict[str, int]:
+    return requests.get(f"http://127.0.0.1:{port}/_stats", timeout=5).json()
+
+# -------------------------------
+# 🔁 Cycles
+# -------------------------------
+
+
+def dynamodb_calls(metrics) -> Dict[str, float]:
+    """Worker DynamoDB calls so far, by operation, from the telemetry hooks."""
+    with metrics.lock:
+        series = dict(metrics.values['dynamodb_calls_total'])
+    return {dict(labels)['operation']: count for labels, count in series.items()}
+
+
+def consumed_capacity(metrics) -> float:
+    with metrics.lock:
+        return sum(metrics.values['dynamodb_consumed_capacity_units_total'].values())
+
+
+def run_cycle(worker, sessions, metrics, port: int, every_week: bool, quiet: bool) -> dict:
+    if every_week:
+        worker.scrape_scheduler.weeks.clear()
+    calls_before, capacity_before, site_before = dynamodb_calls(metrics), consumed_capacity(metrics), site_stats(port)
+
+    output = io.StringIO() if quiet else sys.stdout
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(output):
+        results = worker.monitor_appointments(sessions)
+        worker.slot_changes.drain()
+    seconds, cpu = time.perf_counter() - wall_started, time.process_time() - cpu_started
+
+    site = site_stats(port)
+    calls = {operation: count - calls_before.get(operation, 0) for operation, count in dynamodb_calls(metrics).items()}
+    fetched = site['timetables'] - site_before['timetables']
+    parsed = sum(1 for result in results if result['ok'] and not result['skipped'])
+    return {
+        'seconds': round(seconds, 3),
+        'cpu_seconds': round(cpu, 3),
+        'weeks_due': len(results),
+        'weeks_parsed': parsed,
+        'weeks_failed': sum(1 for result in results if not result['ok']),
+        'changes': sum(result['changes'] for result in results),
+        'requests': fetched,
+        'requests_per_second': round(fetched / seconds, 1) if seconds else 0,
+        'cpu_ms_per_week': round(cpu * 1000 / len(results), 2) if results else 0,
+        'handshakes': site['handshakes'] - site_before['handshakes'],
+        'dynamodb_calls': {operation: int(count) for operation, count in sorted(calls.items()) if count},
+        'dynamodb_calls_total': int(sum(calls.values())),
+        'consumed_capacity': round(consumed_capacity(metrics) - capacity_before, 1)
+    }
+
+
+def summarize(cycles: list) -> dict:
+    """Medians (and p95 of cycle time) over the cycles after the first, which loads everything."""
+    steady = cycles[1:] or cycles
+    summary = {}
+    for metric in ('seconds', 'cpu_seconds', 'requests_per_second', 'cpu_ms_per_week', 'dynamodb_calls_total', 'changes'):
+        ordered = sorted(cycle[metric] for cycle in steady)
+        summary[f"{metric}_median"] = percentile(ordered, 0.5)
+    summary['seconds_p95'] = percentile(sorted(cycle['seconds'] for cycle in steady), 0.95)
+    return summary
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    print(f"\n📊 vs {baseline.get('commit')}:")
+    for metric, value in report['summary'].items():
+        before = baseline.get('summary', {}).get(metric)
+        if before:
+            print(f"  {metric}: {before} -> {value} ({(value / before - 1) * 100:+.1f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', default=os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000'))
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--every-week', action='store_true', help="scrape every week each cycle, ignoring the schedule")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--fixtures', default='booking_fixtures')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=30)
+    parser.add_argument('--mutation-rate', type=float, default=0.01)
+    parser.add_argument('--session-ttl', type=float, default=0)
+    parser.add_argument('--pace-seconds', type=float, default=0, help='MIN_REQUEST_INTERVAL_SECONDS for the worker')
+    parser.add_argument('--verbose', action='store_true', help="show the worker's own output")
+    parser.add_argument('--output', help='write the JSON report here')
+    parser.add_argument('--compare', help='a previous JSON report to compare against')
+    args = parser.parse_args()
+
+    create_tables(local_resource(args.endpoint), reset=True)
+    site = start_site(args)
+    state = f"bench_scraper_{os.getpid()}"
+    # The worker reads its configuration at import time
+    os.environ.update(
+        BOOKING_SITE=f"http://127.0.0.1:{args.port}",
+        DYNAMODB_ENDPOINT=args.endpoint,
+        MIN_REQUEST_INTERVAL_SECONDS=str(args.pace_seconds),
+        WEEK_DIGESTS_FILE=f"{state}_digests.json",
+        CYCLE_REPORT_FILE=os.devnull
+    )
+    try:
+        import worker
+        from scraper_session import SessionManager
+        from telemetry import instrument_dynamodb, metrics
+
+        instrument_dynamodb(worker.dynamodb.meta.client)
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            sessions = SessionManager(worker.fetch_new_tokens, worker.SESSION_POOL_SIZE)
+            sessions.start()
+
+        cycles = []
+        for index in range(args.cycles):
+            cycle = run_cycle(worker, sessions, metrics, args.port, args.every_week, not args.verbose)
+            cycles.append(cycle)
+            print(f"⏱️ Cycle {index + 1}: {cycle['seconds']}s, {cycle['cpu_seconds']}s CPU, "
+                  f"{cycle['weeks_parsed']}/{cycle['weeks_due']} weeks parsed, {cycle['requests_per_second']} req/s, "
+                  f"{cycle['cpu_ms_per_week']} ms CPU/week, {cycle['dynamodb_calls_total']} DynamoDB calls, "
+                  f"{cycle['changes']} changes")
+    finally:
+        site.terminate()
+        site.wait(timeout=10)
+        with contextlib.suppress(OSError):
+            os.remove(f"{state}_digests.json")
+
+    report = {
+        **git_revision(),
+        'recorded_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'verbose')},
+        'summary': summarize(cycles),
+        'cycles': cycles
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.output}")
+    else:
+        print(json.dumps(report['summary'], indent=2))
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import datetime
+import os
+import random
+import time
+from typing import Dict, Optional
+
+import boto3
+
+# -------------------------------
+# 🌱 Benchmark Tables and Seed Data
+# -------------------------------
+
+# Same schema as create-table.md, plus the auth and notification tables, on demand.
+TABLES = {
+    'Appointments': {
+        'KeySchema': [
+            {'AttributeName': 'year_month', 'KeyType': 'HASH'},
+            {'AttributeName': 'date_time', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': name, 'AttributeType': 'S'}
+            for name in ('year_month', 'date_time', 'status', 'global_pk', 'last_changed')
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'StatusIndex',
+                'KeySchema': [
+                    {'AttributeName': 'status', 'KeyType': 'HASH'},
+                    {'AttributeName': 'date_time', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'RecentUpdatesIndex',
+                'KeySchema': [
+                    {'AttributeName': 'global_pk', 'KeyType': 'HASH'},
+                    {'AttributeName': 'last_changed', 'KeyType': 'RANGE'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ]
+    },
+    'Notifications': {
+        'KeySchema': [
+            {'AttributeName': 'user_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'notification_id', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'user_id', 'AttributeType': 'S'},
+            {'AttributeName': 'notification_id', 'AttributeType': 'S'}
+        ]
+    },
+    'Users': {
+        'KeySchema': [{'AttributeName': 'user_id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [
+            {'AttributeName': name, 'AttributeType': 'S'} for name in ('user_id', 'email', 'phone_number')
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'EmailIndex',
+                'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            },
+            {
+                'IndexName': 'PhoneNumberIndex',
+                'KeySchema': [{'AttributeName': 'phone_number', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ]
+    },
+    'OtpTable': {
+        'KeySchema': [{'AttributeName': 'otp_id', 'KeyType': 'HASH'}],
+        'AttributeDefinitions': [{'AttributeName': 'otp_id', 'AttributeType': 'S'}]
+    }
+}
+
+SLOT_MINUTES = 15
+DAY_START_HOUR = 7
+DAY_END_HOUR = 17
+STATUSES = ('Booked', 'Open', 'Unknown')
+WEEKDAY_NAMES = ('MON', 'TUE', 'WED', 'THU', 'FRI')
+
+
+def local_resource(endpoint_url: Optional[str] = None):
+    """DynamoDB resource for DynamoDB Local (or moto_server); dummy credentials unless some are set."""
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'dummy-access-key')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'dummy-secret-key')
+    endpoint_url = endpoint_url or os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000')
+    return boto3.resource('dynamodb', endpoint_url=endpoint_url, region_name='us-east-1')
+
+
+def create_tables(resource, reset: bool = False) -> None:
+    """Create every table the API and worker use; with `reset`, drop existing ones first."""
+    existing = set(resource.meta.client.list_tables()['TableNames'])
+    for name, definition in TABLES.items():
+        if name in existing:
+            if not reset:
+                continue
+            resource.Table(name).delete()
+            resource.meta.client.get_waiter('table_not_exists').wait(TableName=name)
+        resource.create_table(TableName=name, BillingMode='PAY_PER_REQUEST', **definition)
+        resource.meta.client.get_waiter('table_exists').wait(TableName=name)
+    print(f"🌱 Tables ready: {', '.join(TABLES)}")
+
+
+def slot_history(rnd: random.Random, depth: int, now: int) -> list:
+    """`depth` status changes spread over the last 90 days, oldest first."""
+    times = sorted(now - rnd.randrange(90 * 86400) for _ in range(depth))
+    return [{'status': rnd.choice(STATUSES), 'timestamp': timestamp} for timestamp in times]
+
+
+def seed(
+    resource,
+    start: datetime.date,
+    days: int = 366,
+    users: int = 2000,
+    max_history: int = 60,
+    random_seed: int = 7,
+) -> Dict[str, int]:
+    """
+    Write a year of weekday 15-minute slots with histories of up to
+    `max_history` entries, their daily availability, and `users` users with
+    one to three notification rules each. The same arguments always produce
+    the same data, so runs against different commits see identical tables.
+    Returns the item counts.
+    """
+    rnd = random.Random(random_seed)
+    now = int(time.time())
+    counts = {'slots': 0, 'history_entries': 0, 'days': 0, 'users': 0, 'notifications': 0}
+
+    appointments = resource.Table('Appointments')
+    with appointments.batch_writer() as batch:
+        for offset in range(days):
+            day = start + datetime.timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            date = day.isoformat()
+            day_open = False
+            minutes = DAY_START_HOUR * 60
+            while minutes < DAY_END_HOUR * 60:
+                slot_time = f"{minutes // 60:02d}:{minutes % 60:02d}"
+                history = slot_history(rnd, rnd.randint(1, max_history), now)
+                status = history[-1]['status']
+                day_open |= status == 'Open'
+                batch.put_item(Item={
+                    'year_month': date[:7],
+                    'date_time': f"{date}_{slot_time}",
+                    'global_pk': 'updates',
+                    'date': date,
+                    'time': slot_time,
+                    'status': status,
+                    'last_changed': str(history[-1]['timestamp']),
+                    'history': history
+                })
+                counts['slots'] += 1
+                counts['history_entries'] += len(history)
+                minutes += SLOT_MINUTES
+            batch.put_item(Item={'year_month': 'A', 'date_time': date, 'status': str(int(day_open))})
+            counts['days'] += 1
+    print(f"🌱 Seeded {counts['slots']} slots ({counts['history_entries']} history entries) over {counts['days']} days.")
+
+    end = start + datetime.timedelta(days=days - 1)
+    with resource.Table('Users').batch_writer() as user_batch, resource.Table('Notifications').batch_writer() as rule_batch:
+        for index in range(users):
+            user_id = f"bench-user-{index:06d}"
+            email = f"bench{index}@example.com"
+            user_batch.put_item(Item={'user_id': user_id, 'email': email, 'created_at': '2025-01-01T00:00:00'})
+            user_batch.put_item(Item={'user_id': f"EMAIL#{email}", 'owner_id': user_id})
+            counts['users'] += 1
+            for rule in range(rnd.randint(1, 3)):
+                first = start + datetime.timedelta(days=rnd.randrange(days))
+                last = min(end, first + datetime.timedelta(days=rnd.randint(7, 120)))
+                rule_batch.put_item(Item={
+                    'user_id': user_id,
+                    'notification_id': f"{user_id}-{rule}",
+                    'days': sorted(rnd.sample(WEEKDAY_NAMES, rnd.randint(1, 5))),
+                    'start_date': first.isoformat(),
+                    'end_date': last.isoformat(),
+                    'start_time': f"{rnd.randint(DAY_START_HOUR, 11):02d}:00",
+                    'end_time': f"{rnd.randint(12, DAY_END_HOUR):02d}:00",
+                    'created_at': now - rnd.randrange(30 * 86400)
+                })
+                counts['notifications'] += 1
+    print(f"🌱 Seeded {counts['users']} users with {counts['notifications']} notification rules.")
+    return counts
@@ -0,0 +1,81 @@
+import asyncio
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Set
+
+from slot_store import encode_json
+
+# -------------------------------
+# 📡 Slot Change Broadcast Hub
+# -------------------------------
+
+# Fields pushed to subscribers; history is left out to keep deltas small.
+DELTA_FIELDS = ('date_time', 'date', 'time', 'status', 'last_changed')
+
+
+class Subscription:
+    """One streaming client: its date filter and a bounded queue of SSE frames."""
+
+    __slots__ = ("start_date", "end_date", "queue")
+
+    def __init__(self, start_date: str, end_date: str, queue_size: int):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class BroadcastHub:
+    """
+    Fans slot status deltas out to streaming subscribers.
+
+    The cache refresh thread calls `publish_threadsafe`; everything else runs on
+    the event loop. Each batch is encoded once, sorted by date, and every
+    subscriber receives its date-range slice of it as a single SSE frame, so an
+    idle subscriber costs one queue and a bisect per batch.
+    """
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def subscribe(self, start_date: str = "", end_date: str = "9999-12-31") -> Subscription:
+        subscription = Subscription(start_date, end_date, self.queue_size)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def publish_threadsafe(self, changes: List[dict], version: int) -> None:
+        """Hand a batch of changed slots to the event loop. Safe to call from any thread."""
+        if self.loop is None or not changes:
+            return
+        self.loop.call_soon_threadsafe(self.publish, changes, version)
+
+    def publish(self, changes: List[dict], version: int) -> None:
+        changes = sorted(changes, key=lambda change: change['date_time'])
+        dates = [change['date_time'][:10] for change in changes]
+        encoded = [encode_json({field: change.get(field) for field in DELTA_FIELDS}) for change in changes]
+        header = f"id: {version}\nevent: slots\ndata: [".encode("utf-8")
+
+        for subscription in list(self.subscribers):
+            lo = bisect_left(dates, subscription.start_date)
+            hi = bisect_right(dates, subscription.end_date)
+            if lo == hi:
+                continue
+            self._offer(subscription, header + b",".join(encoded[lo:hi]) + b"]\n\n")
+
+    def _offer(self, subscription: Subscription, frame: bytes) -> None:
+        try:
+            subscription.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop it and let the client reconnect and resync.
+            self.unsubscribe(subscription)
+            subscription.queue.get_nowait()
+            subscription.queue.put_nowait(None)
+
+    def __len__(self) -> int:
+        return len(self.subscribers)
@@ -0,0 +1,171 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# -------------------------------
+# ⏱️ Per-Stage Cycle Timings
+# -------------------------------
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class CycleTimings:
+    """
+    Seconds spent in each stage during one cycle. Timings recorded with a job
+    are also added to that job's own `timings`, for the per-week breakdown;
+    stages that work on several weeks at once (batch writes) are recorded
+    without one.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def measure(self, stage: str, job: Optional[dict] = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, job)
+
+    def record(self, stage: str, seconds: float, job: Optional[dict] = None) -> None:
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+            if job is not None:
+                timings = job.setdefault('timings', {})
+                timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def snapshot(self, reset: bool = True) -> Dict[str, dict]:
+        """Count, total and p50/p95/p99/max per stage, in milliseconds except the total."""
+        with self.lock:
+            stages = self.stages
+            if reset:
+                self.stages = {}
+
+        summary = {}
+        for stage, samples in stages.items():
+            ordered = sorted(samples)
+            summary[stage] = {
+                'count': len(ordered),
+                'total_s': round(sum(ordered), 3),
+                'p50_ms': round(percentile(ordered, 0.50) * 1000, 1),
+                'p95_ms': round(percentile(ordered, 0.95) * 1000, 1),
+                'p99_ms': round(percentile(ordered, 0.99) * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1)
+            }
+        return summary
+
+
+def week_breakdown(job: dict) -> Dict[str, float]:
+    """A job's stage timings in milliseconds."""
+    return {stage: round(seconds * 1000, 1) for stage, seconds in job.get('timings', {}).items()}
+
+
+def write_cycle_report(report: dict, path: str) -> None:
+    """Append the report to a JSON-lines file, one cycle per line."""
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, separators=(',', ':'), default=str) + '\n')
+    except OSError as e:
+        print(f"⚠️ Failed to write cycle report to {path}: {e}")
+
+# -------------------------------
+# 🔬 On-Demand Cycle Profiling
+# -------------------------------
+
+
+class CycleProfiler:
+    """
+    cProfile capture of a single cycle, requested at any time (e.g. from a
+    signal handler) and taken on the next cycle.
+
+    cProfile only sees the thread that enabled it, so besides the main thread,
+    functions that run on worker threads are wrapped with `profiled`; each
+    thread gets its own profile while a capture is active, and the profiles
+    are merged when it stops. Outside a capture the wrapper costs one check.
+    """
+
+    def __init__(self, directory: str = 'profiles', top: int = 40):
+        self.directory = directory
+        self.top = top
+        self.requested = False
+        self.active = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.profiles: List[cProfile.Profile] = []
+
+    def request(self, *_) -> None:
+        """Capture the next cycle. Accepts (and ignores) signal handler arguments."""
+        self.requested = True
+        print("🔬 Profiling requested for the next cycle.")
+
+    def start(self) -> bool:
+        """Begin a capture if one was requested; returns whether one started."""
+        if not self.requested:
+            return False
+        self.requested = False
+        self.local = threading.local()
+        self.profiles = []
+        self.active = True
+        self.local.enabled = True
+        self._thread_profile().enable()
+        return True
+
+    def stop(self) -> Optional[str]:
+        """End the capture and write it out. Returns the .prof path, or None if writing failed."""
+        self.active = False
+        main = self.local.profile
+        main.disable()
+
+        stats = pstats.Stats(main)
+        for profile in self.profiles:
+            if profile is not main:
+                stats.add(profile)
+
+        path = os.path.join(self.directory, time.strftime('cycle-%Y%m%d-%H%M%S.prof'))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stats.dump_stats(path)
+            with open(path[:-len('.prof')] + '.txt', 'w', encoding='utf-8') as f:
+                pstats.Stats(path, stream=f).sort_stats('cumulative').print_stats(self.top)
+        except OSError as e:
+            print(f"⚠️ Failed to write profile to {self.directory}: {e}")
+            return None
+        print(f"🔬 Cycle profile written to {path} ({len(self.profiles)} threads).")
+        return path
+
+    def profiled(self, function):
+        """Wrap a function that runs on a worker thread so captures include it."""
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not self.active or getattr(self.local, 'enabled', False):
+                return function(*args, **kwargs)
+            profile = self._thread_profile()
+            self.local.enabled = True
+            profile.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+                self.local.enabled = False
+        return wrapper
+
+    def _thread_profile(self) -> cProfile.Profile:
+        profile = getattr(self.local, 'profile', None)
+        if profile is None:
+            profile = self.local.profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+        return profile
@@ -0,0 +1,72 @@
+from datetime import date as date_cls, timedelta
+from hashlib import blake2b
+from typing import Iterable
+
+from slot_store import encode_json, make_etag
+
+# -------------------------------
+# 📅 Daily Availability Calendar
+# -------------------------------
+
+BOOKED = 0
+OPEN = 1
+UNAVAILABLE = 2
+SKIPPED = 3  # Weekends, and today when the worker hasn't reported it
+
+STATUS_CODES = {'0': BOOKED, '1': OPEN}
+
+
+class DailyCalendar:
+    """
+    One status byte per day from `first_day`, built from the worker's `'A'` partition.
+
+    Weekdays the worker never reported count as unavailable; weekends are skipped.
+    The /appointments/daily payload is encoded once at build time along with its
+    ETag. The span starts today and runs `horizon_days` ahead, or further if the
+    worker has reported later dates, so it crosses year boundaries.
+    """
+
+    __slots__ = ("version", "first_day", "statuses", "body", "etag")
+
+    def __init__(self, version: int, first_day: date_cls, statuses: bytearray):
+        self.version = version
+        self.first_day = first_day
+        self.statuses = statuses
+
+        payload = {'open': [], 'booked': [], 'unavailable': []}
+        buckets = {OPEN: payload['open'], BOOKED: payload['booked'], UNAVAILABLE: payload['unavailable']}
+        for offset, status in enumerate(statuses):
+            if status != SKIPPED:
+                buckets[status].append((first_day + timedelta(days=offset)).isoformat())
+
+        self.body = encode_json(payload)
+        self.etag = make_etag(blake2b(self.body, digest_size=16).digest())
+
+    @classmethod
+    def build(cls, items: Iterable[dict], today: date_cls, horizon_days: int, version: int = 0) -> "DailyCalendar":
+        """Build from `'A'` partition items (`date_time` is YYYY-MM-DD, `status` is '1'/'0')."""
+        first = today.toordinal()
+        reported = {}
+        for item in items:
+            day = item.get('date_time')
+            if not day:
+                continue
+            offset = date_cls.fromisoformat(day).toordinal() - first
+            if offset >= 0:
+                reported[offset] = STATUS_CODES.get(str(item.get('status', '0')), UNAVAILABLE)
+
+        span = max(horizon_days, max(reported, default=-1) + 1)
+        statuses = bytearray(span)
+        for offset in range(span):
+            # Ordinal % 7 is 6 on Saturdays and 0 on Sundays
+            weekend = (first + offset) % 7 in (6, 0)
+            if weekend or offset == 0 and offset not in reported:
+                statuses[offset] = SKIPPED
+            else:
+                statuses[offset] = reported.get(offset, UNAVAILABLE)
+
+        return cls(version, today, statuses)
+
+    @classmethod
+    def empty(cls) -> "DailyCalendar":
+        return cls(0, date_cls.today(), bytearray())
@@ -0,0 +1,324 @@
+"""
+Local stand-in for the nemoq booking site, for benchmarking the worker offline.
+
+    python fake_booking_site.py record --weeks 8          # save live timetable pages to booking_fixtures/
+    python fake_booking_site.py serve --port 8090 --latency-ms 150 --mutation-rate 0.02
+
+It serves the three-step token handshake and timetable pages for any week.
+Pages are recorded fixtures with their dates shifted to the requested week
+(synthetic pages in the same markup if there are none). Then
+BOOKING_SITE=http://127.0.0.1:8090 points the worker at it.
+"""
+import argparse
+import datetime
+import glob
+import gzip
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from timetable import parse_timetable
+
+# -------------------------------
+# 📄 Pages
+# -------------------------------
+
+DEFAULT_FIXTURES_DIR = 'booking_fixtures'
+SESSION_COOKIE = 'ASP.NET_SessionId'
+OPEN_COLOR = '#00FF00'
+BOOKED_COLOR = '#FF0000'
+
+_US_DATE = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+_ISO_DATE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+_CELL_COLOR = re.compile(r'(background-color:\s*)(#FF0000|#00FF00)', re.IGNORECASE)
+
+
+def _form_page(token: str, fields: str) -> str:
+    return (
+        '<html><body><form method="post" action="/Booking/Booking/Next/dc876re9gh">'
+        f'<input name="__RequestVerificationToken" type="hidden" value="{token}" />{fields}'
+        '</form></body></html>'
+    )
+
+
+def start_page(token: str) -> str:
+    return _form_page(token, '<input type="submit" name="StartNextButton" value="Make an appointment" />')
+
+
+def agreement_page(token: str) -> str:
+    return _form_page(token, '<input type="checkbox" name="AcceptInformationStorage" value="true" />'
+                             '<input type="submit" name="Next" value="Next" />')
+
+
+def booking_page(token: str) -> str:
+    return _form_page(token, '<input type="text" name="FromDateString" />')
+
+
+def synthetic_week(monday: datetime.date, rnd: random.Random) -> str:
+    """A timetable page in the markup `parse_timetable` reads: weekday 15-minute cells from 7:00 to 17:00."""
+    cells = []
+    for offset in range(5):
+        day = monday + datetime.timedelta(days=offset)
+        for minutes in range(7 * 60, 17 * 60, 15):
+            start = datetime.datetime(day.year, day.month, day.day, minutes // 60, minutes % 60)
+            color = BOOKED_COLOR if rnd.random() < 0.8 else OPEN_COLOR
+            cells.append(
+                f'<div class="timecell" data-function="timeTableCell" '
+                f'data-fromdatetime="{start.strftime("%m/%d/%Y %I:%M:%S %p")}" '
+                f'aria-label="{start.strftime("%A %B %d %H:%M")}" style="background-color: {color}; height: 20px"></div>'
+            )
+    return f'<html><body><table class="timetable"><tr><td>{"".join(cells)}</td></tr></table></body></html>'
+
+
+def shift_dates(page: str, days: int) -> str:
+    """Move every M/D/YYYY and YYYY-MM-DD date in the page by `days`, keeping each one's zero padding."""
+    def shift_us(match):
+        month, day, year = match.groups()
+        try:
+            moved = datetime.date(int(year), int(month), int(day)) + datetime.timedelta(days=days)
+        except ValueError:
+            return match.group(0)
+        return (f"{moved.month:0{len(month)}d}/{moved.day:0{len(day)}d}/{moved.year}")
+
+    def shift_iso(match):
+        try:
+            moved = datetime.date(*map(int, match.groups())) + datetime.timedelta(days=days)
+        except ValueError:
+            return match.group(0)
+        return moved.isoformat()
+
+    return _ISO_DATE.sub(shift_iso, _US_DATE.sub(shift_us, page))
+
+
+def load_fixtures(directory: str) -> List[Tuple[datetime.date, str]]:
+    """Recorded timetable pages in `directory`, each with the Monday of the week it shows."""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            page = f.read()
+        slots = parse_timetable(page)
+        if slots:
+            first = datetime.date.fromisoformat(min(slot['date'] for slot in slots))
+            fixtures.append((first - datetime.timedelta(days=first.weekday()), page))
+    return fixtures
+
+# -------------------------------
+# 🎭 Fake Booking Site
+# -------------------------------
+
+
+class FakeBookingSite:
+    """
+    Handshake sessions and a page per week, mutated as it is fetched.
+
+    Each fetch of a week flips every open/booked cell with probability
+    `mutation_rate`, so unchanged-page skipping and diffs see a realistic
+    trickle of changes. Mutations are seeded per week and fetch number, so
+    runs repeat. Sessions expire after `session_ttl` seconds (0 never); an
+    expired session gets the start page back, as the real site does.
+    """
+
+    def __init__(
+        self,
+        fixtures: List[Tuple[datetime.date, str]],
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        mutation_rate: float = 0.0,
+        session_ttl: float = 0,
+        seed: int = 7,
+    ):
+        self.fixtures = fixtures
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.mutation_rate = mutation_rate
+        self.session_ttl = session_ttl
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, dict] = {}
+        self.weeks: Dict[datetime.date, str] = {}
+        self.fetches: Dict[datetime.date, int] = {}
+        self.stats = {'handshakes': 0, 'timetables': 0, 'expired': 0, 'mutations': 0, 'bytes_sent': 0}
+
+    def delay(self) -> None:
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+
+    def start_session(self) -> Tuple[str, str]:
+        session_id, token = uuid.uuid4().hex, uuid.uuid4().hex
+        with self.lock:
+            self.sessions[session_id] = {'token': token, 'step': 1, 'created': time.monotonic()}
+        return session_id, start_page(token)
+
+    def advance(self, session_id: Optional[str], form: Dict[str, str]) -> str:
+        """Handle a POST to the Next endpoint: a handshake step or a timetable request."""
+        with self.lock:
+            session = self.sessions.get(session_id or '')
+            if session and self.session_ttl and time.monotonic() - session['created'] > self.session_ttl:
+                del self.sessions[session_id]
+                session = None
+            if not session or form.get('__RequestVerificationToken') != session['token']:
+                self.stats['expired'] += 1
+                return start_page(uuid.uuid4().hex)
+
+            if 'FromDateString' in form and session['step'] == 3:
+                requested = datetime.datetime.strptime(form['FromDateString'], '%m/%d/%Y').date()
+                return self.timetable(requested - datetime.timedelta(days=requested.weekday()))
+
+            session['token'] = uuid.uuid4().hex
+            if 'StartNextButton' in form and session['step'] == 1:
+                session['step'] = 2
+                return agreement_page(session['token'])
+            if form.get('AcceptInformationStorage') == 'true' and session['step'] == 2:
+                session['step'] = 3
+                self.stats['handshakes'] += 1
+                return booking_page(session['token'])
+            return start_page(session['token'])
+
+    def timetable(self, monday: datetime.date) -> str:
+        """The week's current page, after this fetch's mutations. Called with the lock held."""
+        page = self.weeks.get(monday)
+        if page is None:
+            page = self._first_page(monday)
+        fetch = self.fetches.get(monday, 0)
+        self.fetches[monday] = fetch + 1
+        if fetch and self.mutation_rate:
+            rnd = random.Random(f"{self.seed}-{monday}-{fetch}")
+
+            def mutate(match):
+                if rnd.random() >= self.mutation_rate:
+                    return match.group(0)
+                self.stats['mutations'] += 1
+                flipped = OPEN_COLOR if match.group(2).upper() == BOOKED_COLOR else BOOKED_COLOR
+                return match.group(1) + flipped
+
+            page = _CELL_COLOR.sub(mutate, page)
+        self.weeks[monday] = page
+        self.stats['timetables'] += 1
+        return page
+
+    def _first_page(self, monday: datetime.date) -> str:
+        rnd = random.Random(f"{self.seed}-{monday}")
+        if not self.fixtures:
+            return synthetic_week(monday, rnd)
+        recorded_monday, page = self.fixtures[rnd.randrange(len(self.fixtures))]
+        return shift_dates(page, (monday - recorded_monday).days)
+
+    def serve(self, port: int = 0) -> ThreadingHTTPServer:
+        """Start serving on a background thread; returns the server (its port is `server_address[1]`)."""
+        server = ThreadingHTTPServer(('127.0.0.1', port), _handler(self))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='fake-booking-site', daemon=True).start()
+        return server
+
+
+def _handler(site: FakeBookingSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/_stats':
+                with site.lock:
+                    stats = json.dumps(site.stats)
+                self._send(stats, 'application/json')
+                return
+            site.delay()
+            session_id, page = site.start_session()
+            self._send(page, cookie=f"{SESSION_COOKIE}={session_id}; path=/; HttpOnly")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+            form = {name: values[-1] for name, values in parse_qs(body).items()}
+            site.delay()
+            self._send(site.advance(self._session_id(), form))
+
+        def _session_id(self) -> Optional[str]:
+            for part in (self.headers.get('Cookie') or '').split(';'):
+                name, _, value = part.strip().partition('=')
+                if name == SESSION_COOKIE:
+                    return value
+            return None
+
+        def _send(self, text: str, content_type: str = 'text/html; charset=utf-8', cookie: Optional[str] = None):
+            body = text.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            if 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = gzip.compress(body, 6)
+                self.send_header('Content-Encoding', 'gzip')
+            if cookie:
+                self.send_header('Set-Cookie', cookie)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with site.lock:
+                site.stats['bytes_sent'] += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+# -------------------------------
+# 📼 Recording Fixtures
+# -------------------------------
+
+
+def record(directory: str, weeks: int) -> None:
+    """Save the live site's timetable pages for the next `weeks` weeks."""
+    import worker
+    from scraper_session import SessionManager
+
+    sessions = SessionManager(worker.fetch_new_tokens)
+    sessions.start()
+    os.makedirs(directory, exist_ok=True)
+    first = datetime.date.today() + datetime.timedelta(days=1)
+    for week in range(weeks):
+        current_date = first + datetime.timedelta(weeks=week)
+        monday = current_date - datetime.timedelta(days=current_date.weekday())
+        page = worker.fetch_calendar_html(sessions, current_date)
+        path = os.path.join(directory, f"week-{monday.isoformat()}.html")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        print(f"📼 Recorded {path} ({len(parse_timetable(page))} slots)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve')
+    serve.add_argument('--port', type=int, default=8090)
+    serve.add_argument('--fixtures', default=DEFAULT_FIXTURES_DIR)
+    serve.add_argument('--latency-ms', type=float, default=0)
+    serve.add_argument('--jitter-ms', type=float, default=0)
+    serve.add_argument('--mutation-rate', type=float, default=0.0, help='chance each cell flips per fetch')
+    serve.add_argument('--session-ttl', type=float, default=0, help='seconds before a session expires (0 never)')
+    serve.add_argument('--seed', type=int, default=7)
+    recorder = commands.add_parser('record')
+    recorder.add_argument('--out', default=DEFAULT_FIXTURES_DIR)
+    recorder.add_argument('--weeks', type=int, default=8)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record(args.out, args.weeks)
+        return
+
+    fixtures = load_fixtures(args.fixtures)
+    site = FakeBookingSite(fixtures, args.latency_ms, args.jitter_ms, args.mutation_rate, args.session_ttl, args.seed)
+    server = site.serve(args.port)
+    print(f"🎭 Fake booking site on http://127.0.0.1:{server.server_address[1]} "
+          f"({len(fixtures) or 'no'} fixtures{'' if fixtures else ', synthetic pages'})", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import datetime
+import re
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+# -------------------------------
+# 🔔 Notification Rule Matching
+# -------------------------------
+
+WEEKDAY_CODES = ('MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN')
+MINUTES_PER_DAY = 24 * 60
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def _to_minutes(value: str) -> int:
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+class NotificationMatcher:
+    """
+    Bitmap index over notification rules (`days`, `start_date`/`end_date`,
+    `start_time`/`end_time`).
+
+    Every rule gets a bit position. The date index holds, for each day in the
+    scrape horizon, the bitset of rules whose date range and weekdays cover that
+    day; the time-of-day index holds one bitset per elementary interval between
+    the distinct rule start/end times. Matching a slot is one AND of two bitsets,
+    so a batch of changes costs a few word-parallel operations per distinct
+    (date, time) rather than a pass over every rule.
+    """
+
+    def __init__(self, rules: Iterable[dict], first_day: datetime.date, horizon_days: int):
+        self.rules: List[dict] = []
+        self.first_day = first_day.toordinal()
+        self.horizon_days = horizon_days
+
+        spans = []
+        for rule in rules:
+            span = self._parse_rule(rule)
+            if span:
+                self.rules.append(rule)
+                spans.append(span)
+
+        self.size = (len(self.rules) + 7) // 8
+        self.date_masks = self._build_date_index(spans)
+        self.time_bounds, self.time_masks = self._build_time_index(spans)
+
+    def _parse_rule(self, rule: dict):
+        """Return (first ordinal, last ordinal, weekdays, start minute, end minute) or None."""
+        try:
+            first = max(datetime.date.fromisoformat(rule['start_date']).toordinal(), self.first_day)
+            last = min(datetime.date.fromisoformat(rule['end_date']).toordinal(),
+                       self.first_day + self.horizon_days - 1)
+            weekdays = {WEEKDAY_CODES.index(day) for day in rule['days']}
+            start_minute = _to_minutes(rule['start_time'])
+            end_minute = _to_minutes(rule['end_time'])
+        except (KeyError, ValueError, TypeError) as e:
+            print(f"⚠️ Skipping malformed notification rule {rule.get('notification_id')}: {e}")
+            return None
+
+        if first > last or start_minute >= end_minute or not weekdays:
+            return None
+        return first, last, weekdays, start_minute, end_minute
+
+    def _bitset(self, rule_ids: Iterable[int]) -> int:
+        buffer = bytearray(self.size)
+        for rule_id in rule_ids:
+            buffer[rule_id >> 3] |= 1 << (rule_id & 7)
+        return int.from_bytes(buffer, 'little')
+
+    def _members(self, bits: int) -> List[int]:
+        data = bits.to_bytes(self.size, 'little')
+        members = []
+        for match in _NONZERO_BYTE.finditer(data):
+            base = match.start() << 3
+            members.extend(base + bit for bit in _BYTE_BITS[data[match.start()]])
+        return members
+
+    def _build_date_index(self, spans) -> List[int]:
+        starts, stops = defaultdict(list), defaultdict(list)
+        by_weekday = [[] for _ in WEEKDAY_CODES]
+        for rule_id, (first, last, weekdays, _, _) in enumerate(spans):
+            starts[first].append(rule_id)
+            stops[last + 1].append(rule_id)
+            for weekday in weekdays:
+                by_weekday[weekday].append(rule_id)
+        weekday_masks = [self._bitset(rule_ids) for rule_ids in by_weekday]
+
+        # Sweep the horizon once, adding rules on their first day and removing them after their last.
+        date_masks = []
+        active = 0
+        for ordinal in range(self.first_day, self.first_day + self.horizon_days):
+            if ordinal in starts:
+                active |= self._bitset(starts[ordinal])
+            if ordinal in stops:
+                active &= ~self._bitset(stops[ordinal])
+            date_masks.append(active & weekday_masks[datetime.date.fromordinal(ordinal).weekday()])
+        return date_masks
+
+    def _build_time_index(self, spans) -> Tuple[List[int], List[int]]:
+        bounds = sorted({0, MINUTES_PER_DAY} | {minute for span in spans for minute in span[3:]})
+        starts, stops = defaultdict(list), defaultdict(list)
+        for rule_id, (_, _, _, start_minute, end_minute) in enumerate(spans):
+            starts[start_minute].append(rule_id)
+            stops[end_minute].append(rule_id)
+
+        # Interval i covers [bounds[i], bounds[i + 1]); a slot matches if it starts inside the window.
+        time_masks = []
+        active = 0
+        for minute in bounds[:-1]:
+            if minute in stops:
+                active &= ~self._bitset(stops[minute])
+            if minute in starts:
+                active |= self._bitset(starts[minute])
+            time_masks.append(active)
+        return bounds, time_masks
+
+    def _mask_for(self, date: str, time_value: str) -> int:
+        offset = datetime.date.fromisoformat(date).toordinal() - self.first_day
+        if not 0 <= offset < self.horizon_days:
+            return 0
+        interval = bisect_right(self.time_bounds, _to_minutes(time_value)) - 1
+        return self.date_masks[offset] & self.time_masks[interval]
+
+    def match(self, slots: Iterable[dict]) -> List[Tuple[dict, List[dict]]]:
+        """Return (rule, matching slots) for every rule matched by at least one slot."""
+        by_key = defaultdict(list)
+        for slot in slots:
+            by_key[(slot['date'], slot['time'])].append(slot)
+
+        matched: Dict[int, List[dict]] = defaultdict(list)
+        for (date, time_value), key_slots in by_key.items():
+            mask = self._mask_for(date, time_value)
+            if mask:
+                for rule_id in self._members(mask):
+                    matched[rule_id].extend(key_slots)
+
+        return [(self.rules[rule_id], matched_slots) for rule_id, matched_slots in matched.items()]
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
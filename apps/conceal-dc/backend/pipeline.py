@@ -0,0 +1,199 @@
+import queue
+import random
+import threading
+import time
+from typing import Callable, List, Optional
+
+# -------------------------------
+# 🏭 Staged Pipeline
+# -------------------------------
+
+_STOP = object()
+
+
+class Stage:
+    """
+    A pool of threads taking jobs from a bounded inbox.
+
+    `handler(job)` returns the job for the next stage, or None to drop it. A
+    full downstream inbox blocks this stage's threads, so a slow stage pushes
+    back all the way to whoever feeds the first one. `on_idle` runs whenever
+    the inbox is drained, and once more before the stage stops; stages use it
+    to flush work they have been accumulating.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable,
+        workers: int = 1,
+        queue_size: int = 8,
+        downstream: Optional["Stage"] = None,
+        on_idle: Optional[Callable[[], None]] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.downstream = downstream
+        self.on_idle = on_idle
+        self.inbox: queue.Queue = queue.Queue(queue_size)
+        self.threads: List[threading.Thread] = []
+
+    def start(self) -> "Stage":
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def put(self, job) -> None:
+        self.inbox.put(job)
+
+    def close(self) -> None:
+        """Let queued jobs finish, stop the threads, then close the next stage."""
+        for _ in self.threads:
+            self.inbox.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.downstream:
+            self.downstream.close()
+
+    def _run(self) -> None:
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                self._idle()
+                return
+            try:
+                output = self.handler(job)
+            except Exception as e:
+                print(f"❌ Unhandled error in {self.name} stage: {e}")
+                output = None
+            if output is not None and self.downstream:
+                self.downstream.put(output)
+            if self.inbox.empty():
+                self._idle()
+
+    def _idle(self) -> None:
+        if self.on_idle:
+            try:
+                self.on_idle()
+            except Exception as e:
+                print(f"❌ Unhandled error flushing {self.name} stage: {e}")
+
+
+class ChangeStream:
+    """
+    Fan-out of change events to subscribers on one dispatcher thread.
+
+    Publishing never waits on subscribers unless `queue_size` events are
+    already backed up. A subscriber that raises is logged and keeps its
+    subscription.
+    """
+
+    def __init__(self, queue_size: int = 64):
+        self.events: queue.Queue = queue.Queue(queue_size)
+        self.subscribers: List[Callable[[dict], None]] = []
+        self.thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[dict], None]) -> None:
+        self.subscribers.append(callback)
+
+    def publish(self, event: dict) -> None:
+        if self.subscribers:
+            self.events.put(event)
+
+    def start(self) -> None:
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="change-stream", daemon=True)
+            self.thread.start()
+
+    def drain(self) -> None:
+        """Block until every published event has been delivered."""
+        self.events.join()
+
+    def _run(self) -> None:
+        while True:
+            event = self.events.get()
+            for callback in self.subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"⚠️ Change subscriber {getattr(callback, '__name__', callback)} failed: {e}")
+            self.events.task_done()
+
+
+class BatchWriter:
+    """
+    Coalesces puts from many producers into full BatchWriteItem calls.
+
+    `add(items, token)` queues items and writes every full batch of
+    `batch_size`; `flush()` writes what is left. Both return the tokens whose
+    items have all been written, in the order they were added. If a write
+    fails, `abandon()` drops the unwritten items and returns their tokens.
+    With `timings`, each batch (retries included) is recorded as a
+    `batch_write` sample; calls that only queue items record nothing.
+    """
+
+    def __init__(self, client, table_name: str, batch_size: int = 25, max_attempts: int = 6, timings=None):
+        self.client = client
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.timings = timings
+        self.pending: List[dict] = []
+        self.tokens: List[tuple] = []  # (position after the token's last item, token)
+        self.written = 0
+        self.queued = 0
+        self.stats = {"batches": 0, "items": 0, "full_batches": 0}
+
+    def add(self, items: List[dict], token) -> list:
+        self.pending.extend(items)
+        self.queued += len(items)
+        self.tokens.append((self.queued, token))
+        while len(self.pending) >= self.batch_size:
+            self._write(self.batch_size)
+        return self._completed()
+
+    def flush(self) -> list:
+        while self.pending:
+            self._write(min(self.batch_size, len(self.pending)))
+        return self._completed()
+
+    def abandon(self) -> list:
+        tokens = [token for _, token in self.tokens]
+        self.pending, self.tokens = [], []
+        self.queued = self.written
+        return tokens
+
+    def _completed(self) -> list:
+        done = 0
+        while done < len(self.tokens) and self.tokens[done][0] <= self.written:
+            done += 1
+        completed = [token for _, token in self.tokens[:done]]
+        del self.tokens[:done]
+        return completed
+
+    def _write(self, count: int) -> None:
+        batch = self.pending[:count]
+        requests = {self.table_name: [{'PutRequest': {'Item': item}} for item in batch]}
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_attempts):
+                response = self.client.batch_write_item(RequestItems=requests)
+                requests = response.get('UnprocessedItems') or {}
+                if not requests:
+                    break
+                time.sleep(0.05 * 2 ** attempt * random.uniform(0.5, 1.5))
+            else:
+                raise Exception(f"❌ BatchWriteItem left {len(requests[self.table_name])} items unprocessed.")
+        finally:
+            if self.timings is not None:
+                self.timings.record('batch_write', time.perf_counter() - started)
+
+        del self.pending[:count]
+        self.written += count
+        self.stats["batches"] += 1
+        self.stats["items"] += count
+        self.stats["full_batches"] += count == self.batch_size
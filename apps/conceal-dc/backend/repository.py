@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+
+# -------------------------------
+# 🗄️ Async DynamoDB Access
+# -------------------------------
+
+DEFAULT_MAX_CONNECTIONS = 32
+
+_deserializer = TypeDeserializer()
+
+
+def deserialize_item(item: dict) -> dict:
+    """Convert a typed item (as returned in ConditionalCheckFailed errors) to plain Python values."""
+    return {name: _deserializer.deserialize(value) for name, value in item.items()}
+
+
+class AsyncTable:
+    """Awaitable view of one table. Calls run on the repository's executor, never on the event loop."""
+
+    def __init__(self, repository: "DynamoRepository", name: str):
+        self.repository = repository
+        self.name = name
+
+    async def query(self, **kwargs) -> dict:
+        return await self.repository.run(self.repository.client.query, TableName=self.name, **kwargs)
+
+    async def scan(self, **kwargs) -> dict:
+        return await self.repository.run(self.repository.client.scan, TableName=self.name, **kwargs)
+
+    async def get_item(self, **kwargs) -> dict:
+        return await self.repository.run(self.repository.client.get_item, TableName=self.name, **kwargs)
+
+    async def put_item(self, **kwargs) -> dict:
+        return await self.repository.run(self.repository.client.put_item, TableName=self.name, **kwargs)
+
+    async def delete_item(self, **kwargs) -> dict:
+        return await self.repository.run(self.repository.client.delete_item, TableName=self.name, **kwargs)
+
+
+class DynamoRepository:
+    """
+    Shared DynamoDB access for async code.
+
+    Every call goes through one low-level client, with a connection pool sized to
+    match a dedicated executor, so up to `max_connections` requests are in flight
+    at once without taking FastAPI's threadpool or blocking the event loop.
+    Clients are thread-safe where boto3 resources are not; the resource's own
+    client carries boto3's serializer and condition-expression hooks, so it takes
+    and returns plain Python values the way the Table API does.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: Optional[str] = None,
+        region_name: str = 'us-east-1',
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        resource=None,
+    ):
+        config = Config(
+            max_pool_connections=max_connections,
+            tcp_keepalive=True,
+            retries={'max_attempts': 5, 'mode': 'adaptive'}
+        )
+        self.resource = resource or boto3.resource(
+            'dynamodb', endpoint_url=endpoint_url, region_name=region_name, config=config
+        )
+        self.client = self.resource.meta.client
+        self.executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="dynamodb")
+        self.tables = {}
+
+    def table(self, name: str) -> AsyncTable:
+        if name not in self.tables:
+            self.tables[name] = AsyncTable(self, name)
+        return self.tables[name]
+
+    async def run(self, method, *args, **kwargs):
+        # Carry the caller's context vars (e.g. the route being served) into the executor thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(context.run, method, *args, **kwargs))
+
+    async def batch_get_item(self, **kwargs) -> dict:
+        return await self.run(self.client.batch_get_item, **kwargs)
+
+    async def transact_write_items(self, operations: List[dict]) -> dict:
+        """
+        All-or-nothing writes across tables, with plain Python values as for every other call.
+        """
+        return await self.run(self.client.transact_write_items, TransactItems=operations)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,111 @@
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# -------------------------------
+# 🗓️ Adaptive Week Scheduling
+# -------------------------------
+
+HOT_WEEKS = 4               # The next few weeks are scraped every cycle
+MAX_INTERVAL_CYCLES = 16    # A stable week is still scraped at least this often
+HISTORY_WINDOW_SECONDS = 24 * 3600
+CYCLE_SECONDS = 60
+
+
+class WeekState:
+    __slots__ = ("interval", "next_cycle", "recent_changes")
+
+    def __init__(self, next_cycle: int):
+        self.interval = 1
+        self.next_cycle = next_cycle
+        self.recent_changes = 0
+
+
+class ScrapeScheduler:
+    """
+    Decides which weeks to scrape each cycle.
+
+    The first `HOT_WEEKS` weeks are scraped every cycle. Any other week is
+    scraped again next cycle after it changed, and otherwise its interval
+    doubles each time it is found unchanged. The interval is capped twice: by
+    distance (weeks 4-7 wait at most 2 cycles, 8-11 at most 4, and so on, up
+    to `MAX_INTERVAL_CYCLES`) and by the week's churn rate. The churn rate is
+    read from the `history` of its stored slots, so a week that changed
+    recently is polled at about twice its change rate. Weeks new to the
+    horizon, and weeks whose scrape failed, are due on the next cycle.
+    """
+
+    def __init__(
+        self,
+        hot_weeks: int = HOT_WEEKS,
+        max_interval: int = MAX_INTERVAL_CYCLES,
+        cycle_seconds: float = CYCLE_SECONDS,
+        history_window: float = HISTORY_WINDOW_SECONDS,
+    ):
+        self.hot_weeks = hot_weeks
+        self.max_interval = max_interval
+        self.cycle_seconds = cycle_seconds
+        self.history_window = history_window
+        self.cycle = 0
+        self.weeks: Dict[str, WeekState] = {}
+
+    def due(self, week_starts: Sequence[str]) -> List[str]:
+        """Advance to the next cycle and return the weeks (in order) to scrape in it."""
+        self.cycle += 1
+        horizon = set(week_starts)
+        for week_start in list(self.weeks):
+            if week_start not in horizon:
+                del self.weeks[week_start]
+
+        due = []
+        for index, week_start in enumerate(week_starts):
+            state = self.weeks.setdefault(week_start, WeekState(self.cycle))
+            if index < self.hot_weeks or state.next_cycle <= self.cycle:
+                due.append(week_start)
+        return due
+
+    def record(
+        self,
+        week_start: str,
+        index: int,
+        ok: bool,
+        changes: int = 0,
+        stored_slots: Optional[Iterable[dict]] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        """
+        Update a week after it was scraped. `stored_slots` are its items as read
+        from DynamoDB; when the week wasn't read, the last known churn is kept.
+        """
+        state = self.weeks.setdefault(week_start, WeekState(self.cycle))
+        now = now or time.time()
+
+        if stored_slots is not None:
+            recent_changes = 0
+            for slot in stored_slots:
+                # The first history entry is when the slot appeared, not a change.
+                for entry in slot.get('history', [])[1:]:
+                    if now - int(entry.get('timestamp', 0)) <= self.history_window:
+                        recent_changes += 1
+            state.recent_changes = recent_changes
+
+        if not ok or changes or index < self.hot_weeks:
+            state.interval = 1
+        else:
+            state.interval = min(state.interval * 2, self._interval_cap(index, state.recent_changes))
+        state.next_cycle = self.cycle + state.interval
+
+    def _interval_cap(self, index: int, recent_changes: int) -> int:
+        cap = min(self.max_interval, 2 ** (index // self.hot_weeks))
+        if recent_changes:
+            # Poll at about twice the observed change rate.
+            gap_cycles = self.history_window / recent_changes / self.cycle_seconds
+            cap = min(cap, max(1, int(gap_cycles / 2)))
+        return cap
+
+    def summary(self) -> Dict[str, int]:
+        intervals = [state.interval for state in self.weeks.values()]
+        return {
+            'weeks': len(intervals),
+            'every_cycle': sum(1 for interval in intervals if interval == 1),
+            'max_interval': max(intervals, default=0)
+        }
@@ -0,0 +1,139 @@
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# -------------------------------
+# 🍪 Scraper Session Lifecycle
+# -------------------------------
+
+# Statuses the booking site answers with once the token or cookies are no longer valid. A 400
+# is a malformed request, not expiry, unless its body is the start page (see session_expired).
+EXPIRED_STATUS_CODES = {401, 403, 419, 440}
+HANDSHAKE_COOLDOWN_SECONDS = 30
+
+
+class TransportStats:
+    """Per-request latency and byte counts, both on the wire (compressed) and decoded."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def record(self, response, seconds: float) -> None:
+        content = getattr(response, 'content', None)
+        body = len(content) if content is not None else len(response.text.encode('utf-8'))
+        raw = getattr(response, 'raw', None)
+        wire = raw.tell() if hasattr(raw, 'tell') else body
+        with self.lock:
+            self.latencies.append(seconds)
+            self.wire_bytes += wire
+            self.body_bytes += body
+
+    def snapshot(self, reset: bool = True) -> Dict[str, float]:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            wire, body = self.wire_bytes, self.body_bytes
+            if reset:
+                self.latencies, self.wire_bytes, self.body_bytes = [], 0, 0
+
+        count = len(latencies)
+        return {
+            'requests': count,
+            'p50_ms': round(latencies[count // 2] * 1000, 1) if count else 0,
+            'p95_ms': round(latencies[min(count - 1, int(count * 0.95))] * 1000, 1) if count else 0,
+            'wire_kb': round(wire / 1024, 1),
+            'body_kb': round(body / 1024, 1),
+            'compression': round(body / wire, 1) if wire else 0
+        }
+
+
+class SessionExpired(Exception):
+    """The booking site rejected the session's token or cookies."""
+
+
+def session_expired(response) -> bool:
+    """
+    True if the response means the session has to be re-established: an
+    expiry status, or a redirect back to the booking start page (the page with
+    the "Make an appointment" button) instead of a timetable.
+    """
+    if response.status_code in EXPIRED_STATUS_CODES:
+        return True
+    if '/Booking/Booking/Index/' in (getattr(response, 'url', '') or ''):
+        return True
+    return 'timetable' not in response.text and 'StartNextButton' in response.text
+
+
+class WarmSession:
+    """An HTTP session that completed the handshake, with the token and cookie header it returned."""
+
+    __slots__ = ("session", "token", "cookie_header")
+
+    def __init__(self, token: str, cookie_header: str, session):
+        self.token = token
+        self.cookie_header = cookie_header
+        self.session = session
+
+
+class SessionManager:
+    """
+    Keeps `pool_size` handshaken sessions and hands them out round-robin.
+
+    When a request finds its session expired, it calls `refresh` with the
+    session it used. The first caller re-runs the handshake; callers that
+    arrive while it runs, or afterwards with the same stale session, get the
+    replacement without another handshake. A failed handshake is not retried
+    for `HANDSHAKE_COOLDOWN_SECONDS`; until then `refresh` raises right away,
+    so a site outage doesn't cause a handshake per week.
+    """
+
+    def __init__(self, handshake: Callable[[], Tuple[str, str, object]], pool_size: int = 1):
+        self.handshake = handshake
+        self.pool_size = max(1, pool_size)
+        self.pool: List[WarmSession] = []
+        self.turns = itertools.count()
+        self.locks = [threading.Lock() for _ in range(self.pool_size)]
+        self.failed_at: List[Optional[float]] = [None] * self.pool_size
+        self.stats = {"handshakes": 0, "refreshes": 0, "failed_handshakes": 0}
+
+    def start(self) -> None:
+        """Run the handshake for every session in the pool."""
+        self.pool = [self._handshake() for _ in range(self.pool_size)]
+
+    def lease(self) -> WarmSession:
+        return self.pool[next(self.turns) % self.pool_size]
+
+    def refresh(self, stale: WarmSession) -> WarmSession:
+        """Replace `stale` with a freshly handshaken session, unless another request already did."""
+        index = self.pool.index(stale) if stale in self.pool else None
+        if index is None:
+            # Already replaced: hand out the current session in that position.
+            return self.lease()
+
+        with self.locks[index]:
+            current = self.pool[index]
+            if current is not stale:
+                return current
+            failed_at = self.failed_at[index]
+            if failed_at is not None and time.monotonic() - failed_at < HANDSHAKE_COOLDOWN_SECONDS:
+                raise SessionExpired("Session expired and the last handshake failed; waiting before retrying.")
+
+            print(f"🔑 Session {index} expired, running the handshake again...")
+            try:
+                fresh = self._handshake()
+            except Exception:
+                self.failed_at[index] = time.monotonic()
+                self.stats["failed_handshakes"] += 1
+                raise
+            self.pool[index] = fresh
+            self.failed_at[index] = None
+            self.stats["refreshes"] += 1
+            return fresh
+
+    def _handshake(self) -> WarmSession:
+        token, cookie_header, session = self.handshake()
+        self.stats["handshakes"] += 1
+        return WarmSession(token, cookie_header, session)
@@ -0,0 +1,134 @@
+import datetime
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+# -------------------------------
+# 🪞 Worker State Mirror
+# -------------------------------
+
+
+def _query_partition(table, partition: str) -> list:
+    items = []
+    kwargs = {'KeyConditionExpression': Key('year_month').eq(partition)}
+    while True:
+        response = table.query(**kwargs)
+        items.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return items
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+class SlotMirror:
+    """
+    In-memory copy of the slots and daily availability the worker owns.
+
+    The worker is the only writer of these items, so once a month partition and
+    the `'A'` partition are loaded, diffs can run against the mirror instead of
+    reading DynamoDB before every write. The mirror is updated only after a
+    write succeeds. `reconcile` reloads everything and reports drift, for
+    anything written behind the worker's back.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        # Slots grouped by date, then keyed by date_time
+        self.days: Dict[str, Dict[str, dict]] = {}
+        self.daily: Dict[str, int] = {}
+        self.months = set()
+        self.daily_loaded = False
+        # True only while every partition of the current horizon is mirrored
+        self.loaded = False
+        self.reconciled_at = 0.0
+        self.lock = threading.Lock()
+
+    def ensure_loaded(self, months: Iterable[str]) -> None:
+        """Load the `'A'` partition and any month partitions not loaded yet."""
+        self.loaded = False
+        missing = sorted(set(months) - self.months)
+        for month in missing:
+            items = _query_partition(self.table, month)
+            with self.lock:
+                self._add(self.days, items)
+                self.months.add(month)
+        if missing:
+            print(f"🪞 Mirrored {len(missing)} month partitions ({len(self)} slots).")
+
+        if not self.daily_loaded:
+            daily = self._load_daily()
+            with self.lock:
+                self.daily = daily
+                self.daily_loaded = True
+                self.reconciled_at = time.time()
+            print(f"🪞 Mirrored {len(daily)} daily availability records.")
+        self.loaded = True
+
+    @staticmethod
+    def _add(days: Dict[str, Dict[str, dict]], items: Iterable[dict]) -> None:
+        for item in items:
+            days.setdefault(item['date_time'][:10], {})[item['date_time']] = item
+
+    def _load_daily(self) -> Dict[str, int]:
+        return {item['date_time']: int(item['status']) for item in _query_partition(self.table, 'A')}
+
+    def prune(self, months: Iterable[str]) -> None:
+        """
+        Forget month partitions that left the horizon. Slots go by their stored
+        `year_month`, which is the month of their week's Monday, not their own date's.
+        """
+        keep = set(months)
+        with self.lock:
+            self.months &= keep
+            for day, slots in list(self.days.items()):
+                kept = {key: item for key, item in slots.items() if item.get('year_month') in keep}
+                if not kept:
+                    del self.days[day]
+                elif len(kept) < len(slots):
+                    self.days[day] = kept
+
+    def week(self, week_start: str) -> Dict[str, dict]:
+        """Stored slots for the Monday-to-Sunday week starting `week_start`, keyed by date_time."""
+        first = datetime.date.fromisoformat(week_start)
+        week = {}
+        with self.lock:
+            for offset in range(7):
+                week.update(self.days.get((first + datetime.timedelta(days=offset)).isoformat(), {}))
+        return week
+
+    def daily_snapshot(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.daily)
+
+    def apply_slots(self, items: Iterable[dict]) -> None:
+        with self.lock:
+            self._add(self.days, items)
+
+    def apply_daily(self, updates: Dict[str, int]) -> None:
+        with self.lock:
+            self.daily.update(updates)
+
+    def reconcile(self) -> Tuple[int, int]:
+        """Reload every mirrored partition; return (slot drift, daily drift) and adopt DynamoDB's view."""
+        days = {}
+        for month in sorted(self.months):
+            self._add(days, _query_partition(self.table, month))
+        daily = self._load_daily()
+
+        with self.lock:
+            stored = self._statuses(days)
+            mirrored = self._statuses(self.days)
+            slot_drift = sum(1 for key in stored.keys() | mirrored.keys() if stored.get(key) != mirrored.get(key))
+            daily_drift = sum(1 for key in daily.keys() | self.daily.keys() if daily.get(key) != self.daily.get(key))
+            self.days = days
+            self.daily = daily
+            self.reconciled_at = time.time()
+        return slot_drift, daily_drift
+
+    @staticmethod
+    def _statuses(days: Dict[str, Dict[str, dict]]) -> Dict[str, str]:
+        return {key: item.get('status') for slots in days.values() for key, item in slots.items()}
+
+    def __len__(self) -> int:
+        return sum(len(slots) for slots in self.days.values())
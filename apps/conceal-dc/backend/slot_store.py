@@ -0,0 +1,266 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from hashlib import blake2b
+from typing import AbstractSet, Iterable, List, Optional, Tuple
+import json
+import threading
+
+# -------------------------------
+# 🔑 Encoding Helpers
+# -------------------------------
+
+def encode_json(value) -> bytes:
+    """Encode a value exactly the way FastAPI's JSONResponse does."""
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def make_etag(*digests: bytes) -> str:
+    """Strong ETag for one blob, or for a stitched sequence of blobs."""
+    if len(digests) == 1:
+        return f'"{digests[0].hex()}"'
+    return f'"{blake2b(b"".join(digests), digest_size=16).hexdigest()}"'
+
+def _digest(blob: bytes) -> bytes:
+    return blake2b(blob, digest_size=16).digest()
+
+# -------------------------------
+# 🧱 Packed Slots
+# -------------------------------
+
+# Status byte values. A status not listed here gets the next free code the first time it is seen.
+STATUS_NAMES: List[str] = ['Booked', 'Open', 'Unknown']
+_STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+_status_lock = threading.Lock()
+
+SLOT_FIELDS = frozenset(('year_month', 'date_time', 'global_pk', 'date', 'time', 'status', 'last_changed', 'history'))
+HISTORY_FIELDS = frozenset(('status', 'timestamp'))
+
+def status_code(status) -> Optional[int]:
+    """The byte code for a status string, or None if it can't have one."""
+    code = _STATUS_CODES.get(status)
+    if code is not None or not isinstance(status, str):
+        return code
+    with _status_lock:
+        if status not in _STATUS_CODES and len(STATUS_NAMES) < 256:
+            _STATUS_CODES[status] = len(STATUS_NAMES)
+            STATUS_NAMES.append(status)
+        return _STATUS_CODES.get(status)
+
+class Slot:
+    """
+    One cached appointment slot, packed.
+
+    Only `date_time` is kept as a string; `year_month`, `date` and `time` are
+    slices of it. The status is a byte code, `last_changed` an int, and the
+    history two parallel arrays of timestamps and status codes. An item that
+    doesn't have exactly the shape the worker writes keeps its original dict
+    in `item` instead. `to_dict` rebuilds the item for encoding.
+    """
+
+    __slots__ = ("date_time", "status", "last_changed", "history_times", "history_statuses", "item")
+
+    def __init__(
+        self,
+        date_time: str,
+        status: int = 0,
+        last_changed: int = 0,
+        history_times: Optional[array] = None,
+        history_statuses: bytes = b"",
+        item: Optional[dict] = None,
+    ):
+        self.date_time = date_time
+        self.status = status
+        self.last_changed = last_changed
+        self.history_times = history_times
+        self.history_statuses = history_statuses
+        self.item = item
+
+    @classmethod
+    def from_item(cls, item: dict) -> "Slot":
+        """Pack an Appointments item, already converted from Decimals."""
+        return cls._pack(item) or cls(item['date_time'], item=item)
+
+    @classmethod
+    def _pack(cls, item: dict) -> Optional["Slot"]:
+        date_time = item['date_time']
+        if (
+            item.keys() != SLOT_FIELDS
+            or item['global_pk'] != 'updates'
+            or date_time[10:11] != '_'
+            or (item['year_month'], item['date'], item['time']) != (date_time[:7], date_time[:10], date_time[11:])
+        ):
+            return None
+        last_changed, history = item['last_changed'], item['history']
+        if not (isinstance(last_changed, str) and last_changed.isdigit() and str(int(last_changed)) == last_changed):
+            return None
+        status = status_code(item['status'])
+        if status is None or not isinstance(history, list):
+            return None
+
+        times, statuses = array('q'), bytearray()
+        for entry in history:
+            if not isinstance(entry, dict) or entry.keys() != HISTORY_FIELDS or type(entry['timestamp']) is not int:
+                return None
+            code = status_code(entry['status'])
+            if code is None:
+                return None
+            try:
+                times.append(entry['timestamp'])
+            except OverflowError:
+                return None
+            statuses.append(code)
+        return cls(date_time, status, int(last_changed), times, bytes(statuses))
+
+    def to_dict(self) -> dict:
+        """The item as stored in DynamoDB; callers must not modify it."""
+        if self.item is not None:
+            return self.item
+        date_time = self.date_time
+        return {
+            'year_month': date_time[:7],
+            'date_time': date_time,
+            'global_pk': 'updates',
+            'date': date_time[:10],
+            'time': date_time[11:],
+            'status': STATUS_NAMES[self.status],
+            'last_changed': str(self.last_changed),
+            'history': [
+                {'status': STATUS_NAMES[code], 'timestamp': timestamp}
+                for timestamp, code in zip(self.history_times, self.history_statuses)
+            ]
+        }
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Slot):
+            return NotImplemented
+        return (
+            self.date_time == other.date_time
+            and self.status == other.status
+            and self.last_changed == other.last_changed
+            and self.history_times == other.history_times
+            and self.history_statuses == other.history_statuses
+            and self.item == other.item
+        )
+
+    __hash__ = None
+
+# -------------------------------
+# 🗂️ Date-Indexed Slot Store
+# -------------------------------
+
+class SlotStore:
+    """
+    Immutable snapshot of cached appointment slots.
+
+    Slots are kept in one list sorted by `date_time`. `dates` holds each distinct
+    `YYYY-MM-DD` date once, in order, and `offsets[i]:offsets[i + 1]` is the slice
+    of `slots` that falls on `dates[i]`. A range query is two bisects and a slice.
+
+    Each date also carries a pre-encoded JSON fragment (its slots, comma-joined),
+    so range responses are stitched from bytes without re-encoding. Unchanged
+    `Slot` objects and fragments are shared between successive snapshots.
+    """
+
+    __slots__ = ("version", "dates", "offsets", "slots", "fragments", "digests")
+
+    def __init__(
+        self,
+        version: int,
+        dates: List[str],
+        offsets: array,
+        slots: List[Slot],
+        fragments: List[bytes],
+        digests: List[bytes],
+    ):
+        self.version = version
+        self.dates = dates
+        self.offsets = offsets
+        self.slots = slots
+        self.fragments = fragments
+        self.digests = digests
+
+    @classmethod
+    def build(
+        cls,
+        slots: Iterable[Slot],
+        version: int = 0,
+        previous: Optional["SlotStore"] = None,
+        dirty_dates: AbstractSet[str] = frozenset(),
+    ) -> "SlotStore":
+        """
+        Build a store from slots in any order.
+
+        When `previous` is given, the encoded fragments of every date not in
+        `dirty_dates` are reused from it instead of being encoded again.
+        """
+        slots = sorted(slots, key=lambda slot: slot.date_time)
+        dates = []
+        offsets = array('I')
+
+        for index, slot in enumerate(slots):
+            date = slot.date_time[:10]
+            if not dates or dates[-1] != date:
+                dates.append(date)
+                offsets.append(index)
+        offsets.append(len(slots))
+
+        fragments, digests = [], []
+        for index, date in enumerate(dates):
+            reused = previous._date_index(date) if previous and date not in dirty_dates else None
+            if reused is not None:
+                fragments.append(previous.fragments[reused])
+                digests.append(previous.digests[reused])
+            else:
+                fragment = b",".join(encode_json(slot.to_dict()) for slot in slots[offsets[index]:offsets[index + 1]])
+                fragments.append(fragment)
+                digests.append(_digest(fragment))
+
+        return cls(version, dates, offsets, slots, fragments, digests)
+
+    def patch(self, slots: Iterable[Slot], version: int, months: AbstractSet[str]) -> Tuple["SlotStore", List[Slot]]:
+        """
+        Upsert `slots` by `date_time` and drop every slot outside `months` (YYYY-MM).
+        Returns the new store and the slots that actually changed; the store is
+        self if nothing did.
+        """
+        current = {slot.date_time: slot for slot in self.slots if slot.date_time[:7] in months}
+        dropped = len(current) != len(self.slots)
+        changed = []
+
+        for slot in slots:
+            key = slot.date_time
+            if key[:7] in months and current.get(key) != slot:
+                current[key] = slot
+                changed.append(slot)
+
+        if not changed and not dropped:
+            return self, changed
+        dirty_dates = {slot.date_time[:10] for slot in changed}
+        return SlotStore.build(current.values(), version, previous=self, dirty_dates=dirty_dates), changed
+
+    @classmethod
+    def empty(cls) -> "SlotStore":
+        return cls.build([])
+
+    def _date_index(self, date: str) -> Optional[int]:
+        index = bisect_left(self.dates, date)
+        return index if index < len(self.dates) and self.dates[index] == date else None
+
+    def _date_range(self, start_date: str, end_date: str) -> Tuple[int, int]:
+        return bisect_left(self.dates, start_date), bisect_right(self.dates, end_date)
+
+    def between(self, start_date: str, end_date: str) -> List[Slot]:
+        """Return every slot dated between start_date and end_date, inclusive."""
+        lo, hi = self._date_range(start_date, end_date)
+        return self.slots[self.offsets[lo]:self.offsets[hi]]
+
+    def encoded_between(self, start_date: str, end_date: str) -> Tuple[List[bytes], str]:
+        """
+        Return the pre-encoded JSON fragments for a date range and the range's ETag.
+        Joining the fragments with commas gives the JSON array body for the range.
+        """
+        lo, hi = self._date_range(start_date, end_date)
+        digests = self.digests[lo:hi]
+        return self.fragments[lo:hi], make_etag(*digests) if digests else make_etag(_digest(b""))
+
+    def __len__(self) -> int:
+        return len(self.slots)
@@ -0,0 +1,279 @@
+import bisect
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from starlette.routing import Match
+
+# -------------------------------
+# 📈 Metrics Registry
+# -------------------------------
+
+# Upper bounds in seconds; the +Inf bucket is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route template of the request being served; calls made outside a request are "background".
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar("current_route", default="background")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Counters, gauges and latency histograms kept in process, rendered in the
+    Prometheus text format on demand. Every family is declared up front with
+    its help text; label sets are created on first use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.families: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self.values: Dict[str, Dict[Labels, object]] = {}
+        # Called at render time for values owned by other components
+        self.collectors: List[Callable[["Metrics"], None]] = []
+
+    def declare(self, name: str, kind: str, help_text: str) -> None:
+        self.families[name] = (kind, help_text)
+        self.values.setdefault(name, {})
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _labels(**labels)
+        with self.lock:
+            series = self.values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.values[name][_labels(**labels)] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _labels(**labels)
+        with self.lock:
+            series = self.values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def collector(self, callback: Callable[["Metrics"], None]) -> Callable[["Metrics"], None]:
+        self.collectors.append(callback)
+        return callback
+
+    def render(self) -> str:
+        for callback in self.collectors:
+            try:
+                callback(self)
+            except Exception as e:
+                log(f"⚠️ Metrics collector {getattr(callback, '__name__', callback)} failed", level=logging.WARNING, error=str(e))
+
+        lines = []
+        with self.lock:
+            for name, (kind, help_text) in sorted(self.families.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self.values[name].items()):
+                    if kind == "histogram":
+                        lines.extend(self._histogram_lines(name, labels, value))
+                    else:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name: str, labels: Labels, histogram: Histogram) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {round(histogram.total, 6)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return lines
+
+
+metrics = Metrics()
+metrics.declare("http_requests_total", "counter", "HTTP requests by route, method and status code.")
+metrics.declare("http_request_duration_seconds", "histogram", "Time until the response headers were sent, by route.")
+metrics.declare("http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+metrics.declare("dynamodb_calls_total", "counter", "DynamoDB API calls by route and operation.")
+metrics.declare("dynamodb_errors_total", "counter", "DynamoDB API calls that returned an error, by operation and code.")
+metrics.declare("dynamodb_consumed_capacity_units_total", "counter", "Capacity units DynamoDB reported, by route, table and operation.")
+metrics.declare("cache_requests_total", "counter", "Cache lookups by cache and result (hit or miss).")
+
+# -------------------------------
+# 🪝 DynamoDB Event Hooks
+# -------------------------------
+
+
+def _request_capacity(params: dict, model, **kwargs) -> None:
+    """Ask for consumed capacity on every operation that can report it; reporting it is free."""
+    if "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _record_call(http_response, parsed: dict, model, **kwargs) -> None:
+    route = current_route.get()
+    operation = model.name
+    metrics.inc("dynamodb_calls_total", route=route, operation=operation)
+
+    error = parsed.get("Error") if isinstance(parsed, dict) else None
+    if error:
+        metrics.inc("dynamodb_errors_total", operation=operation, code=error.get("Code", "Unknown"))
+        return
+
+    consumed = parsed.get("ConsumedCapacity")
+    # Single-table operations return one entry; batch and transaction operations a list per table
+    for entry in consumed if isinstance(consumed, list) else [consumed] if consumed else []:
+        units = entry.get("CapacityUnits")
+        if units:
+            metrics.inc(
+                "dynamodb_consumed_capacity_units_total", float(units),
+                route=route, table=entry.get("TableName", ""), operation=operation
+            )
+
+
+def instrument_dynamodb(client) -> None:
+    """Register the capacity and call-count hooks on a DynamoDB client (e.g. `resource.meta.client`)."""
+    events = client.meta.events
+    events.register("provide-client-params.dynamodb", _request_capacity, unique_id="telemetry-capacity")
+    events.register("after-call.dynamodb", _record_call, unique_id="telemetry-calls")
+
+# -------------------------------
+# ⏱️ Request Middleware
+# -------------------------------
+
+
+def route_template(scope: dict) -> str:
+    """The path template of the route serving `scope`, so path parameters don't become labels."""
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return getattr(route, "path", scope["path"])
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (it doesn't buffer streaming responses) recording a
+    latency histogram and a status counter per route. The route is also set in
+    `current_route` for the duration of the request, so DynamoDB calls made
+    while serving it are attributed to it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        method = scope["method"]
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                metrics.observe("http_request_duration_seconds", time.perf_counter() - started, route=route)
+            await send(message)
+
+        token = current_route.set(route)
+        metrics.inc("http_requests_in_flight", 1)
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            metrics.inc("http_requests_in_flight", -1)
+            metrics.inc("http_requests_total", route=route, method=method, status=str(status["code"]))
+            current_route.reset(token)
+
+# -------------------------------
+# 📝 Buffered Structured Logging
+# -------------------------------
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("conceal")
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: time, level, message, route, and any fields passed to `log`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+            "route": getattr(record, "route", None),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def start_logging() -> None:
+    """
+    Route `log` records through a queue to a listener thread that writes them
+    to stdout, so request handlers never block on the write.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonLineFormatter())
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(records, output)
+    _log_listener.start()
+
+
+def stop_logging() -> None:
+    """Write out whatever is still queued and stop the listener thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def log(message: str, level: int = logging.INFO, **fields) -> None:
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields, "route": current_route.get()})
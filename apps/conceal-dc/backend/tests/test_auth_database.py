@@ -0,0 +1,154 @@
+import asyncio
+import time
+
+import boto3
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from auth import database  # noqa: E402
+from auth.database import DatabaseService, OtpMismatch, OtpNotFound  # noqa: E402
+from repository import DynamoRepository  # noqa: E402
+
+
+def string_attributes(*names):
+    return [{"AttributeName": name, "AttributeType": "S"} for name in names]
+
+
+def gsi(name, attribute):
+    return {
+        "IndexName": name,
+        "KeySchema": [{"AttributeName": attribute, "KeyType": "HASH"}],
+        "Projection": {"ProjectionType": "ALL"},
+    }
+
+
+@pytest.fixture
+def resource(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        resource = boto3.resource("dynamodb", region_name="us-east-1")
+        resource.create_table(
+            TableName=database.USERS_TABLE_NAME,
+            KeySchema=[{"AttributeName": "user_id", "KeyType": "HASH"}],
+            AttributeDefinitions=string_attributes("user_id", "email", "phone_number"),
+            GlobalSecondaryIndexes=[
+                gsi("EmailIndex", "email"),
+                gsi("PhoneNumberIndex", "phone_number"),
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        resource.create_table(
+            TableName=database.OTP_TABLE_NAME,
+            KeySchema=[{"AttributeName": "otp_id", "KeyType": "HASH"}],
+            AttributeDefinitions=string_attributes("otp_id"),
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield resource
+
+
+@pytest.fixture
+def db(resource):
+    repository = DynamoRepository(resource=resource, max_connections=4)
+    yield DatabaseService(repository)
+    repository.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def identity_owner(resource, key):
+    item = resource.Table(database.USERS_TABLE_NAME).get_item(Key={"user_id": key}).get("Item")
+    return item and item["owner_id"]
+
+
+def test_second_login_resolves_to_the_same_owner(db, resource):
+    user_id, created = run(db.start_login("user@example.com", "+15550001", "otp-1", "111111"))
+    assert created
+
+    again, created_again = run(db.start_login("user@example.com", None, "otp-2", "222222"))
+    by_phone, _ = run(db.start_login(None, "+15550001", "otp-3", "333333"))
+
+    assert (again, created_again) == (user_id, False)
+    assert by_phone == user_id
+    assert identity_owner(resource, "EMAIL#user@example.com") == user_id
+    assert identity_owner(resource, "PHONE#+15550001") == user_id
+    assert run(db.get_otp("otp-2"))["user_id"] == user_id
+
+
+def test_identity_claimed_by_another_user_is_left_alone(db, resource):
+    users = resource.Table(database.USERS_TABLE_NAME)
+    users.put_item(Item={"user_id": "PHONE#+15550001", "owner_id": "someone"})
+
+    user_id, created = run(db.start_login("user@example.com", "+15550001", "otp-1", "111111"))
+
+    assert created and user_id != "someone"
+    assert identity_owner(resource, "EMAIL#user@example.com") == user_id
+    assert identity_owner(resource, "PHONE#+15550001") == "someone"
+    assert run(db.get_otp("otp-1"))["user_id"] == user_id
+
+
+def test_wrong_code_leaves_the_otp_intact(db):
+    user_id, _ = run(db.start_login("user@example.com", None, "otp-1", "111111"))
+
+    with pytest.raises(OtpMismatch):
+        run(db.consume_otp("otp-1", "999999"))
+    assert run(db.get_otp("otp-1"))["otp_code"] == "111111"
+
+    assert run(db.consume_otp("otp-1", "111111"))["user_id"] == user_id
+
+
+def test_replay_after_consume_is_not_found(db):
+    run(db.start_login("user@example.com", None, "otp-1", "111111"))
+    run(db.consume_otp("otp-1", "111111"))
+
+    with pytest.raises(OtpNotFound):
+        run(db.consume_otp("otp-1", "111111"))
+    assert run(db.get_otp("otp-1")) is None
+
+
+def test_expired_otp_is_not_found(db, resource):
+    resource.Table(database.OTP_TABLE_NAME).put_item(
+        Item={"otp_id": "otp-1", "otp_code": "111111", "expires_at": int(time.time()) - 1}
+    )
+
+    with pytest.raises(OtpNotFound):
+        run(db.consume_otp("otp-1", "111111"))
+    with pytest.raises(OtpNotFound):
+        run(db.consume_otp("otp-1", "999999"))
+
+
+def test_gsi_fallback_finds_and_backfills_a_legacy_user(db, resource):
+    legacy_id = run(db.create_user("legacy@example.com", "+15550002"))
+
+    user_id, created = run(db.start_login("legacy@example.com", None, "otp-1", "111111"))
+
+    assert (user_id, created) == (legacy_id, False)
+    # Only the identity used to log in is claimed; the phone waits for its own login or a backfill.
+    assert identity_owner(resource, "EMAIL#legacy@example.com") == legacy_id
+    assert identity_owner(resource, "PHONE#+15550002") is None
+    assert run(db.get_user_id_by_identity("legacy@example.com", None)) == legacy_id
+
+
+def test_without_gsi_fallback_a_legacy_user_is_not_found(db, monkeypatch):
+    monkeypatch.setattr(database, "IDENTITY_GSI_FALLBACK", False)
+    legacy_id = run(db.create_user("legacy@example.com", None))
+
+    user_id, created = run(db.start_login("legacy@example.com", None, "otp-1", "111111"))
+
+    assert created and user_id != legacy_id
+
+
+def test_backfill_writes_missing_identities_once(db, resource, monkeypatch):
+    first = run(db.create_user("a@example.com", "+15550003"))
+    second = run(db.create_user(None, "+15550004"))
+
+    assert run(db.backfill_identities()) == 3
+    assert run(db.backfill_identities()) == 0
+
+    monkeypatch.setattr(database, "IDENTITY_GSI_FALLBACK", False)
+    assert run(db.start_login(None, "+15550003", "otp-1", "111111")) == (first, False)
+    assert run(db.start_login(None, "+15550004", "otp-2", "222222")) == (second, False)
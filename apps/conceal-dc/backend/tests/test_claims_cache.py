@@ -0,0 +1,113 @@
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from auth import token_utils
+from auth.config import ALGORITHM, CLAIMS_CACHE_SIZE, SECRET_KEY
+from auth.token_utils import ClaimsCache, generate_tokens, verify_token_cached
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_utils.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ClaimsCache()
+    monkeypatch.setattr(token_utils, "claims_cache", cache)
+    return cache
+
+
+def test_entry_is_served_until_exp_and_missed_from_exp_on(clock):
+    cache = ClaimsCache()
+    cache.put("token", "access", {"user_id": "u1", "exp": 1_000_010})
+
+    clock[0] = 1_000_009.999
+    assert cache.get("token", "access") == {"user_id": "u1", "exp": 1_000_010}
+
+    clock[0] = 1_000_010
+    assert cache.get("token", "access") is None
+    assert cache.stats["expired"] == 1
+    assert not cache.entries
+
+
+def test_payload_without_exp_is_not_cached():
+    cache = ClaimsCache()
+    cache.put("token", "access", {"user_id": "u1"})
+
+    assert cache.get("token", "access") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ClaimsCache(max_entries=2)
+    exp = time.time() + 60
+    cache.put("a", "access", {"exp": exp})
+    cache.put("b", "access", {"exp": exp})
+    cache.get("a", "access")
+
+    cache.put("c", "access", {"exp": exp})
+
+    assert cache.get("b", "access") is None
+    assert cache.get("a", "access") is not None
+    assert cache.get("c", "access") is not None
+    assert cache.stats["evicted"] == 1
+
+
+def test_default_size_is_claims_cache_size():
+    cache = ClaimsCache()
+    exp = time.time() + 60
+    for index in range(CLAIMS_CACHE_SIZE + 1):
+        cache.put(f"token-{index}", "access", {"exp": exp})
+
+    assert len(cache.entries) == CLAIMS_CACHE_SIZE
+    assert cache.get("token-0", "access") is None
+    assert cache.get(f"token-{CLAIMS_CACHE_SIZE}", "access") is not None
+
+
+def test_cached_payload_is_a_copy():
+    cache = ClaimsCache()
+    cache.put("token", "access", {"user_id": "u1", "exp": time.time() + 60})
+
+    cache.get("token", "access")["user_id"] = "someone else"
+
+    assert cache.get("token", "access")["user_id"] == "u1"
+
+
+def test_access_and_refresh_entries_are_kept_apart(cache):
+    access_token, refresh_token = generate_tokens("u1", "otp-1")
+
+    assert verify_token_cached(access_token, "access")["type"] == "access"
+    assert cache.get(access_token, "refresh") is None
+    with pytest.raises(HTTPException, match="Expected refresh"):
+        verify_token_cached(access_token, "refresh")
+
+    assert verify_token_cached(refresh_token, "refresh")["type"] == "refresh"
+    with pytest.raises(HTTPException, match="Expected access"):
+        verify_token_cached(refresh_token, "access")
+
+
+def test_repeat_verification_is_served_from_the_cache(cache):
+    access_token, _ = generate_tokens("u1", "otp-1")
+
+    first = verify_token_cached(access_token)
+    second = verify_token_cached(access_token)
+
+    assert first == second
+    assert cache.stats["hits"] == 1
+
+
+def test_expired_token_falls_through_to_the_expiry_error(cache):
+    exp = int(time.time()) - 1
+    claims = {"user_id": "u1", "exp": exp, "type": "access"}
+    token = jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+    # As if it had been verified and cached while it was still valid
+    cache.put(token, "access", claims)
+
+    with pytest.raises(HTTPException) as error:
+        verify_token_cached(token)
+    assert error.value.detail == "Token has expired"
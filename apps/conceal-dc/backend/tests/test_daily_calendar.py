@@ -0,0 +1,97 @@
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from daily_calendar import DailyCalendar
+
+
+def daily(day, status):
+    return {"year_month": "A", "date_time": day, "status": status}
+
+
+def expected_payload(items, today, horizon_days):
+    """The calendar's rules applied one day at a time."""
+    first = today.isoformat()
+    reported = {item["date_time"]: item["status"] for item in items if item["date_time"] >= first}
+    last = max(
+        [today + timedelta(days=horizon_days - 1)] + [date.fromisoformat(day) for day in reported]
+    )
+    payload = {"open": [], "booked": [], "unavailable": []}
+    day = today
+    while day <= last:
+        key = day.isoformat()
+        if day.weekday() < 5 and (day != today or key in reported):
+            bucket = {"1": "open", "0": "booked"}.get(reported.get(key), "unavailable")
+            payload[bucket].append(key)
+        day += timedelta(days=1)
+    return payload
+
+
+@pytest.mark.parametrize("today", [
+    date(2026, 12, 28),  # Monday; the span crosses into 2027
+    date(2026, 12, 31),  # Thursday, last day of the year
+    date(2028, 2, 28),   # Monday before a leap day
+    date(2026, 10, 30),  # Friday before a month boundary on a weekend
+])
+def test_calendar_across_month_and_year_boundaries(today):
+    days = [today + timedelta(days=offset) for offset in range(-3, 20)]
+    items = [daily(day.isoformat(), "1" if day.day % 3 else "0") for day in days if day.day % 4]
+
+    calendar = DailyCalendar.build(items, today, horizon_days=14)
+
+    assert json.loads(calendar.body) == expected_payload(items, today, 14)
+
+
+def test_year_boundary_in_detail():
+    today = date(2026, 12, 30)  # Wednesday
+    items = [daily("2026-12-31", "1"), daily("2027-01-01", "0"), daily("2027-01-04", "1")]
+
+    calendar = DailyCalendar.build(items, today, horizon_days=7)
+
+    # Dec 30 is today and unreported; Jan 2-3 are a weekend; Jan 5 was never reported.
+    assert json.loads(calendar.body) == {
+        "open": ["2026-12-31", "2027-01-04"],
+        "booked": ["2027-01-01"],
+        "unavailable": ["2027-01-05"],
+    }
+
+
+def test_reported_dates_past_the_horizon_extend_the_span():
+    today = date(2026, 12, 28)
+    items = [daily("2027-02-01", "1")]
+
+    calendar = DailyCalendar.build(items, today, horizon_days=7)
+
+    assert len(calendar.statuses) == (date(2027, 2, 1) - today).days + 1
+    assert json.loads(calendar.body)["open"] == ["2027-02-01"]
+
+
+def test_past_dates_and_unknown_statuses():
+    today = date(2026, 11, 2)  # Monday
+    items = [
+        daily("2026-10-30", "1"),
+        daily("2026-11-02", "1"),
+        daily("2026-11-03", "maybe"),
+        {"status": "1"},
+    ]
+
+    payload = json.loads(DailyCalendar.build(items, today, horizon_days=3).body)
+
+    assert payload == {
+        "open": ["2026-11-02"],
+        "booked": [],
+        "unavailable": ["2026-11-03", "2026-11-04"],
+    }
+
+
+def test_etag_follows_the_payload():
+    today = date(2026, 12, 28)
+    items = [daily("2026-12-29", "1")]
+
+    first = DailyCalendar.build(items, today, horizon_days=7, version=1)
+    same = DailyCalendar.build(items, today, horizon_days=7, version=2)
+    changed = DailyCalendar.build([daily("2026-12-29", "0")], today, horizon_days=7, version=3)
+
+    assert first.etag == same.etag
+    assert first.etag != changed.etag
@@ -0,0 +1,156 @@
+import datetime
+import random
+
+import pytest
+
+from notification_matcher import WEEKDAY_CODES, NotificationMatcher
+
+FIRST_DAY = datetime.date(2026, 10, 26)
+HORIZON_DAYS = 60
+
+
+def rule(notification_id, days, start_date, end_date, start_time, end_time, user_id="user"):
+    return {
+        "notification_id": notification_id,
+        "user_id": user_id,
+        "days": days,
+        "start_date": start_date,
+        "end_date": end_date,
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+
+
+def slot(date, slot_time):
+    return {"date_time": f"{date}_{slot_time}", "date": date, "time": slot_time, "status": "Open"}
+
+
+def covers(rule, slot):
+    """The rule semantics, checked the slow way."""
+    day = datetime.date.fromisoformat(slot["date"])
+    in_horizon = FIRST_DAY <= day < FIRST_DAY + datetime.timedelta(days=HORIZON_DAYS)
+    return (
+        in_horizon
+        and rule["start_date"] <= slot["date"] <= rule["end_date"]
+        and WEEKDAY_CODES[day.weekday()] in rule["days"]
+        and rule["start_time"] <= slot["time"] < rule["end_time"]
+    )
+
+
+def matches(matcher, slots):
+    return {
+        (matched["notification_id"], s["date_time"])
+        for matched, matched_slots in matcher.match(slots)
+        for s in matched_slots
+    }
+
+
+def random_time(rnd, step, stop=24 * 60 + 1):
+    minute = rnd.randrange(0, stop, step)
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def random_rule(rnd, notification_id):
+    first = FIRST_DAY + datetime.timedelta(days=rnd.randint(-20, HORIZON_DAYS + 10))
+    last = first + datetime.timedelta(days=rnd.randint(-3, 40))
+    start_time, end_time = sorted((random_time(rnd, 15), random_time(rnd, 15)))
+    return rule(
+        notification_id,
+        rnd.sample(WEEKDAY_CODES, rnd.randint(1, 7)),
+        first.isoformat(),
+        last.isoformat(),
+        start_time,
+        end_time,
+    )
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_index_agrees_with_brute_force_over_random_rules(seed):
+    rnd = random.Random(seed)
+    rules = [random_rule(rnd, f"n{index}") for index in range(rnd.randint(1, 300))]
+    slots = []
+    for _ in range(400):
+        day = FIRST_DAY + datetime.timedelta(days=rnd.randint(-5, HORIZON_DAYS + 5))
+        # 5-minute steps land exactly on the 15-minute rule bounds often enough to test both edges.
+        slots.append(slot(day.isoformat(), random_time(rnd, 5, stop=24 * 60)))
+
+    matcher = NotificationMatcher(rules, first_day=FIRST_DAY, horizon_days=HORIZON_DAYS)
+
+    expected = {
+        (r["notification_id"], s["date_time"]) for r in rules for s in slots if covers(r, s)
+    }
+    assert matches(matcher, slots) == expected
+
+
+def test_weekday_filter():
+    matcher = NotificationMatcher(
+        [rule("weekends", ["SAT", "SUN"], "2026-10-26", "2026-11-30", "08:00", "12:00")],
+        first_day=FIRST_DAY,
+        horizon_days=HORIZON_DAYS,
+    )
+    saturday, sunday = slot("2026-10-31", "09:00"), slot("2026-11-01", "09:00")
+    monday = slot("2026-11-02", "09:00")
+
+    assert matches(matcher, [saturday, sunday, monday]) == {
+        ("weekends", saturday["date_time"]),
+        ("weekends", sunday["date_time"]),
+    }
+
+
+def test_start_and_end_dates_are_inclusive():
+    matcher = NotificationMatcher(
+        [rule("november", list(WEEKDAY_CODES), "2026-11-02", "2026-11-06", "08:00", "12:00")],
+        first_day=FIRST_DAY,
+        horizon_days=HORIZON_DAYS,
+    )
+    dates = ["2026-11-01", "2026-11-02", "2026-11-06", "2026-11-07"]
+
+    matched = matches(matcher, [slot(date, "09:00") for date in dates])
+    assert matched == {("november", "2026-11-02_09:00"), ("november", "2026-11-06_09:00")}
+
+
+def test_time_window_includes_start_and_excludes_end():
+    matcher = NotificationMatcher(
+        [
+            rule("morning", list(WEEKDAY_CODES), "2026-10-26", "2026-12-31", "08:00", "10:00"),
+            rule("late", list(WEEKDAY_CODES), "2026-10-26", "2026-12-31", "10:00", "24:00"),
+        ],
+        first_day=FIRST_DAY,
+        horizon_days=HORIZON_DAYS,
+    )
+    times = ["07:59", "08:00", "09:59", "10:00", "23:59"]
+
+    matched = matches(matcher, [slot("2026-11-02", value) for value in times])
+    assert matched == {
+        ("morning", "2026-11-02_08:00"),
+        ("morning", "2026-11-02_09:59"),
+        ("late", "2026-11-02_10:00"),
+        ("late", "2026-11-02_23:59"),
+    }
+
+
+def test_slots_outside_the_horizon_never_match():
+    matcher = NotificationMatcher(
+        [rule("always", list(WEEKDAY_CODES), "2020-01-01", "2030-12-31", "00:00", "24:00")],
+        first_day=FIRST_DAY,
+        horizon_days=7,
+    )
+    dates = ["2026-10-25", "2026-10-26", "2026-11-01", "2026-11-02"]
+
+    matched = matches(matcher, [slot(date, "09:00") for date in dates])
+    assert matched == {("always", "2026-10-26_09:00"), ("always", "2026-11-01_09:00")}
+
+
+def test_malformed_and_empty_rules_are_skipped():
+    rules = [
+        rule("bad-day", ["MONDAY"], "2026-10-26", "2026-12-31", "08:00", "10:00"),
+        rule("bad-date", ["MON"], "2026-13-01", "2026-12-31", "08:00", "10:00"),
+        rule("no-days", [], "2026-10-26", "2026-12-31", "08:00", "10:00"),
+        rule("empty-window", ["MON"], "2026-10-26", "2026-12-31", "10:00", "10:00"),
+        rule("past", ["MON"], "2026-01-01", "2026-02-01", "08:00", "10:00"),
+        rule("good", ["MON"], "2026-10-26", "2026-12-31", "08:00", "10:00"),
+    ]
+    matcher = NotificationMatcher(rules, first_day=FIRST_DAY, horizon_days=HORIZON_DAYS)
+
+    assert len(matcher) == 1
+    assert matches(matcher, [slot("2026-11-02", "09:00")]) == {("good", "2026-11-02_09:00")}
@@ -0,0 +1,166 @@
+import threading
+import time
+
+import pytest
+
+from auth.notifications import NotificationService, TokenBucket, format_opening_alert
+
+
+class StubSNS:
+    """Records publishes; the first `failures` calls raise."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.calls = 0
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def publish(self, PhoneNumber, Message):
+        with self.lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise RuntimeError("throttled")
+            self.sent.append((time.monotonic(), PhoneNumber, Message))
+
+
+class StubSES:
+    def __init__(self):
+        self.sent = []
+        self.bulk = []
+
+    def send_email(self, Source, Destination, Message):
+        self.sent.append((Destination["ToAddresses"][0], Message["Body"]["Text"]["Data"]))
+
+    def send_bulk_templated_email(self, Source, Template, DefaultTemplateData, Destinations):
+        self.bulk.append(Destinations)
+        return {"Status": [{"Status": "Success"} for _ in Destinations]}
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out waiting for deliveries")
+        time.sleep(0.01)
+
+
+def slot(date: str, slot_time: str) -> dict:
+    return {"date_time": f"{date}_{slot_time}", "date": date, "time": slot_time, "status": "Open"}
+
+
+@pytest.fixture
+def service_factory():
+    services = []
+
+    def build(**kwargs):
+        kwargs.setdefault("retry_base_seconds", 0.01)
+        service = NotificationService(**kwargs)
+        services.append(service)
+        return service
+
+    yield build
+    for service in services:
+        service.stop(timeout=1)
+
+
+def test_token_bucket_spaces_requests_at_the_rate():
+    bucket = TokenBucket(rate=20, capacity=5)
+    started = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # Five go out of the full bucket; the other ten wait for refills at 20/s.
+    assert time.monotonic() - started >= 10 / 20 * 0.9
+
+
+def test_deliveries_are_rate_limited_per_channel(service_factory):
+    sns = StubSNS()
+    service = service_factory(sns_client=sns, sns_rate=20)
+    service.start()
+    for index in range(30):
+        service.enqueue_otp_via_sns(f"+1555000{index:04d}", "123456")
+
+    wait_until(lambda: len(sns.sent) == 30)
+    # 20 burst out of the full bucket, the last 10 need half a second of refill.
+    assert sns.sent[-1][0] - sns.sent[0][0] >= 0.45
+    assert service.stats["sent"] == 30
+
+
+def test_failed_delivery_is_retried_with_backoff(service_factory):
+    sns = StubSNS(failures=2)
+    service = service_factory(sns_client=sns)
+    service.start()
+    service.enqueue_alert_via_sns("+15550001", format_opening_alert([slot("2026-11-02", "07:00")]))
+
+    wait_until(lambda: len(sns.sent) == 1)
+    assert sns.calls == 3
+    assert service.stats["retried"] == 2
+    assert service.stats["sent"] == 1
+
+
+def test_delivery_gives_up_after_max_attempts(service_factory):
+    sns = StubSNS(failures=10)
+    service = service_factory(sns_client=sns, max_attempts=3)
+    service.start()
+    service.enqueue_otp_via_sns("+15550001", "123456")
+
+    wait_until(lambda: service.stats["failed"] == 1)
+    assert sns.calls == 3
+    assert not sns.sent
+    assert not service.latest
+
+
+def test_pending_otp_is_replaced_by_the_newest_code(service_factory):
+    sns = StubSNS()
+    service = service_factory(sns_client=sns)
+    service.enqueue_otp_via_sns("+15550001", "111111")
+    service.enqueue_otp_via_sns("+15550001", "222222")
+    service.start()
+
+    wait_until(lambda: len(sns.sent) == 1)
+    time.sleep(0.05)
+    assert [message for _, _, message in sns.sent] == ["Your verification code is: 222222"]
+    assert service.stats["deduplicated"] == 1
+
+
+def test_pending_alerts_for_one_recipient_are_merged(service_factory):
+    ses = StubSES()
+    service = service_factory(ses_client=ses)
+    first = [slot("2026-11-02", "07:00")]
+    second = [slot("2026-11-09", "08:15"), slot("2026-11-02", "07:00")]
+    service.enqueue_alert_via_ses("user@example.com", format_opening_alert(first), first)
+    service.enqueue_alert_via_ses("user@example.com", format_opening_alert(second), second)
+    service.start()
+
+    wait_until(lambda: len(ses.sent) == 1)
+    time.sleep(0.05)
+    assert len(ses.sent) == 1
+    body = ses.sent[0][1]
+    assert "2026-11-02 at 07:00" in body and "2026-11-09 at 08:15" in body
+    assert body.count("2026-11-02 at 07:00") == 1
+    assert service.stats["merged"] == 1
+
+
+def test_alert_waiting_for_retry_is_not_dropped_by_a_newer_alert(service_factory):
+    sns = StubSNS(failures=1)
+    service = service_factory(sns_client=sns, retry_base_seconds=0.2)
+    service.start()
+    first = [slot("2026-11-02", "07:00")]
+    service.enqueue_alert_via_sns("+15550001", format_opening_alert(first), first)
+    wait_until(lambda: service.stats["retried"] == 1)
+    second = [slot("2026-11-09", "08:15")]
+    service.enqueue_alert_via_sns("+15550001", format_opening_alert(second), second)
+
+    wait_until(lambda: "2026-11-02 at 07:00" in " ".join(message for _, _, message in sns.sent))
+    delivered = " ".join(message for _, _, message in sns.sent)
+    assert "2026-11-09 at 08:15" in delivered
+
+
+def test_queued_otp_emails_go_out_in_bulk(service_factory):
+    ses = StubSES()
+    service = service_factory(ses_client=ses, ses_otp_template="otp")
+    for index in range(3):
+        service.enqueue_otp_via_ses(f"user{index}@example.com", f"00000{index}")
+    service.start()
+
+    wait_until(lambda: service.stats["sent"] == 3)
+    assert len(ses.bulk) == 1 and len(ses.bulk[0]) == 3
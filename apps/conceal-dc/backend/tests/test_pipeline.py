@@ -0,0 +1,183 @@
+import threading
+import time
+
+import pytest
+
+from cycle_report import CycleTimings
+from pipeline import BatchWriter, Stage
+
+
+class FakeDynamoDB:
+    """
+    Records batch_write_item calls. `unprocessed` lists how many items each call
+    hands back as UnprocessedItems; `fail_on` makes that call raise.
+    """
+
+    def __init__(self, unprocessed=(), fail_on=None):
+        self.unprocessed = list(unprocessed)
+        self.fail_on = fail_on
+        self.calls = []
+        self.stored = []
+
+    def batch_write_item(self, RequestItems):
+        (table_name, requests), = RequestItems.items()
+        self.calls.append(len(requests))
+        if len(self.calls) == self.fail_on:
+            raise RuntimeError("ProvisionedThroughputExceededException")
+        left = self.unprocessed.pop(0) if self.unprocessed else 0
+        processed, unprocessed = requests[:len(requests) - left], requests[len(requests) - left:]
+        self.stored.extend(request['PutRequest']['Item'] for request in processed)
+        return {'UnprocessedItems': {table_name: unprocessed} if unprocessed else {}}
+
+
+def items(prefix, count):
+    return [{'date_time': f"{prefix}-{index}"} for index in range(count)]
+
+
+def test_batch_writer_sends_full_batches_and_holds_the_rest():
+    ddb = FakeDynamoDB()
+    writer = BatchWriter(ddb, "Appointments")
+
+    assert writer.add(items("a", 10), "a") == []
+    assert writer.add(items("b", 20), "b") == ["a"]
+    assert ddb.calls == [25]
+    assert len(writer.pending) == 5
+
+    assert writer.flush() == ["b"]
+    assert ddb.calls == [25, 5]
+    assert writer.stats == {"batches": 2, "items": 30, "full_batches": 1}
+
+
+def test_batch_writer_completes_tokens_in_order_once_their_last_item_is_written():
+    ddb = FakeDynamoDB()
+    writer = BatchWriter(ddb, "Appointments", batch_size=4)
+
+    assert writer.add(items("a", 1), "a") == []
+    assert writer.add(items("b", 2), "b") == []
+    # Token "c" spans two batches: done only after the second one.
+    assert writer.add(items("c", 6), "c") == ["a", "b"]
+    assert writer.flush() == ["c"]
+    assert [item['date_time'] for item in ddb.stored][:3] == ["a-0", "b-0", "b-1"]
+
+
+def test_batch_writer_completes_tokens_without_items():
+    writer = BatchWriter(FakeDynamoDB(), "Appointments")
+
+    assert writer.add([], "empty") == ["empty"]
+    assert writer.add(items("a", 3), "a") == []
+    assert writer.add([], "after") == []
+    assert writer.flush() == ["a", "after"]
+
+
+def test_batch_writer_retries_unprocessed_items():
+    ddb = FakeDynamoDB(unprocessed=[10, 3])
+    writer = BatchWriter(ddb, "Appointments")
+
+    assert writer.add(items("a", 25), "a") == ["a"]
+    assert ddb.calls == [25, 10, 3]
+    assert len(ddb.stored) == 25
+    assert writer.stats["batches"] == 1
+
+
+def test_batch_writer_raises_when_items_stay_unprocessed():
+    ddb = FakeDynamoDB(unprocessed=[5] * 3)
+    writer = BatchWriter(ddb, "Appointments", max_attempts=3)
+
+    with pytest.raises(Exception, match="5 items unprocessed"):
+        writer.add(items("a", 25), "a")
+    assert writer.written == 0
+
+
+def test_abandon_returns_unwritten_tokens_and_resets_positions():
+    ddb = FakeDynamoDB(fail_on=2)
+    writer = BatchWriter(ddb, "Appointments", batch_size=4)
+
+    assert writer.add(items("a", 4), "a") == ["a"]
+    with pytest.raises(RuntimeError):
+        writer.add(items("b", 5), "b")
+    assert writer.abandon() == ["b"]
+    assert writer.pending == [] and writer.queued == writer.written == 4
+
+    # Positions pick up after the abandoned items, so later tokens complete normally.
+    assert writer.add(items("c", 4), "c") == ["c"]
+    assert writer.flush() == []
+
+
+def test_batch_writer_times_only_calls_that_write():
+    timings = CycleTimings()
+    writer = BatchWriter(FakeDynamoDB(unprocessed=[5]), "Appointments", timings=timings)
+
+    for token in range(4):
+        writer.add(items(token, 10), token)
+    writer.flush()
+    writer.flush()
+
+    # 40 items: one full batch (retried once, still one sample) and one partial batch.
+    assert timings.snapshot()["batch_write"]["count"] == 2
+
+
+def test_stage_passes_jobs_downstream_and_drops_none():
+    results = []
+    sink = Stage("sink", results.append)
+    double = Stage("double", lambda job: job * 2 if job % 3 else None, workers=3, downstream=sink)
+    sink.start()
+    double.start()
+
+    for job in range(1, 10):
+        double.put(job)
+    double.close()
+
+    assert sorted(results) == [2, 4, 8, 10, 14, 16]
+    assert not sink.threads
+
+
+def test_stage_survives_handler_errors():
+    results = []
+
+    def handler(job):
+        if job == 2:
+            raise ValueError("bad page")
+        results.append(job)
+
+    stage = Stage("flaky", handler).start()
+    for job in range(4):
+        stage.put(job)
+    stage.close()
+
+    assert results == [0, 1, 3]
+
+
+def test_stage_calls_on_idle_when_drained_and_before_stopping():
+    calls = []
+    release = threading.Event()
+    stage = Stage(
+        "idle", lambda job: release.wait(), on_idle=lambda: calls.append(time.monotonic())
+    )
+    stage.start()
+
+    stage.put(1)
+    stage.put(2)
+    release.set()
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    drained = len(calls)
+    stage.close()
+
+    assert drained >= 1
+    assert len(calls) == drained + 1
+
+
+def test_full_downstream_inbox_blocks_upstream_workers():
+    release = threading.Event()
+    sink = Stage("slow", lambda job: release.wait(), queue_size=1).start()
+    source = Stage("fast", lambda job: job, downstream=sink, queue_size=10).start()
+
+    for job in range(5):
+        source.put(job)
+    time.sleep(0.1)
+    # One job is held by the sink's worker, one fills its inbox; the source waits on the third.
+    assert source.inbox.qsize() == 2
+
+    release.set()
+    source.close()
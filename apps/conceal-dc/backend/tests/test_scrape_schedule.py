@@ -0,0 +1,137 @@
+from scrape_schedule import ScrapeScheduler
+
+WEEKS = [f"week-{index:02d}" for index in range(20)]
+NOW = 1_800_000_000
+
+
+def scrape_cycle(scheduler, weeks=WEEKS, changed=(), failed=(), stored=None):
+    """Run one cycle: scrape whatever is due and record each result."""
+    due = scheduler.due(weeks)
+    for week_start in due:
+        scheduler.record(
+            week_start,
+            weeks.index(week_start),
+            ok=week_start not in failed,
+            changes=int(week_start in changed),
+            stored_slots=(stored or {}).get(week_start),
+            now=NOW,
+        )
+    return due
+
+
+def cycles_when_due(scheduler, week_start, cycles):
+    """The cycle numbers, out of the next `cycles`, in which `week_start` is scraped."""
+    scraped = []
+    for _ in range(cycles):
+        if week_start in scrape_cycle(scheduler):
+            scraped.append(scheduler.cycle)
+    return scraped
+
+
+def test_first_cycle_scrapes_every_week_in_order():
+    scheduler = ScrapeScheduler()
+
+    assert scheduler.due(WEEKS) == WEEKS
+
+
+def test_hot_weeks_are_scraped_every_cycle():
+    scheduler = ScrapeScheduler(hot_weeks=4)
+
+    for _ in range(10):
+        assert scrape_cycle(scheduler)[:4] == WEEKS[:4]
+
+
+def test_unchanged_week_interval_doubles_up_to_its_distance_cap():
+    scheduler = ScrapeScheduler(hot_weeks=4, max_interval=16)
+    scrape_cycle(scheduler)
+
+    # Week 12 is capped at 2 ** (12 // 4) = 8 cycles.
+    assert cycles_when_due(scheduler, "week-12", 40) == [3, 7, 15, 23, 31, 39]
+    assert scheduler.weeks["week-12"].interval == 8
+
+
+def test_distance_caps_and_max_interval():
+    scheduler = ScrapeScheduler(hot_weeks=4, max_interval=4)
+    for _ in range(60):
+        scrape_cycle(scheduler)
+
+    intervals = [scheduler.weeks[week].interval for week in WEEKS]
+    assert intervals[:4] == [1] * 4
+    assert intervals[4:8] == [2] * 4
+    assert intervals[8:] == [4] * 12
+
+
+def test_change_resets_the_interval():
+    scheduler = ScrapeScheduler(hot_weeks=4)
+    for _ in range(20):
+        scrape_cycle(scheduler)
+    assert scheduler.weeks["week-12"].interval > 1
+
+    while "week-12" not in scrape_cycle(scheduler, changed={"week-12"}):
+        pass
+
+    assert scheduler.weeks["week-12"].interval == 1
+    assert "week-12" in scrape_cycle(scheduler)
+
+
+def test_failed_scrape_is_due_next_cycle():
+    scheduler = ScrapeScheduler(hot_weeks=4)
+    for _ in range(20):
+        scrape_cycle(scheduler)
+
+    while "week-10" not in scrape_cycle(scheduler, failed={"week-10"}):
+        pass
+
+    assert "week-10" in scheduler.due(WEEKS)
+
+
+def test_recent_history_caps_the_interval_at_twice_the_change_rate():
+    scheduler = ScrapeScheduler(
+        hot_weeks=4, max_interval=16, cycle_seconds=60, history_window=24 * 3600
+    )
+    # 360 changes a day in 60-second cycles is one every 4 cycles, so poll every 2.
+    churning = [{"history": [{"timestamp": NOW - 7 * 86400}] + [{"timestamp": NOW - 60}] * 360}]
+    # The first entry is when a slot appeared, and entries past the window don't count.
+    quiet = [{"history": [{"timestamp": NOW - 60}] + [{"timestamp": NOW - 2 * 86400}] * 360}]
+    stored = {"week-16": churning, "week-17": quiet}
+
+    for _ in range(40):
+        scrape_cycle(scheduler, stored=stored)
+
+    assert scheduler.weeks["week-16"].recent_changes == 360
+    assert scheduler.weeks["week-16"].interval == 2
+    assert scheduler.weeks["week-17"].recent_changes == 0
+    assert scheduler.weeks["week-17"].interval == 16
+
+
+def test_churn_is_kept_when_the_week_was_not_read():
+    scheduler = ScrapeScheduler(hot_weeks=4)
+    churning = [{"history": [{"timestamp": NOW}] + [{"timestamp": NOW - 60}] * 360}]
+    scheduler.due(WEEKS)
+    scheduler.record("week-16", 16, ok=True, stored_slots=churning, now=NOW)
+
+    scheduler.record("week-16", 16, ok=True, now=NOW)
+
+    assert scheduler.weeks["week-16"].recent_changes == 360
+
+
+def test_weeks_leaving_the_horizon_are_forgotten_and_new_ones_are_due():
+    scheduler = ScrapeScheduler(hot_weeks=4)
+    for _ in range(20):
+        scrape_cycle(scheduler)
+
+    shifted = WEEKS[1:] + ["week-20"]
+    due = scheduler.due(shifted)
+
+    assert "week-00" not in scheduler.weeks
+    assert due[:4] == shifted[:4]
+    assert due[-1] == "week-20"
+    assert due == [week for week in shifted if week in due]
+
+
+def test_summary():
+    scheduler = ScrapeScheduler(hot_weeks=4, max_interval=4)
+    for _ in range(30):
+        scrape_cycle(scheduler)
+
+    assert scheduler.summary() == {"weeks": 20, "every_cycle": 4, "max_interval": 4}
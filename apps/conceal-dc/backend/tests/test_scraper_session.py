@@ -0,0 +1,155 @@
+import threading
+import time
+
+import pytest
+
+import scraper_session
+from scraper_session import (
+    HANDSHAKE_COOLDOWN_SECONDS,
+    SessionExpired,
+    SessionManager,
+    session_expired,
+)
+
+BOOKING_URL = "https://booking.example.com/Booking/Booking/Calendar"
+TIMETABLE_PAGE = '<div class="timetable"><div data-function="timeTableCell"></div></div>'
+START_PAGE = '<form><button id="StartNextButton">Make an appointment</button></form>'
+
+
+class Response:
+    def __init__(self, status_code, text="", url=BOOKING_URL):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+
+@pytest.mark.parametrize("response, expired", [
+    (Response(200, TIMETABLE_PAGE), False),
+    (Response(400, "Bad Request"), False),
+    (Response(400, START_PAGE), True),
+    (Response(401), True),
+    (Response(403), True),
+    (Response(419), True),
+    (Response(440), True),
+    (Response(404, "Not Found"), False),
+    (Response(500, "Server Error"), False),
+    (Response(503, ""), False),
+    (Response(200, START_PAGE, url="https://booking.example.com/Booking/Booking/Index/295"), True),
+    (Response(200, "", url="https://booking.example.com/Booking/Booking/Index/295"), True),
+    (Response(200, START_PAGE), True),
+    (Response(200, TIMETABLE_PAGE + START_PAGE), False),
+    (Response(200, "<html>Something went wrong</html>"), False),
+    (Response(200, START_PAGE, url=None), True),
+], ids=[
+    "timetable", "bad-request", "bad-request-start-page", "401", "403", "419", "440", "404", "500",
+    "503", "index-redirect", "index-redirect-empty", "start-page", "timetable-with-button",
+    "error-page", "no-url",
+])
+def test_session_expired(response, expired):
+    assert session_expired(response) is expired
+
+
+class Handshakes:
+    """Counts handshakes; the first `failures` calls raise."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        time.sleep(self.delay)
+        if call <= self.failures:
+            raise RuntimeError("booking site unavailable")
+        return f"token-{call}", f"cookie-{call}", object()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(scraper_session.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_start_handshakes_every_session_and_leases_round_robin():
+    handshakes = Handshakes()
+    manager = SessionManager(handshakes, pool_size=3)
+    manager.start()
+
+    leased = [manager.lease().token for _ in range(6)]
+
+    assert handshakes.calls == 3
+    assert leased == ["token-1", "token-2", "token-3"] * 2
+
+
+def test_refresh_replaces_a_stale_session_once():
+    handshakes = Handshakes()
+    manager = SessionManager(handshakes)
+    manager.start()
+    stale = manager.lease()
+
+    fresh = manager.refresh(stale)
+    again = manager.refresh(stale)
+
+    assert fresh.token == "token-2"
+    assert again is fresh
+    assert handshakes.calls == 2
+    assert manager.stats["refreshes"] == 1
+
+
+def test_concurrent_refreshes_share_one_handshake():
+    handshakes = Handshakes(delay=0.05)
+    manager = SessionManager(handshakes)
+    manager.start()
+    stale = manager.lease()
+    results = []
+
+    def refresh():
+        results.append(manager.refresh(stale))
+
+    threads = [threading.Thread(target=refresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert handshakes.calls == 2
+    assert len({id(session) for session in results}) == 1
+
+
+def test_failed_handshake_is_not_retried_during_the_cooldown(clock):
+    handshakes = Handshakes()
+    manager = SessionManager(handshakes)
+    manager.start()
+    stale = manager.lease()
+    handshakes.failures = handshakes.calls + 1
+
+    with pytest.raises(RuntimeError):
+        manager.refresh(stale)
+    clock[0] += HANDSHAKE_COOLDOWN_SECONDS - 0.1
+    with pytest.raises(SessionExpired):
+        manager.refresh(stale)
+    assert handshakes.calls == 2
+    assert manager.stats["failed_handshakes"] == 1
+
+    clock[0] += 0.1
+    fresh = manager.refresh(stale)
+    assert fresh is not stale
+    assert handshakes.calls == 3
+
+
+def test_cooldown_is_per_session(clock):
+    handshakes = Handshakes()
+    manager = SessionManager(handshakes, pool_size=2)
+    manager.start()
+    first, second = manager.lease(), manager.lease()
+    handshakes.failures = handshakes.calls + 1
+
+    with pytest.raises(RuntimeError):
+        manager.refresh(first)
+
+    assert manager.refresh(second) is not second
@@ -0,0 +1,33 @@
+from slot_mirror import SlotMirror
+
+
+class FakeTable:
+    """Answers year_month queries from a dict of partition -> items, one page each."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+
+    def query(self, KeyConditionExpression, **kwargs):
+        partition = KeyConditionExpression.get_expression()['values'][1]
+        return {'Items': list(self.partitions.get(partition, []))}
+
+
+def slot(year_month, date, slot_time="09:00", status="Open"):
+    return {'year_month': year_month, 'date_time': f"{date}_{slot_time}", 'status': status}
+
+
+def test_prune_goes_by_stored_partition_not_slot_date():
+    # The week of Monday 2026-09-28 is stored under 2026-09, including its October days.
+    mirror = SlotMirror(FakeTable({
+        '2026-09': [slot('2026-09', '2026-09-28'), slot('2026-09', '2026-10-02')],
+        '2026-10': [slot('2026-10', '2026-10-05')],
+    }))
+    mirror.ensure_loaded(['2026-09', '2026-10'])
+
+    mirror.prune(['2026-09'])
+    assert sorted(mirror.week('2026-09-28')) == ['2026-09-28_09:00', '2026-10-02_09:00']
+    assert mirror.week('2026-10-05') == {}
+
+    mirror.prune(['2026-10'])
+    assert len(mirror) == 0
+    assert mirror.months == set()
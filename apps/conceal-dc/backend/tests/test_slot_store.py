@@ -0,0 +1,219 @@
+import pytest
+
+from slot_store import STATUS_NAMES, Slot, SlotStore, encode_json
+
+
+def item(date_time, status="Open", last_changed="1761000000", history=None):
+    """An Appointments item in the shape the worker writes."""
+    if history is None:
+        history = [{"status": status, "timestamp": int(last_changed)}]
+    return {
+        "year_month": date_time[:7],
+        "date_time": date_time,
+        "global_pk": "updates",
+        "date": date_time[:10],
+        "time": date_time[11:],
+        "status": status,
+        "last_changed": last_changed,
+        "history": history,
+    }
+
+
+def store_of(*date_times, version=1):
+    return SlotStore.build([Slot.from_item(item(date_time)) for date_time in date_times], version)
+
+
+def test_build_sorts_slots_and_indexes_dates():
+    store = store_of("2026-11-03_09:00", "2026-11-02_10:00", "2026-11-02_08:00", "2026-12-01_08:00")
+
+    assert [slot.date_time for slot in store.slots] == [
+        "2026-11-02_08:00", "2026-11-02_10:00", "2026-11-03_09:00", "2026-12-01_08:00"
+    ]
+    assert store.dates == ["2026-11-02", "2026-11-03", "2026-12-01"]
+    assert list(store.offsets) == [0, 2, 3, 4]
+
+
+def test_between_is_inclusive_and_tolerates_missing_dates():
+    store = store_of("2026-11-02_08:00", "2026-11-03_09:00", "2026-11-05_09:00", "2026-11-07_09:00")
+
+    assert [slot.date_time for slot in store.between("2026-11-03", "2026-11-05")] == [
+        "2026-11-03_09:00", "2026-11-05_09:00"
+    ]
+    assert [slot.date_time for slot in store.between("2026-11-04", "2026-11-06")] == [
+        "2026-11-05_09:00"
+    ]
+    assert store.between("2026-11-08", "2026-11-30") == []
+    assert len(SlotStore.empty()) == 0
+
+
+def test_patch_upserts_changed_slots_and_reports_them():
+    store = store_of("2026-11-02_08:00", "2026-11-03_09:00")
+    booked = Slot.from_item(item("2026-11-02_08:00", status="Booked"))
+    added = Slot.from_item(item("2026-11-04_09:00"))
+    same = Slot.from_item(item("2026-11-03_09:00"))
+
+    patched, changed = store.patch([booked, added, same], 2, {"2026-11"})
+
+    assert changed == [booked, added]
+    assert patched.version == 2
+    assert [slot.to_dict()["status"] for slot in patched.slots] == ["Booked", "Open", "Open"]
+
+
+def test_patch_returns_self_when_nothing_changed():
+    store = store_of("2026-11-02_08:00", "2026-11-03_09:00")
+
+    patched, changed = store.patch([Slot.from_item(item("2026-11-02_08:00"))], 2, {"2026-11"})
+
+    assert patched is store
+    assert changed == []
+
+
+def test_patch_drops_months_outside_the_window():
+    store = store_of("2026-10-30_08:00", "2026-11-02_08:00")
+    december = Slot.from_item(item("2026-12-01_08:00"))
+
+    patched, changed = store.patch([december], 2, {"2026-11"})
+
+    # Nothing in the window changed, but October left it, so the store is rebuilt.
+    assert patched is not store
+    assert changed == []
+    assert [slot.date_time for slot in patched.slots] == ["2026-11-02_08:00"]
+
+
+def test_joined_fragments_equal_the_encoded_items():
+    items = [item(f"2026-11-{day:02d}_{hour:02d}:00") for day in (2, 3, 5) for hour in (8, 9, 10)]
+    items[4]["status"] = "Booked"
+    store = SlotStore.build([Slot.from_item(entry) for entry in reversed(items)], 1)
+
+    fragments, _ = store.encoded_between("2026-11-01", "2026-11-30")
+    assert b"[" + b",".join(fragments) + b"]" == encode_json(items)
+
+    fragments, _ = store.encoded_between("2026-11-03", "2026-11-04")
+    assert b"[" + b",".join(fragments) + b"]" == encode_json(items[3:6])
+
+
+def test_patch_reuses_fragments_and_digests_of_clean_dates_only():
+    store = store_of("2026-11-02_08:00", "2026-11-03_09:00", "2026-11-04_09:00")
+
+    booked = Slot.from_item(item("2026-11-03_09:00", status="Booked"))
+    patched, _ = store.patch([booked], 2, {"2026-11"})
+
+    assert patched.fragments[0] is store.fragments[0] and patched.digests[0] is store.digests[0]
+    assert patched.fragments[2] is store.fragments[2] and patched.digests[2] is store.digests[2]
+    assert patched.fragments[1] != store.fragments[1] and patched.digests[1] != store.digests[1]
+    assert b'"Booked"' in patched.fragments[1]
+
+
+def test_build_re_encodes_dirty_dates():
+    previous = store_of("2026-11-02_08:00")
+    booked = [Slot.from_item(item("2026-11-02_08:00", status="Booked"))]
+
+    # An unmarked date keeps its old encoding, which is why patch marks every changed date.
+    stale = SlotStore.build(booked, 2, previous=previous)
+    fresh = SlotStore.build(booked, 2, previous=previous, dirty_dates={"2026-11-02"})
+
+    assert stale.fragments[0] is previous.fragments[0]
+    assert fresh.fragments[0] == SlotStore.build(booked, 2).fragments[0]
+
+
+def test_etag_is_stable_for_unchanged_content():
+    date_times = ("2026-11-02_08:00", "2026-11-03_09:00", "2026-11-05_09:00")
+    first, second = store_of(*date_times, version=1), store_of(*date_times, version=7)
+
+    for start, end in [
+        ("2026-11-02", "2026-11-02"),
+        ("2026-11-02", "2026-11-05"),
+        ("2026-11-10", "2026-11-20"),
+    ]:
+        assert first.encoded_between(start, end)[1] == second.encoded_between(start, end)[1]
+
+
+def test_etag_changes_only_for_ranges_that_changed():
+    store = store_of("2026-11-02_08:00", "2026-11-03_09:00", "2026-11-05_09:00")
+    booked = Slot.from_item(item("2026-11-03_09:00", status="Booked"))
+    patched, _ = store.patch([booked], 2, {"2026-11"})
+
+    def etag(target, start, end):
+        return target.encoded_between(start, end)[1]
+
+    assert etag(patched, "2026-11-02", "2026-11-02") == etag(store, "2026-11-02", "2026-11-02")
+    assert etag(patched, "2026-11-05", "2026-11-30") == etag(store, "2026-11-05", "2026-11-30")
+    assert etag(patched, "2026-11-03", "2026-11-03") != etag(store, "2026-11-03", "2026-11-03")
+    assert etag(patched, "2026-11-01", "2026-11-30") != etag(store, "2026-11-01", "2026-11-30")
+    # Overlapping multi-date ranges still get their own ETags.
+    assert etag(store, "2026-11-02", "2026-11-03") != etag(store, "2026-11-03", "2026-11-05")
+
+
+def test_empty_ranges_share_one_etag():
+    store = store_of("2026-11-02_08:00")
+
+    fragments, etag = store.encoded_between("2026-12-01", "2026-12-31")
+    assert fragments == []
+    assert etag == store.encoded_between("2026-10-01", "2026-10-31")[1]
+    assert etag == SlotStore.empty().encoded_between("2026-11-01", "2026-11-30")[1]
+    assert etag != store.encoded_between("2026-11-02", "2026-11-02")[1]
+
+
+def test_worker_items_are_packed_and_round_trip():
+    history = [
+        {"status": "Booked", "timestamp": 1760000000},
+        {"status": "Open", "timestamp": 1761000000},
+    ]
+    original = item("2026-11-02_08:00", history=history)
+
+    slot = Slot.from_item(original)
+
+    assert slot.item is None
+    assert slot.to_dict() == original
+    assert encode_json(slot.to_dict()) == encode_json(original)
+
+
+def test_unseen_status_gets_a_code_and_round_trips():
+    original = item("2026-11-02_08:00", status="Held For Review")
+
+    slot = Slot.from_item(original)
+
+    assert slot.item is None
+    assert STATUS_NAMES[slot.status] == "Held For Review"
+    assert slot.to_dict() == original
+
+
+def unpackable(change):
+    original = item("2026-11-02_08:00")
+    change(original)
+    return original
+
+
+@pytest.mark.parametrize("original", [
+    unpackable(lambda entry: entry.update(note="extra field")),
+    unpackable(lambda entry: entry.pop("global_pk")),
+    unpackable(lambda entry: entry.update(global_pk="other")),
+    unpackable(lambda entry: entry.update(year_month="2026-10")),
+    unpackable(lambda entry: entry.update(time="8:00")),
+    unpackable(lambda entry: entry.update(last_changed="01761000000")),
+    unpackable(lambda entry: entry.update(last_changed=1761000000)),
+    unpackable(lambda entry: entry.update(status=None)),
+    unpackable(lambda entry: entry.update(history="Open")),
+    unpackable(lambda entry: entry["history"][0].update(note="extra")),
+    unpackable(lambda entry: entry["history"][0].update(timestamp=1761000000.5)),
+    unpackable(lambda entry: entry["history"][0].update(timestamp=True)),
+    unpackable(lambda entry: entry["history"][0].update(timestamp=2 ** 70)),
+], ids=[
+    "extra-field", "no-global-pk", "other-global-pk", "year-month", "time", "padded-last-changed",
+    "numeric-last-changed", "status", "history-type", "history-field", "float-timestamp",
+    "bool-timestamp", "huge-timestamp",
+])
+def test_unpackable_items_are_kept_as_dicts(original):
+    slot = Slot.from_item(original)
+
+    assert slot.item is original
+    assert slot.to_dict() == original
+
+
+def test_unpackable_items_encode_like_packed_ones_in_a_store():
+    items = [item("2026-11-02_08:00"), item("2026-11-02_09:00"), item("2026-11-02_10:00")]
+    items[1]["note"] = "kept as a dict"
+    store = SlotStore.build([Slot.from_item(entry) for entry in items], 1)
+
+    fragments, _ = store.encoded_between("2026-11-02", "2026-11-02")
+    assert b"[" + b",".join(fragments) + b"]" == encode_json(items)
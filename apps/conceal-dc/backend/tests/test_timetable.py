@@ -0,0 +1,15 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from timetable import parse_timetable
+
+FIXTURES = Path(__file__).parent / "fixtures" / "timetable"
+
+
+@pytest.mark.parametrize("page", sorted(FIXTURES.glob("*.html")), ids=lambda path: path.stem)
+def test_parse_timetable_matches_beautifulsoup_output(page):
+    """Each page's .json is what the BeautifulSoup parse_calendar_data returned for it."""
+    expected = json.loads(page.with_suffix(".json").read_text(encoding="utf-8"))
+    assert parse_timetable(page.read_text(encoding="utf-8")) == expected
@@ -0,0 +1,144 @@
+import datetime
+import html
+import re
+from functools import lru_cache
+from hashlib import blake2b
+from typing import List, Optional, Tuple
+
+# -------------------------------
+# ⚡ Timetable Extraction
+# -------------------------------
+
+SLOT_DATETIME_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+# One attribute the way html.parser's tolerant start-tag scanner reads it: `/` separates like
+# whitespace, a quoted value may run straight into the next name, and a bare value ends at `>`.
+_ATTRIBUTE_SYNTAX = (
+    r"""(?<=['"\s/])[^\s/>][^\s/=>]*(?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*))?(?:\s|/(?!>))*"""
+)
+_START_TAG_BODY = rf"""([\s/]*(?:{_ATTRIBUTE_SYNTAX})*)\s*/?>"""
+
+# Raw text and RCDATA elements: their content is text, never markup.
+_RAW_TEXT_ELEMENTS = 'script|style|textarea|title|xmp|iframe|noembed|noframes'
+
+# Scanned in document order, so a `<div` inside a comment, a raw text element or another
+# tag's attribute value is consumed with it and never reaches the `div` alternative.
+_MARKUP = re.compile(
+    r"<!--(?:-?>|.*?--!?>|.*\Z)"                                   # comment, possibly unclosed
+    r"|<[!?][^>]*>"                                                 # declaration or bogus comment
+    rf"|<({_RAW_TEXT_ELEMENTS})(?=[\s/>]){_START_TAG_BODY}"        # raw text element ...
+    r".*?(?:</\1(?=[\s/>])[^>]*>|\Z)"                              # ... through its end tag
+    rf"|<div(?=[\s/>]){_START_TAG_BODY}"                            # the tags we want
+    rf"|<[a-zA-Z][^\t\n\r\f />\x00]*{_START_TAG_BODY}",            # any other start tag
+    re.IGNORECASE | re.DOTALL
+)
+_DIV_BODY = 3
+
+_ATTRIBUTE = re.compile(
+    r"""((?<=['"\s/])[^\s/>][^\s/=>]*)(?:\s*=+\s*(?:"([^"]*)"|'([^']*)'|(?!['"])([^>\s]*)))?"""
+)
+
+
+def _attributes(page: str, start: int, end: int) -> dict:
+    """Attribute dict the way html.parser builds it: lowercased names, unescaped values, last one wins."""
+    attributes = {}
+    for name, double, single, bare in _ATTRIBUTE.findall(page, start, end):
+        value = double or single or bare
+        attributes[name.lower()] = html.unescape(value) if '&' in value else value
+    return attributes
+
+
+@lru_cache(maxsize=1024)
+def _decode_date(date_part: str) -> Tuple[str, str]:
+    parsed_date = datetime.datetime.strptime(date_part, "%m/%d/%Y")
+    return parsed_date.strftime('%Y-%m'), parsed_date.strftime('%Y-%m-%d')
+
+
+@lru_cache(maxsize=256)
+def _decode_time(time_part: str) -> str:
+    return datetime.datetime.strptime(time_part, "%I:%M:%S %p").strftime('%H:%M')
+
+
+def decode_slot_time(raw_slot_time: str) -> Tuple[str, str, str]:
+    """
+    Return (year_month, date, time) for a `data-fromdatetime` value. Raises ValueError if malformed.
+
+    The date and time halves are cached separately: a full cycle only has a few
+    hundred distinct days and a few dozen distinct times, while whole timestamps
+    never repeat within a cycle.
+    """
+    date_part, _, time_part = raw_slot_time.partition(' ')
+    try:
+        return (*_decode_date(date_part), _decode_time(time_part))
+    except ValueError:
+        # Anything off the common shape gets strptime's own acceptance rules and error message.
+        parsed_datetime = datetime.datetime.strptime(raw_slot_time, SLOT_DATETIME_FORMAT)
+        return (
+            parsed_datetime.strftime('%Y-%m'),
+            parsed_datetime.strftime('%Y-%m-%d'),
+            parsed_datetime.strftime('%H:%M')
+        )
+
+
+def parse_timetable(page: str) -> List[dict]:
+    """
+    Extract slots from a timetable page without building a document tree.
+
+    Tags are matched in document order, skipping comments and raw text, and only
+    `div` start tags mentioning `timeTableCell` have their attributes parsed.
+    Timestamps are decoded through small caches. The output matches what the
+    BeautifulSoup version of `parse_calendar_data` produced; the golden pages in
+    tests/fixtures/timetable hold it to that.
+    """
+    calendar_data = []
+
+    for match in _MARKUP.finditer(page):
+        text = match.group(_DIV_BODY)
+        # Without an entity the value can only match if it is spelled out
+        if not text or ('timeTableCell' not in text and '&' not in text):
+            continue
+        attributes = _attributes(page, match.start(_DIV_BODY), match.end(_DIV_BODY))
+        if attributes.get('data-function') != 'timeTableCell':
+            continue
+
+        raw_slot_time = attributes.get('data-fromdatetime', '').strip()
+        try:
+            year_month, slot_date, slot_time = decode_slot_time(raw_slot_time)
+        except (ValueError, TypeError) as e:
+            print(f"⚠️ Failed to parse datetime '{raw_slot_time}': {e}")
+            continue
+
+        style = attributes.get('style', '')
+        if 'background-color: #FF0000' in style:
+            status = "Booked"
+        elif 'background-color: #00FF00' in style:
+            status = "Open"
+        else:
+            status = "Unknown"
+
+        calendar_data.append({
+            'year_month': year_month,
+            'date_time': f"{slot_date}_{slot_time}",
+            'date': slot_date,
+            'time': slot_time,
+            'status': status
+        })
+
+    return calendar_data
+
+
+def timetable_digest(page: str) -> Optional[str]:
+    """
+    Digest of the timetable region: from the first `timeTableCell` tag to the end of the last one.
+
+    The rest of the page carries per-request tokens, so hashing the whole body
+    would never match. Returns None for pages without a timetable.
+    """
+    first = page.find('timeTableCell')
+    if first < 0:
+        return None
+    last = page.rfind('timeTableCell')
+    start = page.rfind('<', 0, first)
+    end = page.find('>', last)
+    region = page[max(start, 0):end + 1 if end >= 0 else len(page)]
+    return blake2b(region.encode('utf-8'), digest_size=16).hexdigest()
@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+# -------------------------------
+# 🧾 Week Content Digests
+# -------------------------------
+
+DEFAULT_DIGESTS_FILE = 'week_digests.json'
+
+
+class WeekDigests:
+    """
+    Last persisted timetable digest per week, kept in memory and saved to a local JSON file.
+
+    A digest is only stored after the week's slots were written to DynamoDB, so
+    a matching digest means DynamoDB already reflects that page.
+    """
+
+    def __init__(self, path: str = DEFAULT_DIGESTS_FILE):
+        self.path = path
+        self.digests: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.digests = json.load(f)
+            print(f"🧾 Loaded {len(self.digests)} week digests from {self.path}")
+        except FileNotFoundError:
+            self.digests = {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable week digests file {self.path}: {e}")
+            self.digests = {}
+
+    def unchanged(self, week_start: str, digest: Optional[str]) -> bool:
+        return digest is not None and self.digests.get(week_start) == digest
+
+    def remember(self, week_start: str, digest: Optional[str]) -> None:
+        with self.lock:
+            if digest is None:
+                self.dirty |= self.digests.pop(week_start, None) is not None
+            elif self.digests.get(week_start) != digest:
+                self.digests[week_start] = digest
+                self.dirty = True
+
+    def forget(self, week_start: str) -> None:
+        self.remember(week_start, None)
+
+    def save(self, horizon: Iterable[str]) -> None:
+        """Drop weeks that left the horizon and write the file if anything changed."""
+        with self.lock:
+            horizon = set(horizon)
+            for week_start in [week for week in self.digests if week not in horizon]:
+                del self.digests[week_start]
+                self.dirty = True
+            if not self.dirty:
+                return
+            snapshot = json.dumps(self.digests, sort_keys=True)
+            self.dirty = False
+
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(temporary, self.path)
+        except OSError as e:
+            print(f"⚠️ Failed to save week digests to {self.path}: {e}")
+            self.dirty = True
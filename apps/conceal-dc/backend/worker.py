@@ -3,8 +3,24 @@ import requests
 from bs4 import BeautifulSoup
 import boto3
 from boto3.dynamodb.conditions import Key
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import time
 import os
+import random
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from auth.database import USERS_TABLE_NAME
+from auth.notifications import NotificationService, format_opening_alert
+from notification_matcher import NotificationMatcher
+from timetable import parse_timetable, timetable_digest
+from scrape_schedule import ScrapeScheduler
+from week_digests import WeekDigests
+from slot_mirror import SlotMirror
+from pipeline import BatchWriter, ChangeStream, Stage
+from scraper_session import SessionExpired, SessionManager, TransportStats, session_expired
+from cycle_report import CycleProfiler, CycleTimings, week_breakdown, write_cycle_report
 
 # -------------------------------
 # 🛠️ Configuration
@@ -12,8 +28,18 @@ import os
 
 DDB_TABLE_NAME = 'Appointments'
 session = boto3.Session(profile_name='local-dynamodb')
-dynamodb = session.resource('dynamodb', endpoint_url='http://localhost:8000', region_name='us-east-1')
+# Sized for concurrent week threads plus the status-update pool
+dynamodb = session.resource(
+    'dynamodb', endpoint_url=os.getenv('DYNAMODB_ENDPOINT', 'http://localhost:8000'), region_name='us-east-1',
+    config=Config(max_pool_connections=32)
+)
 table = dynamodb.Table(DDB_TABLE_NAME)
+notifications_table = dynamodb.Table('Notifications')
+
+notification_service = NotificationService(
+    sns_client=session.client('sns', region_name='us-east-1'),
+    ses_client=session.client('ses', region_name='us-east-1')
+)
 
 
 BASE_FORM_DATA = {
@@ -24,10 +50,54 @@ BASE_FORM_DATA = {
 }
 
 WEEKS_TO_FETCH = 52
-
-INDEX_URL = 'https://go.nemoqappointment.com/Booking/Booking/Index/dc876re9gh'
-NEXT_URL = 'https://go.nemoqappointment.com/Booking/Booking/Next/dc876re9gh'
-POST_URL = 'https://go.nemoqappointment.com/Booking/Booking/Next/dc876re9gh'
+RULES_REFRESH_SECONDS = 300
+
+# Politeness limits for the booking site: calendar requests in flight at once,
+# and the minimum gap between starting two requests.
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '4'))
+MIN_REQUEST_INTERVAL_SECONDS = float(os.getenv('MIN_REQUEST_INTERVAL_SECONDS', '0.25'))
+# Jobs waiting between pipeline stages; a full queue blocks the stage feeding it
+STAGE_QUEUE_SIZE = 8
+# Handshaken sessions shared round-robin by concurrent requests
+SESSION_POOL_SIZE = int(os.getenv('SESSION_POOL_SIZE', '1'))
+RETRY_BASE_SECONDS = 1.0
+
+notification_matcher = None
+rules_loaded_at = 0
+scrape_scheduler = ScrapeScheduler()
+week_digests = WeekDigests(os.getenv('WEEK_DIGESTS_FILE', 'week_digests.json'))
+
+# Local copy of slot and daily status, so diffs don't read DynamoDB first.
+# Reconciliation reloads it from DynamoDB every MIRROR_RECONCILE_SECONDS (0 disables).
+slot_mirror = SlotMirror(table)
+MIRROR_RECONCILE_SECONDS = int(os.getenv('MIRROR_RECONCILE_SECONDS', '3600'))
+
+# Conditional status updates in flight at once, across all weeks
+WRITE_CONCURRENCY = int(os.getenv('WRITE_CONCURRENCY', '8'))
+write_pool = ThreadPoolExecutor(WRITE_CONCURRENCY, thread_name_prefix="ddb-write")
+# When a slot's history grows past this many entries, the older half moves to an
+# archive item in partition 'H<year_month>'. 0 keeps the whole history on the slot.
+HISTORY_MAX_ENTRIES = int(os.getenv('HISTORY_MAX_ENTRIES', '0'))
+HISTORY_ARCHIVE_PREFIX = 'H'
+
+# Per-stage timings for each cycle, appended as one JSON line per cycle to CYCLE_REPORT_FILE
+stage_timings = CycleTimings()
+CYCLE_REPORT_FILE = os.getenv('CYCLE_REPORT_FILE', 'cycle_reports.jsonl')
+
+# New slots and daily records from every week share full 25-item BatchWriteItem calls. Each
+# call is timed as `batch_write`; it is shared by several weeks, so not in the per-week breakdown.
+put_writer = BatchWriter(dynamodb.meta.client, DDB_TABLE_NAME, timings=stage_timings)
+# Change events for downstream consumers, published once a week's writes land
+slot_changes = ChangeStream()
+
+# `kill -USR1 <pid>` profiles the next cycle into PROFILE_DIR
+cycle_profiler = CycleProfiler(os.getenv('PROFILE_DIR', 'profiles'))
+
+# Overridable to point the worker at fake_booking_site.py
+BOOKING_SITE = os.getenv('BOOKING_SITE', 'https://go.nemoqappointment.com')
+INDEX_URL = f'{BOOKING_SITE}/Booking/Booking/Index/dc876re9gh'
+NEXT_URL = f'{BOOKING_SITE}/Booking/Booking/Next/dc876re9gh'
+POST_URL = f'{BOOKING_SITE}/Booking/Booking/Next/dc876re9gh'
 
 HEADERS = {
     'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
@@ -97,24 +167,60 @@ def fetch_new_tokens():
 # 📡 Fetch Calendar HTML with Dynamic Tokens
 # -------------------------------
 
-def fetch_calendar_html(session, start_date, retries=3):
+class RequestPacer:
+    """Spaces out request starts across threads by at least `interval` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+request_pacer = RequestPacer(MIN_REQUEST_INTERVAL_SECONDS)
+http_slots = threading.BoundedSemaphore(MAX_IN_FLIGHT_REQUESTS)
+transport_stats = TransportStats()
+
+
+def fetch_calendar_html(sessions, start_date, retries=3):
     """
-    Fetch timetable HTML for a given start date using pre-fetched tokens and cookies.
+    Fetch timetable HTML for a given start date using a warm session's token and cookies.
+    An expired session is re-established once; other failures back off with jitter.
     """
-    global HEADERS, BASE_FORM_DATA
-
     payload = BASE_FORM_DATA.copy()
     payload['FromDateString'] = start_date.strftime('%m/%d/%Y')
-    
-    HEADERS.update({
-        'origin': 'https://go.nemoqappointment.com',
-        'referer': INDEX_URL
-    })
+
+    headers = dict(HEADERS, origin=BOOKING_SITE, referer=INDEX_URL)
+    warm = sessions.lease()
+    refreshed = False
 
     for attempt in range(retries):
         try:
             print(f"🔄 Attempt {attempt + 1}: Fetching calendar for {start_date.strftime('%m/%d/%Y')}")
-            response = session.post(POST_URL, headers=HEADERS, data=payload)
+            with http_slots:
+                request_pacer.wait()
+                sent_at = time.perf_counter()
+                response = warm.session.post(
+                    POST_URL,
+                    headers=dict(headers, cookie=warm.cookie_header),
+                    data=dict(payload, __RequestVerificationToken=warm.token)
+                )
+                transport_stats.record(response, time.perf_counter() - sent_at)
+
+            if session_expired(response):
+                if refreshed:
+                    raise SessionExpired("❌ Session expired again right after the handshake.")
+                warm = sessions.refresh(warm)
+                refreshed = True
+                continue
+
             if response.status_code != 200:
                 raise Exception(f"❌ POST failed with status code {response.status_code}")
             
@@ -124,13 +230,16 @@ def fetch_calendar_html(session, start_date, retries=3):
             
             return response.text  # ✅ Success
         
+        except SessionExpired:
+            raise
         except Exception as e:
             print(f"⚠️ Attempt {attempt + 1} failed: {e}")
             if attempt < retries - 1:
-                print("🔄 Retrying...")
-                continue
-            else:
-                raise Exception("❌ All attempts to fetch calendar HTML have failed.")
+                delay = RETRY_BASE_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5)
+                print(f"🔄 Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    raise Exception("❌ All attempts to fetch calendar HTML have failed.")
 
 
 def log_failed_response(html, week_start):
@@ -154,41 +263,7 @@ def parse_calendar_data(html):
     """
     Parse available slots from the HTML timetable.
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    calendar_data = []
-    
-    slots = soup.find_all('div', {'data-function': 'timeTableCell'})
-    
-    for slot in slots:
-        raw_slot_time = slot.get('data-fromdatetime', '').strip()
-        aria_label = slot.get('aria-label', '').strip()
-        
-        try:
-            parsed_datetime = datetime.datetime.strptime(raw_slot_time, "%m/%d/%Y %I:%M:%S %p")
-            slot_date = parsed_datetime.strftime('%Y-%m-%d')  # Extract the date
-            slot_time = parsed_datetime.strftime('%H:%M')  # Extract the time
-            year_month = parsed_datetime.strftime('%Y-%m')  # Extract year and month
-        except (ValueError, TypeError) as e:
-            print(f"⚠️ Failed to parse datetime '{raw_slot_time}': {e}")
-            continue
-        
-        # Determine slot status
-        if 'background-color: #FF0000' in slot.get('style', ''):
-            status = "Booked"
-        elif 'background-color: #00FF00' in slot.get('style', ''):
-            status = "Open"
-        else:
-            status = "Unknown"
-        
-        calendar_data.append({
-            'year_month': year_month,
-            'date_time': f"{slot_date}_{slot_time}",
-            'date': slot_date,
-            'time': slot_time,
-            'status': status
-        })
-    
-    return calendar_data
+    return parse_timetable(html)
 
 
 # -------------------------------
@@ -211,7 +286,8 @@ def fetch_weekly_data_from_dynamodb(week_start):
         
         print(f"🔍 Querying DynamoDB for records from {date_start} to {date_end} in partition '{year_month}'...")
 
-        response = table.query(
+        response = dynamodb.meta.client.query(
+            TableName=DDB_TABLE_NAME,
             KeyConditionExpression=Key('year_month').eq(year_month) &
                                    Key('date_time').between(f"{date_start}_00:00", f"{date_end}_23:59"),
             ReturnConsumedCapacity='TOTAL'
@@ -231,21 +307,44 @@ def fetch_weekly_data_from_dynamodb(week_start):
 # 🔄 Compare and Update Changes
 # -------------------------------
 
-def compare_and_update_weekly_data(week_start, scraped_slots):
+def compare_and_update_weekly_data(week_start, scraped_slots, ddb_week_data=None):
     """
     Compare scraped data with DynamoDB data and update weekly changes,
-    while tracking daily availability.
+    while tracking daily availability. Returns the slots that were written.
+    """
+    if ddb_week_data is None:
+        ddb_week_data = fetch_weekly_data_from_dynamodb(week_start)
+    created, changed, daily_availability = diff_weekly_data(week_start, scraped_slots, ddb_week_data)
+
+    # Update weekly slots
+    if created or changed:
+        written = write_slot_updates(created, changed)
+        print(f"✅ Updated {len(written)} weekly slots in DynamoDB.")
+    else:
+        written = []
+        print("✅ No weekly updates were necessary.")
+
+    # Update daily availability
+    compare_and_update_daily_availability(daily_availability)
+
+    return written
+
+
+def diff_weekly_data(week_start, scraped_slots, ddb_week_data):
+    """
+    Compare scraped slots with the stored week. Returns the new slots, the
+    changed slots as (item, previous status) pairs, and whether each scraped
+    day has an opening.
     """
     now = int(time.time())  # Current epoch timestamp
     week_start_date = datetime.datetime.strptime(week_start, "%Y-%m-%d")
     year_month = week_start_date.strftime('%Y-%m')
 
-    # Fetch existing weekly data
-    ddb_week_data = fetch_weekly_data_from_dynamodb(week_start)
     print(f"🔄 Comparing and updating data for week {week_start}")
     print(f"🔄 Number of items returned from DynamoDB: {len(ddb_week_data)}")
     
-    updates = {}
+    created = []
+    changed = []
     daily_availability = {}
 
     for slot in scraped_slots:
@@ -269,11 +368,11 @@ def compare_and_update_weekly_data(week_start, scraped_slots):
         # Determine if slot needs updating
         if existing_slot:
             if existing_slot['status'] != status:
-                history = existing_slot.get('history', [])
-                history.append({'status': status, 'timestamp': now})
+                # A new list: the existing item may be the mirror's copy, which only changes after the write.
+                history = existing_slot.get('history', []) + [{'status': status, 'timestamp': now}]
                 
-                updates[date_time] = {
-                    'year_month': year_month,
+                changed.append(({
+                    'year_month': existing_slot.get('year_month', year_month),
                     'date_time': date_time,
                     'global_pk': 'updates',
                     'date': date,
@@ -281,27 +380,21 @@ def compare_and_update_weekly_data(week_start, scraped_slots):
                     'status': status,
                     'last_changed': str(now),
                     'history': history
-                }
+                }, existing_slot['status']))
         else:
-            updates[date_time] = {
+            # New slots are tagged too, so cache refreshes following RecentUpdatesIndex see them.
+            created.append({
                 'year_month': year_month,
                 'date_time': date_time,
+                'global_pk': 'updates',
                 'date': date,
                 'time': time_value,
                 'status': status,
                 'last_changed': str(now),
                 'history': [{'status': status, 'timestamp': now}]
-            }
-
-    # Update weekly slots
-    if updates:
-        batch_write_to_dynamodb(list(updates.values()))
-        print(f"✅ Updated {len(updates)} weekly slots in DynamoDB.")
-    else:
-        print("✅ No weekly updates were necessary.")
+            })
 
-    # Update daily availability
-    compare_and_update_daily_availability(daily_availability)
+    return created, changed, daily_availability
         
         
 # -------------------------------
@@ -312,23 +405,152 @@ def batch_write_to_dynamodb(items):
     """
     Perform a batch write to DynamoDB, optionally including 'global_pk' if it exists.
     """
-    with table.batch_writer() as batch:
-        for item in items:
-            ddb_item = {
-                'year_month': item['year_month'],  # Partition Key
-                'date_time': item['date_time'],  # Sort Key
-                'date': item['date'],
-                'time': item['time'],
-                'status': item['status'],
-                'last_changed': str(item['last_changed']),  # For RecentUpdatesIndex
-                'history': item['history']
-            }
-            
-            # Only add 'global_pk' if it exists in the item
-            if 'global_pk' in item:
-                ddb_item['global_pk'] = item['global_pk']
-            
-            batch.put_item(Item=ddb_item)
+    put_items([slot_item(item) for item in items])
+
+
+def put_items(items):
+    """
+    BatchWriteItem `items` in 25-item batches, retrying unprocessed ones. Goes
+    through the client, which unlike the `table` resource is safe to share
+    with the stage and write_pool threads.
+    """
+    writer = BatchWriter(dynamodb.meta.client, DDB_TABLE_NAME)
+    writer.add(items, None)
+    writer.flush()
+
+
+def slot_item(item):
+    """The DynamoDB item for a slot, optionally including 'global_pk' if it exists."""
+    ddb_item = {
+        'year_month': item['year_month'],  # Partition Key
+        'date_time': item['date_time'],  # Sort Key
+        'date': item['date'],
+        'time': item['time'],
+        'status': item['status'],
+        'last_changed': str(item['last_changed']),  # For RecentUpdatesIndex
+        'history': item['history']
+    }
+
+    # Only add 'global_pk' if it exists in the item
+    if 'global_pk' in item:
+        ddb_item['global_pk'] = item['global_pk']
+
+    return ddb_item
+
+
+def daily_item(date, status):
+    return {
+        'year_month': 'A',  # Fixed partition key
+        'date_time': date,  # Specific date
+        'status': str(status)  # Store as string '1' or '0'
+    }
+
+
+def write_slot_updates(created, changed):
+    """
+    Write new slots with a batch put and status changes with conditional
+    UpdateItems on `write_pool`. Returns the slots that were written, after
+    applying them to the mirror; changes that lost their condition are left out.
+    """
+    if created:
+        batch_write_to_dynamodb(created)
+    applied, error = apply_status_changes(changed)
+    written = list(created) + applied
+
+    if slot_mirror.loaded:
+        slot_mirror.apply_slots(written)
+    if error:
+        raise error
+    return written
+
+
+def apply_status_changes(changed):
+    """
+    Run conditional status updates on `write_pool`. Returns the items that were
+    applied and the first error, if any; every update is attempted either way.
+    """
+    update = cycle_profiler.profiled(update_slot_status)
+    futures = [(item, write_pool.submit(update, item, previous)) for item, previous in changed]
+    applied = []
+    error = None
+    for item, future in futures:
+        try:
+            if future.result():
+                applied.append(item)
+        except Exception as e:
+            error = error or e
+    return applied, error
+
+
+def update_slot_status(item, previous_status):
+    """
+    Apply one status change: set the new status and append its history entry,
+    on the condition that the stored status is still `previous_status`. Write
+    cost depends on the new entry, not the length of the history.
+    Returns False if the condition failed.
+    """
+    key = {'year_month': item['year_month'], 'date_time': item['date_time']}
+    values = {
+        ':status': item['status'],
+        ':previous': previous_status,
+        ':last_changed': str(item['last_changed']),
+        ':global_pk': item['global_pk']
+    }
+
+    if HISTORY_MAX_ENTRIES and len(item['history']) > HISTORY_MAX_ENTRIES:
+        # Archived first: if the update below then fails, entries may be archived twice but are never lost.
+        archive_slot_history(item)
+        set_history = '#history = :history'
+        values[':history'] = item['history']
+    else:
+        set_history = '#history = list_append(if_not_exists(#history, :empty), :entry)'
+        values[':entry'] = item['history'][-1:]
+        values[':empty'] = []
+
+    try:
+        # Runs on write_pool threads: the client is thread-safe, the `table` resource is not
+        dynamodb.meta.client.update_item(
+            TableName=DDB_TABLE_NAME,
+            Key=key,
+            UpdateExpression=f"SET #status = :status, #last_changed = :last_changed, #global_pk = :global_pk, {set_history}",
+            ConditionExpression='#status = :previous',
+            ExpressionAttributeNames={
+                '#status': 'status',
+                '#last_changed': 'last_changed',
+                '#global_pk': 'global_pk',
+                '#history': 'history'
+            },
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+    # Someone else changed the slot; adopt what is stored so the next diff starts from it.
+    print(f"⚠️ Status of {item['date_time']} was no longer '{previous_status}', skipping update.")
+    stored = dynamodb.meta.client.get_item(TableName=DDB_TABLE_NAME, Key=key, ConsistentRead=True).get('Item')
+    if stored and slot_mirror.loaded:
+        slot_mirror.apply_slots([stored])
+    return False
+
+
+def archive_slot_history(item):
+    """
+    Move all but the newest HISTORY_MAX_ENTRIES // 2 history entries to the slot's
+    archive item, trimming `item['history']` in place. The archive item has no
+    status or global_pk, so it stays out of the table's indexes. At least two
+    entries stay, so a reopened slot is never mistaken for a new one.
+    """
+    keep = max(2, HISTORY_MAX_ENTRIES // 2)
+    archived, item['history'] = item['history'][:-keep], item['history'][-keep:]
+    dynamodb.meta.client.update_item(
+        TableName=DDB_TABLE_NAME,
+        Key={'year_month': HISTORY_ARCHIVE_PREFIX + item['year_month'], 'date_time': item['date_time']},
+        UpdateExpression='SET #history = list_append(if_not_exists(#history, :empty), :archived)',
+        ExpressionAttributeNames={'#history': 'history'},
+        ExpressionAttributeValues={':archived': archived, ':empty': []}
+    )
 
 # -------------------------------
 # 🔄 Query Existing Daily Availability
@@ -339,7 +561,8 @@ def fetch_daily_availability():
     Fetch all daily availability records (PK: 'A') from DynamoDB.
     """
     try:
-        response = table.query(
+        response = dynamodb.meta.client.query(
+            TableName=DDB_TABLE_NAME,
             KeyConditionExpression=Key('year_month').eq('A')
         )
         items = response.get('Items', [])
@@ -359,8 +582,23 @@ def compare_and_update_daily_availability(scraped_availability):
     """
     Compare scraped daily availability with DynamoDB and update necessary changes.
     """
-    # Fetch existing availability from DynamoDB
-    existing_availability = fetch_daily_availability()
+    updates = diff_daily_availability(scraped_availability)
+
+    # Perform batch updates
+    if updates:
+        print(f"✅ Preparing to update {len(updates)} daily availability records...")
+        put_items([daily_item(date, status) for date, status in updates.items()])
+        if slot_mirror.loaded:
+            slot_mirror.apply_daily(updates)
+        print(f"✅ Successfully updated {len(updates)} daily availability records.")
+    else:
+        print("✅ No daily availability updates were necessary.")   
+
+
+def diff_daily_availability(scraped_availability):
+    """Return {date: 1 or 0} for the scraped days whose stored availability differs."""
+    # Existing availability comes from the mirror once it's loaded
+    existing_availability = slot_mirror.daily_snapshot() if slot_mirror.loaded else fetch_daily_availability()
     updates = {}
 
     # Compare each scraped day
@@ -372,62 +610,343 @@ def compare_and_update_daily_availability(scraped_availability):
             updates[date] = new_status
             print(f"🔄 Status change detected for {date}: {current_status} -> {new_status}")
 
-    # Perform batch updates
-    if updates:
-        print(f"✅ Preparing to update {len(updates)} daily availability records...")
-        with table.batch_writer() as batch:
-            for date, status in updates.items():
-                batch.put_item(
-                    Item={
-                        'year_month': 'A',  # Fixed partition key
-                        'date_time': date,  # Specific date
-                        'status': str(status)  # Store as string '1' or '0'
-                    }
-                )
-        print(f"✅ Successfully updated {len(updates)} daily availability records.")
-    else:
-        print("✅ No daily availability updates were necessary.")   
-            
+    return updates
+
+
 def batch_write_daily_availability(daily_availability):
     """
     Write daily availability data to DynamoDB.
     """
-    with table.batch_writer() as batch:
-        for date, is_available in daily_availability.items():
-            batch.put_item(
-                Item={
-                    'year_month': 'A',  # Fixed partition key for availability
-                    'date_time': date,  # Sort key is the specific date
-                    'status': str(int(is_available))  # Store 1 for true, 0 for false
-                }
-            )
+    put_items([daily_item(date, int(is_available)) for date, is_available in daily_availability.items()])
     print(f"✅ Updated daily availability for {len(daily_availability)} days.")
 
+# -------------------------------
+# 🔔 Notify Matching Users
+# -------------------------------
+
+def refresh_notification_rules(force=False):
+    """
+    Rebuild the notification matcher from every rule in the Notifications table,
+    at most once every RULES_REFRESH_SECONDS.
+    """
+    global notification_matcher, rules_loaded_at
+
+    if not force and time.time() - rules_loaded_at < RULES_REFRESH_SECONDS:
+        return
+
+    try:
+        rules = []
+        scan_config = {}
+        while True:
+            response = notifications_table.scan(**scan_config)
+            rules.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_config['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        notification_matcher = NotificationMatcher(
+            rules,
+            first_day=datetime.date.today(),
+            horizon_days=(WEEKS_TO_FETCH + 1) * 7 + 1
+        )
+        rules_loaded_at = time.time()
+        print(f"✅ Loaded {len(notification_matcher)} notification rules.")
+    except Exception as e:
+        print(f"❌ Failed to load notification rules: {e}")
+
+
+def get_users_by_ids(user_ids):
+    """Fetch users by user_id with BatchGetItem, 100 keys per request."""
+    users = {}
+    for i in range(0, len(user_ids), 100):
+        request = {USERS_TABLE_NAME: {'Keys': [{'user_id': user_id} for user_id in user_ids[i:i + 100]]}}
+        while request:
+            response = dynamodb.meta.client.batch_get_item(RequestItems=request)
+            for user in response.get('Responses', {}).get(USERS_TABLE_NAME, []):
+                users[user['user_id']] = user
+            request = response.get('UnprocessedKeys')
+    return users
+
+
+def notify_matching_users(changed_slots):
+    """
+    Alert the owners of every rule matched by a slot that has just flipped to Open.
+    Slots seen for the first time are skipped so a fresh table doesn't alert everyone.
+    """
+    openings = [slot for slot in changed_slots if slot['status'] == "Open" and len(slot['history']) > 1]
+    if not openings or notification_matcher is None:
+        return
+
+    slots_by_user = {}
+    for rule, slots in notification_matcher.match(openings):
+        user_slots = slots_by_user.setdefault(rule['user_id'], {})
+        for slot in slots:
+            user_slots[slot['date_time']] = slot
+
+    if not slots_by_user:
+        return
+
+    users = get_users_by_ids(list(slots_by_user))
+    for user_id, user_slots in slots_by_user.items():
+        user = users.get(user_id)
+        if not user:
+            continue
+
+        openings_for_user = list(user_slots.values())
+        message = format_opening_alert(openings_for_user)
+        try:
+            if user.get('phone_number'):
+                notification_service.enqueue_alert_via_sns(user['phone_number'], message, openings_for_user)
+            elif user.get('email'):
+                notification_service.enqueue_alert_via_ses(user['email'], message, openings_for_user)
+        except Exception as e:
+            print(f"❌ Failed to queue alert for user {user_id}: {e}")
+
+    print(f"🔔 Alerted {len(slots_by_user)} users about {len(openings)} new openings.")
+
 # -------------------------------
 # 📅 Monitor Appointments
 # -------------------------------
 
-def monitor_appointments(session):
+def fetch_week(sessions, job):
+    """
+    Scrape stage: fetch the week's page. Pages whose timetable matches the last
+    persisted digest finish here; the rest go on to be parsed.
+    """
+    try:
+        with stage_timings.measure('fetch', job):
+            html = fetch_calendar_html(sessions, job['current_date'])
+        with stage_timings.measure('digest', job):
+            job['digest'] = timetable_digest(html)
+        if slot_mirror.loaded:
+            job['stored'] = slot_mirror.week(job['week_start'])
+        if week_digests.unchanged(job['week_start'], job['digest']):
+            # Same timetable as the last page we persisted: nothing to parse, read or write.
+            job['result']['skipped'] = True
+            finish_week(job)
+            return None
+        job['html'] = html
+        return job
+    except Exception as e:
+        finish_week(job, e)
+
+
+def parse_week(job):
+    """Parse stage."""
+    try:
+        with stage_timings.measure('parse', job):
+            job['slots'] = parse_calendar_data(job.pop('html'))
+        return job
+    except Exception as e:
+        finish_week(job, e)
+
+
+def diff_week(job):
+    """Diff stage: compare against the mirror (or DynamoDB) and work out every write the week needs."""
+    try:
+        if job['stored'] is None:
+            with stage_timings.measure('read', job):
+                job['stored'] = fetch_weekly_data_from_dynamodb(job['week_start'])
+        with stage_timings.measure('diff', job):
+            job['created'], job['changed'], daily_availability = diff_weekly_data(
+                job['week_start'], job['slots'], job['stored']
+            )
+        with stage_timings.measure('daily', job):
+            job['daily'] = diff_daily_availability(daily_availability)
+        return job
+    except Exception as e:
+        finish_week(job, e)
+
+
+def write_week(job):
     """
-    Monitor appointments and track changes in DynamoDB.
+    Writer stage: run the week's conditional status updates, then queue its new
+    slots and daily records on the shared batch writer, which writes them in
+    full 25-item batches together with other weeks' puts.
     """
+    with stage_timings.measure('write', job):
+        job['applied'], job['error'] = apply_status_changes(job['changed'])
+    puts = [slot_item(item) for item in job['created']]
+    puts.extend(daily_item(date, status) for date, status in job['daily'].items())
+    try:
+        written = put_writer.add(puts, job)
+    except Exception as e:
+        abandon_puts(e)
+        return
+    for done in written:
+        finish_week(done)
+
+
+def flush_puts():
+    """Writer stage idle hook: write the partial batch once nothing else is queued."""
+    try:
+        written = put_writer.flush()
+    except Exception as e:
+        abandon_puts(e)
+        return
+    for done in written:
+        finish_week(done)
+
+
+def abandon_puts(error):
+    print(f"❌ Batch write failed: {error}")
+    for job in put_writer.abandon():
+        finish_week(job, error)
+
+
+def finish_week(job, error=None):
+    """
+    Record a week's outcome. Whatever reached DynamoDB is applied to the mirror
+    and published as a change event, even if part of the week failed; the
+    digest is remembered only on full success.
+    """
+    result = job['result']
+    week_start = job['week_start']
+
+    # Status updates are in as far as they got. The batched puts landed unless
+    # this week failed before them or its batch was abandoned (`error` given).
+    written = list(job.get('applied', []))
+    daily = {}
+    if error is None:
+        written = job.get('created', []) + written
+        daily = job.get('daily', {})
+    error = error or job.get('error')
+
+    if slot_mirror.loaded:
+        slot_mirror.apply_slots(written)
+        slot_mirror.apply_daily(daily)
+    if written or daily:
+        slot_changes.publish({'week_start': week_start, 'slots': written, 'daily': daily})
+
+    if error:
+        print(f"Error for {week_start}: {error}")
+        result['error'] = str(error)
+        week_digests.forget(week_start)
+    else:
+        week_digests.remember(week_start, job['digest'])
+        result.update(ok=True, slots=len(job.get('slots', [])), changes=len(written))
+
+    stored = job['stored'].values() if job['stored'] is not None else None
+    scrape_scheduler.record(week_start, job['index'], result['ok'], result['changes'], stored)
+    result['seconds'] = round(time.perf_counter() - job['started'], 3)
+    result['stages'] = week_breakdown(job)
+
+
+def notify_on_change(event):
+    """Change stream subscriber: alert users about slots that just opened."""
+    notify_matching_users(event['slots'])
+
+
+def sync_slot_mirror(weeks):
+    """
+    Load month partitions new to the horizon into the mirror, drop old ones, and
+    reconcile with DynamoDB when due. If loading fails, the cycle reads DynamoDB directly.
+    """
+    months = sorted({
+        (datetime.date.fromisoformat(week_start) + datetime.timedelta(days=offset)).strftime('%Y-%m')
+        for _, week_start in weeks for offset in (0, 6)
+    })
+    try:
+        slot_mirror.ensure_loaded(months)
+        slot_mirror.prune(months)
+        if MIRROR_RECONCILE_SECONDS and time.time() - slot_mirror.reconciled_at >= MIRROR_RECONCILE_SECONDS:
+            slot_drift, daily_drift = slot_mirror.reconcile()
+            print(f"🪞 Reconciled mirror: {slot_drift} slots and {daily_drift} days had drifted.")
+    except Exception as e:
+        print(f"⚠️ Failed to sync slot mirror, reading DynamoDB directly this cycle: {e}")
+
+
+def monitor_appointments(sessions):
+    """
+    Monitor appointments and track changes in DynamoDB. Due weeks flow through
+    fetch -> parse -> diff -> write stages joined by bounded queues, so a slow
+    stage holds back the ones before it instead of piling up work. Only weeks
+    the scheduler says are due are scraped. Returns one result per scraped
+    week, in week order, and appends the cycle report to CYCLE_REPORT_FILE.
+    """
+    profiling = cycle_profiler.start()
+    cycle_started = time.time()
+    started = time.perf_counter()
     start_date = datetime.date.today() + datetime.timedelta(days=1)
     end_date = start_date + datetime.timedelta(weeks=WEEKS_TO_FETCH)
     
+    refresh_notification_rules()
+
+    weeks = []
     current_date = start_date
     while current_date <= end_date:
         week_start = (current_date - datetime.timedelta(days=current_date.weekday())).strftime('%Y-%m-%d')
-        print(f"Fetching data for week starting: {week_start}")
-        
-        try:
-            html = fetch_calendar_html(session, current_date)
-            scraped_slots = parse_calendar_data(html)
-            compare_and_update_weekly_data(week_start, scraped_slots)
-        except Exception as e:
-            print(f"Error for {week_start}: {e}")
-        
+        weeks.append((current_date, week_start))
         current_date += datetime.timedelta(weeks=1)
 
+    with stage_timings.measure('mirror_sync'):
+        sync_slot_mirror(weeks)
+
+    due = set(scrape_scheduler.due([week_start for _, week_start in weeks]))
+    print(f"📅 {len(due)}/{len(weeks)} weeks due this cycle.")
+
+    slot_changes.start()
+    profiled = cycle_profiler.profiled
+    writer = Stage('write', profiled(write_week), queue_size=STAGE_QUEUE_SIZE, on_idle=profiled(flush_puts))
+    differ = Stage('diff', profiled(diff_week), queue_size=STAGE_QUEUE_SIZE, downstream=writer)
+    parser = Stage('parse', profiled(parse_week), queue_size=STAGE_QUEUE_SIZE, downstream=differ)
+    fetcher = Stage(
+        'fetch', profiled(lambda job: fetch_week(sessions, job)),
+        workers=MAX_IN_FLIGHT_REQUESTS, queue_size=STAGE_QUEUE_SIZE, downstream=parser
+    )
+    for stage in (writer, differ, parser, fetcher):
+        stage.start()
+
+    jobs = []
+    for index, (current_date, week_start) in enumerate(weeks):
+        if week_start in due:
+            job = {
+                'index': index,
+                'current_date': current_date,
+                'week_start': week_start,
+                'started': time.perf_counter(),
+                'stored': None,
+                'digest': None,
+                'result': {'week_start': week_start, 'ok': False, 'slots': 0, 'changes': 0, 'skipped': False}
+            }
+            jobs.append(job)
+            fetcher.put(job)
+    fetcher.close()  # Waits for every stage to drain, in order
+
+    results = [job['result'] for job in jobs]
+    week_digests.save(week_start for _, week_start in weeks)
+
+    failed = [result['week_start'] for result in results if not result['ok']]
+    skipped = sum(1 for result in results if result['skipped'])
+    print(f"✅ Scraped {len(results) - len(failed)}/{len(results)} due weeks ({skipped} unchanged), "
+          f"{sum(result['changes'] for result in results)} slot changes. Schedule: {scrape_scheduler.summary()}")
+    if failed:
+        print(f"⚠️ Failed weeks: {', '.join(failed)}")
+    transport = transport_stats.snapshot()
+    print(f"📡 Transport: {transport}")
+    print(f"🚀 Batch writes: {put_writer.stats}")
+
+    stages = stage_timings.snapshot()
+    print("⏱️ Stages (p50/p95/p99 ms): " + ", ".join(
+        f"{stage} {timing['p50_ms']}/{timing['p95_ms']}/{timing['p99_ms']}" for stage, timing in stages.items()
+    ))
+    write_cycle_report({
+        'started_at': round(cycle_started, 3),
+        'seconds': round(time.perf_counter() - started, 3),
+        'weeks_total': len(weeks),
+        'weeks_due': len(due),
+        'weeks_failed': len(failed),
+        'weeks_unchanged': skipped,
+        'changes': sum(result['changes'] for result in results),
+        'stages': stages,
+        'weeks': results,
+        'transport': transport,
+        'batch_writes': dict(put_writer.stats),
+        'mirror_slots': len(slot_mirror),
+        'profile': cycle_profiler.stop() if profiling else None
+    }, CYCLE_REPORT_FILE)
+    return results
+
 
 # -------------------------------
 # 🏁 Main Function with Scheduler
@@ -436,15 +955,18 @@ def monitor_appointments(session):
 if __name__ == "__main__":
     try:
         # print("🔑 Fetching fresh tokens and cookies...")
-        verification_token, cookie_header, session = fetch_new_tokens()
-        
-        HEADERS['cookie'] = cookie_header
-        BASE_FORM_DATA['__RequestVerificationToken'] = verification_token
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, cycle_profiler.request)
+        sessions = SessionManager(fetch_new_tokens, SESSION_POOL_SIZE)
+        sessions.start()
+        notification_service.start()
+        slot_changes.subscribe(notify_on_change)
+        week_digests.load()
 
         while True:
             print("\n🔄 Starting appointment monitoring cycle...")
             now = datetime.datetime.now()
-            monitor_appointments(session)
+            monitor_appointments(sessions)
             print("Run took: " + str(datetime.datetime.now() - now))
             print("✅ Monitoring cycle complete. Waiting 60 seconds before the next run...\n")
             time.sleep(60)